@@ -170,10 +170,25 @@ export const useConnectionStore = defineStore('connection', {
 
         console.log('Neuro Sama connection established successfully')
 
+        // Announce that this client answers pings, so a silent connection is closed
+        this.neuroSamaWs?.send(JSON.stringify({ type: 'hello', capabilities: ['pong'] }))
+
         // Now also connect to the chat endpoint
         this.connectToNeuroSamaChat()
       }
 
+      // Answer keepalive pings; Neuro Sama closes admin connections that stop answering
+      this.neuroSamaWs.addEventListener('message', (event: MessageEvent) => {
+        try {
+          const data = JSON.parse(event.data)
+          if (data.type === 'ping' && this.neuroSamaWs?.readyState === WebSocket.OPEN) {
+            this.neuroSamaWs.send(JSON.stringify({ type: 'pong', timestamp: data.timestamp }))
+          }
+        } catch (error) {
+          console.error('Error parsing Neuro Sama message:', error)
+        }
+      })
+
       this.neuroSamaWs.onclose = (event) => {
         clearTimeout(connectionTimeout) // Clear timeout on close
         console.log('Disconnected from Neuro Sama admin WebSocket:', event.code, event.reason)
@@ -218,8 +233,14 @@ export const useConnectionStore = defineStore('connection', {
         this.neuroSamaChatWs.close()
       }
 
-      // Create WebSocket connection to Neuro Sama Chat
-      this.neuroSamaChatWs = new WebSocket(this.neuroSamaChatWsUrl)
+      // Create WebSocket connection to Neuro Sama Chat. The binary protocol sends
+      // speak audio as raw binary frames instead of base64 inside the JSON pack.
+      const chatUrl = this.neuroSamaChatWsUrl + (this.neuroSamaChatWsUrl.includes('?') ? '&' : '?') + 'protocol=binary'
+      this.neuroSamaChatWs = new WebSocket(chatUrl)
+      this.neuroSamaChatWs.binaryType = 'arraybuffer'
+
+      // Speak packs waiting for their audio frame, keyed by segment id
+      const pendingSpeakPacks = new Map<number, any>()
 
       // Set up connection timeout to ensure it doesn't hang indefinitely
       const connectionTimeout = setTimeout(() => {
@@ -247,7 +268,28 @@ export const useConnectionStore = defineStore('connection', {
         // Forward chat messages to any registered handler
         // This will be handled by the component that uses this store
         try {
+          if (event.data instanceof ArrayBuffer) {
+            // Audio frame: a big-endian uint32 segment id followed by the raw audio
+            const segmentId = new DataView(event.data).getUint32(0)
+            const data = pendingSpeakPacks.get(segmentId)
+            if (!data) {
+              console.error(`Received audio for unknown speak segment ${segmentId}`)
+              return
+            }
+            pendingSpeakPacks.delete(segmentId)
+            data.payload.audio_blob = new Blob([event.data.slice(4)], { type: `audio/${data.payload.audio_format || 'wav'}` })
+            if (this.onChatMessage) {
+              this.onChatMessage(data);
+            }
+            return
+          }
+
           const data = JSON.parse(event.data);
+          if (data.type === 'speak' && data.payload?.audio_size > 0) {
+            // Deliver the pack once its audio frame has arrived
+            pendingSpeakPacks.set(data.payload.segment_id, data)
+            return
+          }
           if (this.onChatMessage) {
             this.onChatMessage(data);
           }
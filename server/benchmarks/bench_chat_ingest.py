@@ -0,0 +1,216 @@
+"""
+Benchmark for the chat ingestion stage.
+
+Generates a synthetic Twitch-style chat (many users, emote spam, mutated
+copy-pasta, a few spammers) in the format the stream sends, with the viewer
+only named inside the context prefix of `content`, and measures:
+
+1. The false positive rate of near-duplicate detection on distinct
+   messages, which must stay below MAX_FALSE_POSITIVE_RATE.
+2. Raw throughput of ChatIngestor.offer on one core, with per-message
+   latency percentiles.
+3. A live run through ChatSession at a sustained target rate, with a
+   heartbeat task measuring how late the event loop wakes it up, to show
+   that ingestion does not block the loop.
+
+Usage:
+    python server/benchmarks/bench_chat_ingest.py [--messages 50000] [--rate 1000] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from neuro_simulator.neuro_sama.chat_ingest import ChatIngestor, NearDuplicateFilter  # noqa: E402
+from neuro_simulator.neuro_sama.turn_scheduler import ChatSession, TurnScheduler  # noqa: E402
+
+WORDS = (
+    "neuro vedal cookie gymbag filtered evil twins heart lava lamp tutel "
+    "stream chat song karaoke minecraft osu when where why how lol lmao "
+    "pog based cringe true real fake swarm abandoned harpoon hi bye love "
+    "question answer game play win lose clip this that yes no maybe"
+).split()
+
+EMOTES = ["neuroHeart", "KEKW", "LUL", "Pog", "o7", "neuroWink", "evilSmile"]
+
+# Context the stream puts in front of every chat message
+CHAT_PREFIX = "LIVE CONTEXT: Neuro is currently live streaming on Twitch. Chat user '{username}' says: {text}"
+
+# Share of distinct messages that may be mistaken for near-duplicates
+MAX_FALSE_POSITIVE_RATE = 0.01
+
+COPY_PASTAS = [
+    "Vedal please give Neuro a body she deserves it after all this time o7 o7 o7",
+    "I am once again asking Neuro to sing the lava lamp song for the swarm",
+    "This is a certified filtered moment, chat clip it before Vedal deletes it",
+]
+
+
+def make_chat(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Build a synthetic chat log."""
+    users = [f"viewer{i}" for i in range(5000)]
+    spammers = [f"spammer{i}" for i in range(20)]
+    messages = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.2:
+            pasta = list(rng.choice(COPY_PASTAS))
+            # Copy-pasta is rarely pasted exactly
+            for _ in range(rng.randint(0, 3)):
+                pasta.insert(rng.randrange(len(pasta)), rng.choice("!?. o"))
+            text = "".join(pasta)
+            username = rng.choice(users)
+        elif roll < 0.3:
+            text = " ".join(rng.choice(EMOTES) for _ in range(rng.randint(1, 6)))
+            username = rng.choice(users)
+        elif roll < 0.4:
+            text = f"check out my channel {rng.randint(1, 99)}"
+            username = rng.choice(spammers)
+        else:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 18)))
+            username = users[min(int(rng.paretovariate(1.2)) - 1, len(users) - 1)]
+        messages.append({
+            "module": "stream_system",
+            "content": CHAT_PREFIX.format(username=username, text=text),
+        })
+    return messages
+
+
+def make_distinct_chat(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Build chat messages that are all different from each other."""
+    texts = set()
+    while len(texts) < count:
+        texts.add(" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 18))))
+    return [
+        {"module": "stream_system", "content": CHAT_PREFIX.format(username=f"viewer{i}", text=text)}
+        for i, text in enumerate(sorted(texts))
+    ]
+
+
+def bench_false_positives(messages: List[Dict[str, Any]]):
+    """Offer distinct messages to the duplicate filter; none of them should be dropped."""
+    duplicates = NearDuplicateFilter()
+    false_positives = sum(duplicates.check(ChatIngestor.message_text(data), 0.0) for data in messages)
+    rate = false_positives / len(messages)
+
+    print("Duplicate detection")
+    print(f"  distinct messages: {len(messages)}")
+    print(f"  false positives:   {false_positives} ({rate:.2%})")
+    assert rate <= MAX_FALSE_POSITIVE_RATE, (
+        f"{rate:.2%} of distinct messages were dropped as near-duplicates "
+        f"(limit {MAX_FALSE_POSITIVE_RATE:.2%})"
+    )
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def bench_throughput(messages: List[Dict[str, Any]], rate: float):
+    """Offer every message with a simulated clock advancing at `rate` messages per second."""
+    ingestor = ChatIngestor(rng=random.Random(1))
+    latencies = []
+    clock = 0.0
+    start = time.perf_counter()
+    for index, data in enumerate(messages):
+        began = time.perf_counter()
+        ingestor.offer(data, now=clock)
+        latencies.append(time.perf_counter() - began)
+        clock += 1.0 / rate
+        if index % 1000 == 999:
+            # Roughly one turn per second of chat
+            ingestor.drain()
+    elapsed = time.perf_counter() - start
+
+    print("Throughput")
+    print(f"  messages:        {len(messages)}")
+    print(f"  elapsed:         {elapsed:.3f}s")
+    print(f"  rate:            {len(messages) / elapsed:,.0f} msgs/sec")
+    print(f"  offer p50/p99:   {percentile(latencies, 0.5) * 1e6:.1f} / {percentile(latencies, 0.99) * 1e6:.1f} us")
+    print(f"  offer max:       {max(latencies) * 1e6:.1f} us")
+    stats = ingestor.get_stats()
+    print(f"  rate limited:    {stats['rate_limited']}")
+    print(f"  duplicates:      {stats['duplicate']}")
+    print(f"  accepted:        {stats['accepted']}")
+
+
+async def bench_live(messages: List[Dict[str, Any]], rate: float, duration: float):
+    """Feed a ChatSession at a sustained rate while measuring event loop lag."""
+    turns = []
+
+    async def run_turn(data):
+        turns.append(data)
+        await asyncio.sleep(0.5)  # stands in for an LLM turn
+
+    session = ChatSession(run_turn, scheduler=TurnScheduler(), ingestor=ChatIngestor(rng=random.Random(2)))
+    session.start()
+
+    lags = []
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        interval = 0.005
+        while not stop.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - expected)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+
+    # Deliver messages in 10 ms ticks, like a socket reader would
+    tick = 0.01
+    per_tick = rate * tick
+    sent = 0
+    owed = 0.0
+    start = time.perf_counter()
+    next_tick = start
+    while time.perf_counter() - start < duration:
+        owed += per_tick
+        while owed >= 1:
+            session.submit(messages[sent % len(messages)])
+            sent += 1
+            owed -= 1
+        next_tick += tick
+        await asyncio.sleep(max(0.0, next_tick - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await heartbeat_task
+    await session.close()
+
+    stats = session.ingestor.get_stats()
+    print("Live session")
+    print(f"  offered:         {sent} in {elapsed:.2f}s ({sent / elapsed:,.0f} msgs/sec)")
+    print(f"  turns:           {len(turns)}, messages per turn: "
+          f"{statistics.mean(t['sampled'] for t in turns) if turns else 0:.1f}")
+    print(f"  filtered:        {stats['rate_limited']} rate limited, {stats['duplicate']} duplicates")
+    print(f"  loop lag p50/p99/max: {percentile(lags, 0.5) * 1000:.2f} / "
+          f"{percentile(lags, 0.99) * 1000:.2f} / {max(lags) * 1000:.2f} ms")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--messages", type=int, default=50000, help="Messages for the throughput run")
+    arg_parser.add_argument("--rate", type=float, default=1000, help="Chat rate in msgs/sec (default: 1000)")
+    arg_parser.add_argument("--duration", type=float, default=5, help="Seconds for the live run")
+    arg_parser.add_argument("--seed", type=int, default=1234)
+    args = arg_parser.parse_args()
+
+    bench_false_positives(make_distinct_chat(2000, random.Random(args.seed)))
+    print()
+    messages = make_chat(args.messages, random.Random(args.seed))
+    bench_throughput(messages, args.rate)
+    print()
+    asyncio.run(bench_live(messages, args.rate, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Microbenchmark for the streaming JSON parser.
+
+Compares the incremental StreamingJSONParser with the previous
+implementation, which appended every chunk to a string buffer and rescanned
+it from the start on each feed. Synthetic LLM responses (a JSON array of
+tool calls) of 10-50 KB are fed a few characters at a time, roughly the
+granularity of streamed tokens.
+
+Usage:
+    python server/benchmarks/bench_json_parser.py [--sizes 10 20 50] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from neuro_simulator.neuro_sama.json_stream_parser import StreamingJSONParser  # noqa: E402
+
+
+class LegacyStreamingJSONParser:
+    """The previous buffer-rescanning parser, kept here for comparison."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self.buffer += text
+        objects = []
+        while True:
+            start_idx = self._find_next_json_start(self.buffer)
+            if start_idx == -1:
+                break
+            end_idx = self._find_matching_bracket_end(self.buffer, start_idx)
+            if end_idx == -1:
+                break
+            json_str = self.buffer[start_idx:end_idx + 1]
+            try:
+                objects.append(json.loads(json_str))
+                self.buffer = self.buffer[end_idx + 1:]
+            except json.JSONDecodeError:
+                self.buffer = self.buffer[start_idx + 1:]
+        return objects
+
+    def _find_next_json_start(self, text: str) -> int:
+        in_string = False
+        escape_next = False
+        for i, char in enumerate(text):
+            if escape_next:
+                escape_next = False
+                continue
+            if char == '\\':
+                escape_next = True
+                continue
+            if char == '"' and not escape_next:
+                in_string = not in_string
+                continue
+            if not in_string and char == '{':
+                return i
+        return -1
+
+    def _find_matching_bracket_end(self, text: str, start: int) -> int:
+        nested_level = 0
+        in_string = False
+        escape_next = False
+        for i in range(start, len(text)):
+            char = text[i]
+            if escape_next:
+                escape_next = False
+                continue
+            if char == '\\':
+                escape_next = True
+                continue
+            if not in_string:
+                if char == '{':
+                    nested_level += 1
+                elif char == '}':
+                    nested_level -= 1
+                    if nested_level == 0:
+                        return i
+                elif char == '"':
+                    in_string = True
+            else:
+                if char == '"':
+                    in_string = False
+        return -1
+
+
+WORDS = (
+    "chat cookies vedal evil swarm filtered stream queen subs meow heart "
+    "tutel gymbag donation rhythm story twitch sister anny collab"
+).split()
+
+
+def make_response(target_bytes: int, rng: random.Random) -> str:
+    """Build a JSON array of think/add_temp_memory/speak calls of roughly `target_bytes`."""
+    calls = []
+    size = 2
+    while size < target_bytes:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 30)))
+        kind = rng.choice(["think", "add_temp_memory", "speak", "speak"])
+        if kind == "think":
+            call = {"name": "think", "params": {"thought": f"{sentence} {{braces}} \"quoted\"."}}
+        elif kind == "add_temp_memory":
+            call = {"name": "add_temp_memory", "params": {"content": sentence, "role": "assistant"}}
+        else:
+            call = {"name": "speak", "params": {"text": sentence.capitalize() + "!"}}
+        text = json.dumps(call, indent=4)
+        calls.append(text)
+        size += len(text) + 6
+    return "```json\n[\n" + ",\n".join(calls) + "\n]\n```"
+
+
+def tokenize(text: str, rng: random.Random) -> List[str]:
+    """Split text into token-sized chunks of 1-6 characters."""
+    chunks = []
+    pos = 0
+    while pos < len(text):
+        step = rng.randint(1, 6)
+        chunks.append(text[pos:pos + step])
+        pos += step
+    return chunks
+
+
+def run(parser_class, chunks: List[str]):
+    parser = parser_class()
+    objects = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        objects.extend(parser.feed(chunk))
+    return time.perf_counter() - start, objects
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 30, 40, 50],
+                            help="Response sizes in KB (default: 10 20 30 40 50)")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Runs per size, best time is reported")
+    arg_parser.add_argument("--seed", type=int, default=1234)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>8} {'chunks':>8} {'objects':>8} {'legacy ms':>11} {'incremental ms':>15} {'speedup':>8}")
+    for size_kb in args.sizes:
+        response = make_response(size_kb * 1024, rng)
+        chunks = tokenize(response, rng)
+
+        legacy_times, new_times = [], []
+        for _ in range(args.repeat):
+            legacy_time, legacy_objects = run(LegacyStreamingJSONParser, chunks)
+            new_time, new_objects = run(StreamingJSONParser, chunks)
+            legacy_times.append(legacy_time)
+            new_times.append(new_time)
+            if legacy_objects != new_objects:
+                raise SystemExit(f"Parsers disagree on the {size_kb} KB response")
+
+        legacy_best, new_best = min(legacy_times), min(new_times)
+        print(f"{len(response) / 1024:>6.1f}KB {len(chunks):>8} {len(new_objects):>8} "
+              f"{legacy_best * 1000:>11.1f} {new_best * 1000:>15.1f} {legacy_best / new_best:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
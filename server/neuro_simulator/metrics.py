@@ -0,0 +1,272 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms register themselves in `REGISTRY`, and
+`metrics_response` renders it for a `/metrics` endpoint. Both the Neuro
+Sama module and Vedal Studio serve their own process's registry.
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from fastapi import Response
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+GaugeFunction = Callable[[], Union[float, Dict[LabelValues, float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    """A set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric name: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.exposed_name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.exposed_name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric(ABC):
+    """Base class for all metric types."""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, object] = {}
+        if registry is not None:
+            registry.register(self)
+
+    @property
+    def exposed_name(self) -> str:
+        """The name the metric is rendered under."""
+        return self.name
+
+    @abstractmethod
+    def _new_child(self):
+        """A new child metric holding the value of one combination of label values."""
+        pass
+
+    def labels(self, *values: str):
+        """The child metric for one combination of label values."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._new_child()
+                self._children[key] = child
+            return child
+
+    def _unlabeled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use labels()")
+        return self.labels()
+
+    def _items(self) -> List[Tuple[LabelValues, object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """The sample lines of the metric in the text exposition format."""
+        pass
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. the number of turns run."""
+
+    type = "counter"
+
+    @property
+    def exposed_name(self) -> str:
+        # As prometheus_client does, HELP, TYPE and samples share the suffixed name
+        return f"{self.name}_total"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counters can only be increased")
+        self._unlabeled().inc(amount)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in self._items():
+            yield f"{self.exposed_name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down, e.g. a queue depth.
+
+    Instead of being set, a gauge can read its value when it is rendered via
+    `set_function`. For a labeled gauge the function returns a mapping from
+    label values to value.
+    """
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._function: Optional[GaugeFunction] = None
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self._unlabeled().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._unlabeled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabeled().dec(amount)
+
+    def set_function(self, function: GaugeFunction) -> "Gauge":
+        self._function = function
+        return self
+
+    def samples(self) -> Iterator[str]:
+        if self._function is None:
+            items = [(values, child.value) for values, child in self._items()]
+        else:
+            try:
+                result = self._function()
+            except Exception:
+                return
+            items = sorted(result.items()) if isinstance(result, dict) else [((), result)]
+        for values, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}"
+
+
+class _HistogramValue:
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.sum += value
+            for index, bound in enumerate(self.upper_bounds):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Observations counted into buckets, e.g. stage latencies in seconds."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = REGISTRY):
+        bounds = sorted(float(bucket) for bucket in buckets)
+        if not bounds or not math.isinf(bounds[-1]):
+            bounds.append(math.inf)
+        self.upper_bounds = tuple(bounds)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float):
+        self._unlabeled().observe(value)
+
+    def time(self):
+        """Context manager observing the seconds spent inside it."""
+        return self._unlabeled().time()
+
+    def samples(self) -> Iterator[str]:
+        for values, child in self._items():
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+def metrics_response(registry: Registry = REGISTRY) -> Response:
+    """Render the registry as a `/metrics` response."""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
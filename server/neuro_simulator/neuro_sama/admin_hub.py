@@ -0,0 +1,243 @@
+"""
+Admin WebSocket fan-out for the Neuro Sama module.
+
+Each admin connection gets its own writer task draining a bounded queue,
+so a slow or half-dead dashboard tab only delays itself. Broadcasts only
+enqueue and never wait on a socket. Updates that replace the previous one
+of their kind, such as `memory_update` and `context_update`, are coalesced:
+a newer one replaces the pending older one. When a queue is full the oldest
+droppable message is dropped.
+
+Every connection gets a `ping` message each ping interval. A connection is
+closed when a send to it fails or times out. Clients that announce the
+`pong` capability in a `hello` message, as the dashboard does, are also
+closed once they stop answering pings; other clients are never expected
+to answer.
+"""
+
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from ..metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_PING_INTERVAL = 20.0
+DEFAULT_PING_TIMEOUT = 20.0
+DEFAULT_SEND_TIMEOUT = 5.0
+
+ADMIN_DROPPED = Counter("neuro_admin_dropped_messages", "Admin messages dropped or replaced before being sent",
+                        ["reason"])
+ADMIN_CLOSED = Counter("neuro_admin_closed_connections", "Admin connections closed by the server", ["reason"])
+
+# Key of a queued message and whether it may be dropped or replaced
+_QueueKey = Tuple[str, object]
+
+
+class AdminConnection:
+    """One admin WebSocket and the task writing its queued messages."""
+
+    def __init__(self, websocket: WebSocket, hub: "AdminHub"):
+        self.websocket = websocket
+        self.hub = hub
+        # Pending messages in send order; coalesced messages are keyed by their
+        # type, everything else by a unique number
+        self._pending: "collections.OrderedDict[_QueueKey, str]" = collections.OrderedDict()
+        self._droppable = 0
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.last_seen = time.monotonic()
+        # Set by a `hello` announcing the `pong` capability
+        self.answers_pings = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, text: str, coalesce_key: Optional[str] = None, droppable: bool = True):
+        """
+        Queue a message without waiting for it to be sent.
+
+        A message with a `coalesce_key` replaces a pending message with the
+        same key. Messages that are not droppable, such as replies to a
+        request, are never dropped when the queue is full.
+        """
+        if self.closed:
+            return
+        if coalesce_key is not None:
+            key: _QueueKey = ("coalesce", coalesce_key)
+            if self._pending.pop(key, None) is not None:
+                self._droppable -= 1
+                self.coalesced += 1
+                ADMIN_DROPPED.labels("coalesced").inc()
+        else:
+            key = ("message" if droppable else "reply", next(self._sequence))
+        self._pending[key] = text
+        if key[0] != "reply":
+            self._droppable += 1
+            if self._droppable > self.hub.queue_size:
+                self._drop_oldest()
+        self._wakeup.set()
+
+    async def send_text(self, text: str):
+        """Queue a reply to this connection; awaitable in place of `WebSocket.send_text`."""
+        self.enqueue(text, droppable=False)
+
+    def _drop_oldest(self):
+        for key in self._pending:
+            if key[0] != "reply":
+                del self._pending[key]
+                self._droppable -= 1
+                self.dropped += 1
+                ADMIN_DROPPED.labels("queue_full").inc()
+                return
+
+    def touch(self):
+        """Record that the client was heard from."""
+        self.last_seen = time.monotonic()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def _run(self):
+        try:
+            while True:
+                if not self._pending:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                key, text = self._pending.popitem(last=False)
+                if key[0] != "reply":
+                    self._droppable -= 1
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(text), timeout=self.hub.send_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("Admin connection did not accept a message within %.1fs, closing it",
+                                   self.hub.send_timeout)
+                    await self.hub.close(self, "send_timeout")
+                    return
+                except Exception as e:
+                    logger.warning("Error sending message to admin connection: %s", e)
+                    await self.hub.close(self, "send_error")
+                    return
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+
+    async def close(self):
+        """Stop the writer and close the socket, without waiting on a stuck client."""
+        if self.closed:
+            return
+        self.closed = True
+        self._pending.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        try:
+            await asyncio.wait_for(self.websocket.close(), timeout=1.0)
+        except Exception:
+            pass
+
+
+class AdminHub:
+    """The admin connections of the process and the task pinging them."""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, ping_interval: float = DEFAULT_PING_INTERVAL,
+                 ping_timeout: float = DEFAULT_PING_TIMEOUT, send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        self.connections: Set[AdminConnection] = set()
+        self._ping_task: Optional[asyncio.Task] = None
+        self.configure(queue_size, ping_interval, ping_timeout, send_timeout)
+
+    def configure(self, queue_size: int = DEFAULT_QUEUE_SIZE, ping_interval: float = DEFAULT_PING_INTERVAL,
+                  ping_timeout: float = DEFAULT_PING_TIMEOUT, send_timeout: float = DEFAULT_SEND_TIMEOUT):
+        self.queue_size = max(1, queue_size)
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.send_timeout = send_timeout
+
+    def configure_from(self, config):
+        """Apply the admin settings of a config."""
+        self.configure(
+            getattr(config, "ADMIN_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+            getattr(config, "ADMIN_PING_INTERVAL", DEFAULT_PING_INTERVAL),
+            getattr(config, "ADMIN_PING_TIMEOUT", DEFAULT_PING_TIMEOUT),
+            getattr(config, "ADMIN_SEND_TIMEOUT", DEFAULT_SEND_TIMEOUT),
+        )
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    def register(self, websocket: WebSocket) -> AdminConnection:
+        connection = AdminConnection(websocket, self)
+        connection.start()
+        self.connections.add(connection)
+        if self.ping_interval > 0 and (
+            self._ping_task is None or self._ping_task.done()
+            # A task left on the loop of a previous app run never finishes
+            or self._ping_task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._ping_task = asyncio.create_task(self._ping_loop())
+        return connection
+
+    def unregister(self, connection: AdminConnection):
+        self.connections.discard(connection)
+        if connection._task is not None:
+            connection._task.cancel()
+        connection.closed = True
+
+    async def close(self, connection: AdminConnection, reason: str):
+        if connection in self.connections:
+            ADMIN_CLOSED.labels(reason).inc()
+        self.connections.discard(connection)
+        await connection.close()
+
+    def broadcast(self, text: str, coalesce_key: Optional[str] = None):
+        """Queue a message on every admin connection and return without waiting."""
+        for connection in list(self.connections):
+            connection.enqueue(text, coalesce_key)
+
+    async def _ping_loop(self):
+        while self.connections:
+            await asyncio.sleep(self.ping_interval)
+            now = time.monotonic()
+            ping = json.dumps({"type": "ping", "timestamp": time.time()})
+            for connection in list(self.connections):
+                if connection.answers_pings and now - connection.last_seen > self.ping_interval + self.ping_timeout:
+                    logger.warning("Admin connection did not answer pings for %.1fs, closing it",
+                                   now - connection.last_seen)
+                    await self.close(connection, "ping_timeout")
+                else:
+                    connection.enqueue(ping, coalesce_key="ping")
+
+    def get_stats(self) -> Dict[str, object]:
+        """Return per-connection queue depths and counters."""
+        now = time.monotonic()
+        return {
+            "connections": [
+                {
+                    "client": f"{c.websocket.client.host}:{c.websocket.client.port}" if c.websocket.client else None,
+                    "queue_depth": c.queue_depth,
+                    "sent": c.sent,
+                    "dropped": c.dropped,
+                    "coalesced": c.coalesced,
+                    "last_seen_seconds": round(now - c.last_seen, 3),
+                }
+                for c in self.connections
+            ],
+            "queue_size": self.queue_size,
+        }
+
+
+# Process-wide hub shared by all admin and chat connections
+admin_hub = AdminHub()
@@ -1,8 +1,12 @@
 """API endpoints for the Neuro Sama module."""
 
 import asyncio
+import base64
+import itertools
 import json
-from typing import Dict, Any, List
+import logging
+import time
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional, Tuple
 
 import json
 import os
@@ -11,36 +15,47 @@ import yaml
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from openai import AsyncOpenAI
 
+from ..metrics import Counter, Gauge, Histogram, metrics_response
+from .admin_hub import admin_hub
+from .chat_ingest import ChatIngestor, NearDuplicateFilter, DEFAULT_INGEST_MODULES
 from .config import Config
 from .context_builder import ContextBuilder
-from .json_stream_parser import StreamingJSONParser
+from .log_setup import Redacted, setup_logging
+from .json_stream_parser import (
+    StreamingJSONParser, TOOL_NAME, FIELD_DELTA, OBJECT, OBJECT_ERROR
+)
+from .output_manager import OutputManager, PROTOCOL_BASE64, PROTOCOL_BINARY
+from .speech_stream import SpeechStream
+from .tool_pipeline import ToolCallPipeline
+from .tts_backends import get_tts_backend
+from .turn_scheduler import (
+    ChatSession, InputCoalescer, turn_scheduler, DEFAULT_MAX_CONCURRENT_TURNS, DEFAULT_QUEUE_SIZE
+)
 
 
-router = APIRouter()
-
-# Global set to store admin WebSocket connections
-admin_connections: set = set()
-
-
-async def send_to_all_admin_connections(message: str):
-    """Send a message to all admin connections, removing disconnected connections."""
-    disconnected_connections = set()
-    for admin_ws in admin_connections:
-        try:
-            await admin_ws.send_text(message)
-        except Exception as e:
-            print(f"Error sending message to admin connection: {e}")
-            disconnected_connections.add(admin_ws)
-
-    # Remove disconnected connections
-    for ws in disconnected_connections:
-        admin_connections.discard(ws)
+logger = logging.getLogger(__name__)
 
-# Global variable to track if the module is currently processing
-is_processing = False
+router = APIRouter()
 
-# Global variable to track admin WebSocket connections for context updates
-admin_connections = set()
+# Per-stage turn metrics, served at /metrics
+PROMPT_BUILD_SECONDS = Histogram("neuro_prompt_build_seconds", "Time to build the system prompt of a turn")
+LLM_TTFT_SECONDS = Histogram("neuro_llm_time_to_first_token_seconds",
+                             "Time from the LLM request to the first streamed content")
+LLM_TOKENS_PER_SECOND = Histogram(
+    "neuro_llm_tokens_per_second",
+    "LLM output rate after the first token, counting one streamed chunk as one token",
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 200, 500),
+)
+PARSE_SECONDS = Histogram("neuro_parse_seconds", "Time spent parsing the streamed response of a turn",
+                          buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+TOOL_SECONDS = Histogram("neuro_tool_execution_seconds", "Time to execute a tool call", ["tool"])
+WS_SEND_SECONDS = Histogram("neuro_ws_send_seconds", "Time to send one frame on the chat WebSocket", ["frame"],
+                            buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+WS_SENT_BYTES = Counter("neuro_ws_sent_bytes", "Bytes sent on chat WebSockets", ["frame"])
+TURN_SECONDS = Histogram("neuro_turn_seconds", "Time from the start of a turn to its completion marker")
+TURNS = Counter("neuro_turns", "Turns run", ["status"])
+CHAT_CONNECTIONS = Gauge("neuro_chat_connections", "Open chat WebSocket connections")
+Gauge("neuro_admin_connections", "Open admin WebSocket connections").set_function(lambda: len(admin_hub))
 
 
 def parse_json_response(response_text: str) -> List[Dict[str, Any]]:
@@ -59,13 +74,29 @@ def parse_json_response(response_text: str) -> List[Dict[str, Any]]:
             parsed = json.loads(response_text.strip())
             return [parsed] if isinstance(parsed, dict) else parsed
     except json.JSONDecodeError as e:
-        print(f"Failed to parse JSON response: {e}")
-        print(f"Response text: {response_text}")
+        logger.error("Failed to parse JSON response: %s", e)
+        logger.debug("Response text: %s", Redacted(response_text))
         return []
 
 
-async def execute_tool_and_get_output_pack(context_builder, tool_call: Dict[str, Any], input_data: Dict[str, Any] = None):
-    """Execute a single tool and return an output pack if applicable."""
+async def execute_tool_call(context_builder, tool_call: Dict[str, Any], input_data: Dict[str, Any] = None,
+                            speech_stream: Optional[SpeechStream] = None,
+                            protocol: str = PROTOCOL_BASE64,
+                            segment_ids: Optional[Iterator[int]] = None
+                            ) -> Optional[AsyncIterator[Tuple[Dict[str, Any], Optional[bytes]]]]:
+    """
+    Execute a single tool and return an iterator over the output packs it
+    produces, or None if it produces none.
+
+    For speak calls the sentences are synthesized concurrently, and synthesis
+    is already running when this returns; the iterator yields one speak pack
+    per sentence, in order, as soon as its audio is ready. For speak calls
+    whose text was streamed into `speech_stream` while the model was still
+    writing, synthesis started even earlier.
+
+    Each pack is yielded together with the binary audio frame to send after
+    it, which is only used in binary protocol mode (otherwise None).
+    """
     if not isinstance(tool_call, dict):
         return None
 
@@ -78,165 +109,330 @@ async def execute_tool_and_get_output_pack(context_builder, tool_call: Dict[str,
     # Get the tool from the context builder's tool manager
     tool = context_builder.tool_manager.get_tool(tool_name)
     if not tool:
-        print(f"Unknown tool: {tool_name}")
+        logger.warning("Unknown tool: %s", tool_name)
         return None
 
     try:
-        result = await tool.execute(**tool_params)
-
-        # If this is a speak tool, create an output pack with TTS
-        if tool_name == "speak":
-            spoken_text = result.get("spoken_text", "")
-            if spoken_text:
-                # Check if audio synthesis is disabled in input data
-                audio_enabled = input_data.get("audio", True)  # Default to True if not specified
-
-                # Synthesize audio with TTS if enabled
-                audio_base64 = ""
-                duration = 0.0
-                if audio_enabled:
-                    try:
-                        from .tts import synthesize_audio_segment
-                        audio_base64, duration = await synthesize_audio_segment(spoken_text, context_builder.config)
-                    except Exception as e:
-                        print(f"TTS synthesis failed: {e}")
-                        # Continue with empty audio as fallback
-                else:
-                    print("Audio synthesis disabled, skipping TTS")
-
-                # Create an output pack for speak
-                from .output_manager import OutputManager
-                output_pack = OutputManager.create_speak_output(
-                    text=spoken_text,
-                    audio_base64=audio_base64,
-                    duration=duration,
-                    input_data=input_data
-                )
-                return output_pack
+        with TOOL_SECONDS.labels(tool_name).time():
+            result = await tool.execute(**tool_params)
     except Exception as e:
-        print(f"Error executing tool {tool_name}: {e}")
+        logger.error("Error executing tool %s: %s", tool_name, e)
+        result = None
+
+    # If this is a speak tool, create output packs with TTS
+    spoken_text = result.get("spoken_text", "") if tool_name == "speak" and result else ""
+    if not spoken_text:
+        if speech_stream is not None:
+            speech_stream.cancel()
+        return None
 
-    return None
+    # Check if audio synthesis is disabled in input data
+    audio_enabled = input_data.get("audio", True)  # Default to True if not specified
+    if not audio_enabled:
+        logger.debug("Audio synthesis disabled, skipping TTS")
+        return _single_output_pack(OutputManager.create_speak_output(text=spoken_text, input_data=input_data))
+
+    if speech_stream is None or speech_stream.text != spoken_text:
+        # Sentences were not streamed in (or the tool changed the text)
+        if speech_stream is not None:
+            speech_stream.cancel()
+        speech_stream = SpeechStream.from_text(context_builder.config, spoken_text)
+    speech_stream.close()
+
+    return _SpeakOutputPacks(speech_stream, input_data, protocol, segment_ids or itertools.count(1))
+
+
+async def _single_output_pack(output_pack: Dict[str, Any]) -> AsyncIterator[Tuple[Dict[str, Any], Optional[bytes]]]:
+    yield output_pack, None
+
+
+class _SpeakOutputPacks:
+    """
+    The speak packs of a speech stream in sentence order.
+
+    Closing it cancels the stream's synthesis even if iteration never
+    started, which closing a generator would not do.
+    """
+
+    def __init__(self, speech_stream: SpeechStream, input_data: Dict[str, Any], protocol: str,
+                 segment_ids: Iterator[int]):
+        self.speech_stream = speech_stream
+        self.input_data = input_data
+        self.protocol = protocol
+        self.segment_ids = segment_ids
+        self.audio_format = get_tts_backend(speech_stream.config).audio_format
+        self.segment_index = 0
+        self._segments = speech_stream.segments()
+
+    def __aiter__(self) -> "_SpeakOutputPacks":
+        return self
+
+    async def __anext__(self) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        text, audio, duration, is_final = await self._segments.__anext__()
+        segment_index = self.segment_index
+        self.segment_index += 1
+        if self.protocol == PROTOCOL_BINARY:
+            segment_id = next(self.segment_ids)
+            output_pack = OutputManager.create_speak_metadata_output(
+                text=text,
+                segment_id=segment_id,
+                audio_size=len(audio),
+                duration=duration,
+                input_data=self.input_data,
+                segment_index=segment_index,
+                is_final=is_final,
+                audio_format=self.audio_format
+            )
+            return output_pack, OutputManager.create_audio_frame(segment_id, audio) if audio else None
+        output_pack = OutputManager.create_speak_output(
+            text=text,
+            audio_base64=base64.b64encode(audio).decode("utf-8") if audio else "",
+            duration=duration,
+            input_data=self.input_data,
+            segment_index=segment_index,
+            is_final=is_final
+        )
+        return output_pack, None
+
+    async def aclose(self):
+        self.speech_stream.cancel()
+        await self._segments.aclose()
 
 
 async def handle_websocket_communication(websocket: WebSocket, client: AsyncOpenAI, config: Config):
-    """Handle the input/output communication via WebSocket."""
-    global is_processing
+    """
+    Handle the input/output communication via WebSocket.
+
+    Clients connecting with `?protocol=binary` receive speak audio as binary
+    frames following the speak pack; everyone else gets base64 in the JSON.
+    """
+    protocol = PROTOCOL_BINARY if websocket.query_params.get("protocol") == PROTOCOL_BINARY else PROTOCOL_BASE64
+    # Correlates speak packs with their binary audio frames on this connection
+    segment_ids = itertools.count(1)
 
     # Initialize context builder with memory change callback
-    def on_memory_change(init_memory, core_memory, temp_memory):
-        # Push memory update to all admin connections
-        memory_update_msg = json.dumps({
-            "type": "memory_update",
-            "payload": {
-                "init_memory": init_memory,
-                "core_memory": core_memory,
-                "temp_memory": temp_memory
-            }
-        })
+    def on_memory_change(patch: Dict[str, Any]):
+        # Push only the change to all admin connections; they hold a snapshot
+        memory_patch_msg = json.dumps({"type": "memory_patch", "payload": patch})
 
-        # Send to all admin connections
-        asyncio.create_task(send_to_all_admin_connections(memory_update_msg))
+        # Patches are never coalesced; a dashboard that misses one re-fetches a snapshot
+        admin_hub.broadcast(memory_patch_msg)
 
     context_builder = ContextBuilder(config, on_memory_change_callback=on_memory_change)
 
-    # Initialize streaming JSON parser
-    json_parser = StreamingJSONParser()
+    # Initialize streaming JSON parser, streaming the text of speak calls
+    json_parser = StreamingJSONParser(stream_fields=("text",))
 
     # In-memory storage for recent messages (for this session)
     recent_messages: List[Dict[str, str]] = []
 
-    await websocket.accept()
-
-    try:
-        while True:
-            # Receive a message from the client
-            data = await websocket.receive_json()
-
-            # If currently processing, ignore the new input
-            if is_processing:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "Module is currently processing, please wait"
-                })
-                continue
-
-            # Set processing flag
-            is_processing = True
-
-            try:
-                module_message = data.get("content", "")
-                module_name = data.get("module", "system")
+    async def send_json(output_pack: Dict[str, Any]):
+        """Send a JSON pack on the chat WebSocket, recording send time and size."""
+        text = json.dumps(output_pack, separators=(",", ":"), ensure_ascii=False)
+        with WS_SEND_SECONDS.labels("json").time():
+            await websocket.send_text(text)
+        WS_SENT_BYTES.labels("json").inc(len(text.encode("utf-8")))
+
+    async def run_turn(data: Dict[str, Any]):
+        """Run one turn: query the model and stream the resulting output packs."""
+        turn_start = time.perf_counter()
+        # Memory changes made by this turn's tools are staged and committed together
+        memory_manager = context_builder.memory_manager
+        memory_manager.begin()
+        try:
+            module_message = data.get("content", "")
+            module_name = data.get("module", "system")
 
-                # Build the context using the context builder
-                # Build system prompt separately
+            # Build the context using the context builder
+            # Build system prompt separately
+            with PROMPT_BUILD_SECONDS.time():
                 system_prompt = context_builder.build_system_prompt()
 
-                # Prepare messages for the API call - use only the current module message
-                content = f"{module_name}: {module_message}"  # This is the single module input
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": content},  # Use only the current module input
-                ]
+            # Prepare messages for the API call - use only the current module message
+            content = f"{module_name}: {module_message}"  # This is the single module input
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content},  # Use only the current module input
+            ]
+
+            # Push context update to all admin connections
+            context_update_msg = json.dumps({
+                "type": "context_update",
+                "payload": {
+                    "system_prompt": system_prompt,
+                    "current_context": content  # This is the single user input being sent to the LLM
+                }
+            })
 
-                # Push context update to all admin connections
-                context_update_msg = json.dumps({
-                    "type": "context_update",
-                    "payload": {
-                        "system_prompt": system_prompt,
-                        "current_context": content  # This is the single user input being sent to the LLM
-                    }
-                })
+            # Queue on all admin connections without waiting for slow dashboards
+            admin_hub.broadcast(context_update_msg, coalesce_key="context_update")
 
-                # Send to all admin connections
-                await send_to_all_admin_connections(context_update_msg)
+            # Call the OpenAI API to get a response
+            request_start = time.perf_counter()
+            response = await client.chat.completions.create(
+                model=config.OPENAI_MODEL,
+                messages=messages,
+                stream=True
+            )
 
-                # Call the OpenAI API to get a response
-                response = await client.chat.completions.create(
-                    model=config.OPENAI_MODEL,
-                    messages=messages,
-                    stream=True
+            # Checked once per turn, so the per-chunk path costs nothing with debug off
+            debug = logger.isEnabledFor(logging.DEBUG)
+
+            async def execute(tool_call, speech_stream):
+                return await execute_tool_call(
+                    context_builder, tool_call, data, speech_stream,
+                    protocol=protocol, segment_ids=segment_ids
                 )
 
-                # Stream the response and process JSON objects as they are completed
-                print("DEBUG: Starting to stream response...")
-                full_content = ""
+            async def send(output):
+                output_pack, audio_frame = output
+                if debug:
+                    logger.debug("Sending output pack: %s", Redacted(output_pack))
+                await send_json(output_pack)
+                if audio_frame is not None:
+                    with WS_SEND_SECONDS.labels("binary").time():
+                        await websocket.send_bytes(audio_frame)
+                    WS_SENT_BYTES.labels("binary").inc(len(audio_frame))
+
+            # Stream the response and hand JSON objects to the pipeline as they
+            # are completed, so reading the stream never waits for tools or TTS.
+            # Speak text is sent to TTS sentence by sentence while it streams in.
+            logger.debug("Starting to stream response...")
+            pipeline = ToolCallPipeline(execute, send)
+            audio_enabled = data.get("audio", True)
+            speech_streams: Dict[int, SpeechStream] = {}
+            full_content = ""
+            first_token_time = None
+            chunk_count = 0
+            parse_seconds = 0.0
+            try:
                 async for chunk in response:
                     if chunk.choices[0].delta.content:
                         content = chunk.choices[0].delta.content
                         full_content += content
-                        print(f"DEBUG: Received content chunk: {repr(content)}")
+                        if debug:
+                            logger.debug("Received content chunk: %r", content)
+                        chunk_count += 1
+                        if first_token_time is None:
+                            first_token_time = time.perf_counter()
+                            LLM_TTFT_SECONDS.observe(first_token_time - request_start)
 
                         # Feed the content to the streaming JSON parser
-                        complete_objects = json_parser.feed(content)
-                        print(f"DEBUG: Found {len(complete_objects)} complete objects in chunk")
-
-                        # Process any complete JSON objects
-                        for i, obj in enumerate(complete_objects):
-                            print(f"DEBUG: Processing complete object {i+1}: {obj}")
-                            output_pack = await execute_tool_and_get_output_pack(context_builder, obj, data)
-                            if output_pack:
-                                print(f"DEBUG: Sending output pack: {output_pack}")
-                                await websocket.send_json(output_pack)
-                            else:
-                                print(f"DEBUG: No output pack from object: {obj}")
-
-                print(f"DEBUG: Full content received: {full_content}")
-                print(f"DEBUG: Remaining buffer in parser: {json_parser.get_remaining_buffer()}")
-
-                # Send a completion marker to indicate the end of this response
-                from .output_manager import OutputManager
-                completion_pack = OutputManager.create_completion_output(data)
-                await websocket.send_json(completion_pack)
-
+                        parse_start = time.perf_counter()
+                        events = json_parser.feed_events(content)
+                        parse_seconds += time.perf_counter() - parse_start
+                        for event in events:
+                            if event.type == TOOL_NAME:
+                                if event.name == "speak" and audio_enabled:
+                                    speech_streams[event.index] = SpeechStream(config)
+                            elif event.type == FIELD_DELTA:
+                                speech_stream = speech_streams.get(event.index)
+                                if speech_stream is not None and event.name == "text":
+                                    speech_stream.feed(event.text)
+                            elif event.type == OBJECT_ERROR:
+                                speech_stream = speech_streams.pop(event.index, None)
+                                if speech_stream is not None:
+                                    speech_stream.cancel()
+                            elif event.type == OBJECT:
+                                # Queue the complete JSON object for execution
+                                obj = event.value
+                                if debug:
+                                    logger.debug("Queueing complete object %d: %s", event.index + 1, Redacted(obj))
+                                pipeline.submit(obj, speech_streams.pop(event.index, None))
+
+                if first_token_time is not None:
+                    stream_seconds = time.perf_counter() - first_token_time
+                    if chunk_count > 1 and stream_seconds > 0:
+                        LLM_TOKENS_PER_SECOND.observe((chunk_count - 1) / stream_seconds)
+                PARSE_SECONDS.observe(parse_seconds)
+
+                # Wait until all queued tool calls have run and their output was sent
+                await pipeline.close()
             finally:
-                # Reset processing flag
-                is_processing = False
+                pipeline.cancel()
+                # Drop synthesis of any speak call that never completed
+                for speech_stream in speech_streams.values():
+                    speech_stream.cancel()
+
+            if debug:
+                logger.debug("Full content received: %s", Redacted(full_content, limit=4000))
+                logger.debug("Remaining buffer in parser: %r", json_parser.get_remaining_buffer())
+
+            # Apply this turn's memory changes with one flush and one notification
+            if not memory_manager.commit():
+                await send_json(OutputManager.create_error_output(
+                    "Memory changes of this turn were not saved because memory changed meanwhile", data
+                ))
+
+            # Send a completion marker to indicate the end of this response
+            completion_pack = OutputManager.create_completion_output(data)
+            await send_json(completion_pack)
+            TURNS.labels("completed").inc()
+            TURN_SECONDS.observe(time.perf_counter() - turn_start)
+        except Exception as e:
+            TURNS.labels("failed").inc()
+            logger.error("Error processing message: %s", e, exc_info=True)
+            await websocket.send_json({
+                "type": "error",
+                "message": f"Error processing message: {str(e)}"
+            })
+        finally:
+            # A failed or abandoned turn leaves the memory as it was
+            if memory_manager.in_transaction:
+                memory_manager.rollback()
+
+    async def on_input_expired(lane: str, data: Dict[str, Any]):
+        """Tell the client an input will not be answered because it waited too long."""
+        await send_json(OutputManager.create_error_output(
+            f"Input dropped after waiting longer than the age limit of the '{lane}' lane", data
+        ))
+
+    # Inputs wait in this session's queue while a turn is running
+    session = ChatSession(
+        run_turn,
+        max_concurrent_turns=getattr(config, "MAX_CONCURRENT_TURNS", DEFAULT_MAX_CONCURRENT_TURNS),
+        queue_size=getattr(config, "TURN_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+        coalescer=InputCoalescer(
+            window=config.COALESCE_WINDOW_MS / 1000,
+            max_messages=config.COALESCE_MAX_MESSAGES,
+            max_chars=config.COALESCE_MAX_CHARS
+        ) if getattr(config, "COALESCE_ENABLED", False) else None,
+        lanes=getattr(config, "TURN_LANES", None),
+        module_lanes=getattr(config, "TURN_MODULE_LANES", None),
+        ingestor=ChatIngestor(
+            sample_size=config.CHAT_INGEST_SAMPLE_SIZE,
+            user_rate=config.CHAT_INGEST_USER_RATE,
+            user_burst=config.CHAT_INGEST_USER_BURST,
+            duplicate_filter=NearDuplicateFilter(
+                threshold=config.CHAT_INGEST_DUPLICATE_THRESHOLD,
+                window=config.CHAT_INGEST_DUPLICATE_WINDOW,
+                ttl=config.CHAT_INGEST_DUPLICATE_TTL
+            )
+        ) if getattr(config, "CHAT_INGEST_ENABLED", False) else None,
+        ingest_modules=getattr(config, "CHAT_INGEST_MODULES", DEFAULT_INGEST_MODULES),
+        on_expired=on_input_expired
+    )
+
+    await websocket.accept()
+    session.start()
+    CHAT_CONNECTIONS.inc()
+
+    try:
+        while True:
+            # Receive a message from the client
+            data = await websocket.receive_json()
+
+            # Queue the input; it is only refused when the queue is full
+            if not session.submit(data):
+                await websocket.send_json({
+                    "type": "error",
+                    "message": "Module is busy and its input queue is full, please wait"
+                })
 
     except WebSocketDisconnect:
-        print("WebSocket disconnected")
+        logger.info("WebSocket disconnected")
     except Exception as e:
-        print(f"Error in WebSocket communication: {e}")
+        logger.error("Error in WebSocket communication: %s", e)
         try:
             await websocket.send_json({
                 "type": "error",
@@ -244,9 +440,19 @@ async def handle_websocket_communication(websocket: WebSocket, client: AsyncOpen
             })
         except:
             pass  # If we can't send the error, just continue
+    finally:
+        # Abandon the running turn and any queued inputs of this connection
+        CHAT_CONNECTIONS.dec()
+        await session.close()
+
 
 
 
+@router.get("/metrics")
+async def metrics():
+    """Per-stage turn metrics in the Prometheus text format."""
+    return metrics_response()
+
 
 @router.websocket("/ws/chat")
 async def websocket_chat_endpoint(websocket: WebSocket):
@@ -262,8 +468,9 @@ async def websocket_chat_endpoint(websocket: WebSocket):
 async def websocket_admin_endpoint(websocket: WebSocket):
     """Management WebSocket endpoint for configuration updates and module control."""
     await websocket.accept()
-    # Add this connection to the admin connections set
-    admin_connections.add(websocket)
+    # Register this connection; its messages are sent by its own writer task
+    admin_hub.configure_from(websocket.app.state.config)
+    connection = admin_hub.register(websocket)
 
     try:
         # Send initial memory update when connection is established
@@ -271,28 +478,29 @@ async def websocket_admin_endpoint(websocket: WebSocket):
         config = websocket.app.state.config
         context_builder = ContextBuilder(config)
 
-        # 获取各种记忆
-        init_memory = context_builder.memory_manager.get_init_memory()
-        core_memory = context_builder.memory_manager.get_core_memory_blocks()
-        temp_memory = context_builder.memory_manager.get_temp_memory()
-
-        # 发送初始记忆更新
-        await websocket.send_text(json.dumps({
+        # 发送带版本号的初始记忆快照，之后只推送增量
+        await connection.send_text(json.dumps({
             "type": "memory_update",
-            "payload": {
-                "init_memory": init_memory,
-                "core_memory": core_memory,
-                "temp_memory": temp_memory
-            }
+            "payload": context_builder.memory_manager.get_memory_snapshot()
         }))
     except Exception as e:
-        print(f"Error sending initial memory update: {e}")
+        logger.error("Error sending initial memory update: %s", e)
 
     try:
         while True:
             data = await websocket.receive_text()
+            connection.touch()
             message = json.loads(data)
 
+            # 客户端声明会回复心跳，之后不回复心跳的连接会被关闭
+            if message.get("type") == "hello":
+                connection.answers_pings = "pong" in (message.get("capabilities") or [])
+                continue
+
+            # 心跳回复，只用于确认连接存活
+            if message.get("type") == "pong":
+                continue
+
             # 处理管理消息
             action = message.get("action")
             payload = message.get("payload", {})
@@ -308,7 +516,7 @@ async def websocket_admin_endpoint(websocket: WebSocket):
                         working_path = Path(current_prompt_path).parent.parent  # Go up from prompts/neuro_prompt.txt to neuro_sama/
                         working_dir = str(working_path)
                     else:
-                        await websocket.send_text(json.dumps({
+                        await connection.send_text(json.dumps({
                             "type": "response",
                             "request_id": message.get("request_id"),
                             "payload": {"status": "error", "message": "Working directory not set and cannot be inferred"}
@@ -328,14 +536,19 @@ async def websocket_admin_endpoint(websocket: WebSocket):
                         api_key=websocket.app.state.config.OPENAI_API_KEY,
                         base_url=websocket.app.state.config.OPENAI_BASE_URL
                     )
+                    # 应用新的日志设置
+                    setup_logging(websocket.app.state.config)
+                    # 预先连接新的TTS服务
+                    from .tts import warm_up_tts
+                    asyncio.create_task(warm_up_tts(websocket.app.state.config))
 
-                    await websocket.send_text(json.dumps({
+                    await connection.send_text(json.dumps({
                         "type": "response",
                         "request_id": message.get("request_id"),
                         "payload": {"status": "success", "message": "Configuration reloaded"}
                     }))
                 else:
-                    await websocket.send_text(json.dumps({
+                    await connection.send_text(json.dumps({
                         "type": "response",
                         "request_id": message.get("request_id"),
                         "payload": {"status": "error", "message": "Config file not found"}
@@ -354,7 +567,7 @@ async def websocket_admin_endpoint(websocket: WebSocket):
                     current_context = "No current user input - waiting for user message"
 
                     # 发送上下文更新
-                    await websocket.send_text(json.dumps({
+                    await connection.send_text(json.dumps({
                         "type": "context_update",
                         "payload": {
                             "system_prompt": system_prompt,
@@ -362,7 +575,7 @@ async def websocket_admin_endpoint(websocket: WebSocket):
                         }
                     }))
                 except Exception as e:
-                    await websocket.send_text(json.dumps({
+                    await connection.send_text(json.dumps({
                         "type": "response",
                         "request_id": message.get("request_id"),
                         "payload": {"status": "error", "message": f"Failed to get context: {str(e)}"}
@@ -374,26 +587,42 @@ async def websocket_admin_endpoint(websocket: WebSocket):
                     config = websocket.app.state.config
                     context_builder = ContextBuilder(config)
 
-                    # 获取各种记忆
-                    init_memory = context_builder.memory_manager.get_init_memory()
-                    core_memory = context_builder.memory_manager.get_core_memory_blocks()
-                    temp_memory = context_builder.memory_manager.get_temp_memory()
-
-                    # 发送记忆更新
-                    await websocket.send_text(json.dumps({
+                    # 发送带版本号的记忆快照（连接时或客户端发现版本缺口时请求）
+                    await connection.send_text(json.dumps({
                         "type": "memory_update",
-                        "payload": {
-                            "init_memory": init_memory,
-                            "core_memory": core_memory,
-                            "temp_memory": temp_memory
-                        }
+                        "payload": context_builder.memory_manager.get_memory_snapshot()
                     }))
                 except Exception as e:
-                    await websocket.send_text(json.dumps({
+                    await connection.send_text(json.dumps({
                         "type": "response",
                         "request_id": message.get("request_id"),
                         "payload": {"status": "error", "message": f"Failed to get memory: {str(e)}"}
                     }))
+            elif action == "get_memory_journal":
+                # 读取记忆日志中某序号之后的变更记录（变更订阅）
+                try:
+                    config = websocket.app.state.config
+                    context_builder = ContextBuilder(config)
+                    journal = await asyncio.to_thread(
+                        context_builder.memory_manager.read_journal,
+                        int(payload.get("since", 0)),
+                        int(payload.get("limit", 1000))
+                    )
+                    if journal is None:
+                        response = {"status": "error", "message": "Memory journal is disabled"}
+                    else:
+                        response = {"status": "success", "journal": journal}
+                    await connection.send_text(json.dumps({
+                        "type": "response",
+                        "request_id": message.get("request_id"),
+                        "payload": response
+                    }))
+                except Exception as e:
+                    await connection.send_text(json.dumps({
+                        "type": "response",
+                        "request_id": message.get("request_id"),
+                        "payload": {"status": "error", "message": f"Failed to read memory journal: {str(e)}"}
+                    }))
             elif action == "update_memory":
                 # 更新记忆信息
                 try:
@@ -419,7 +648,7 @@ async def websocket_admin_endpoint(websocket: WebSocket):
                         context_builder.memory_manager._save_temp_memory(temp_memory)
 
                     # 发送成功响应
-                    await websocket.send_text(json.dumps({
+                    await connection.send_text(json.dumps({
                         "type": "response",
                         "request_id": message.get("request_id"),
                         "payload": {"status": "success", "message": "Memory updated successfully"}
@@ -428,33 +657,84 @@ async def websocket_admin_endpoint(websocket: WebSocket):
                     # 同时推送更新的记忆内容给所有连接
                     memory_update_msg = json.dumps({
                         "type": "memory_update",
-                        "payload": {
-                            "init_memory": init_memory or context_builder.memory_manager.get_init_memory(),
-                            "core_memory": core_memory or context_builder.memory_manager.get_core_memory_blocks(),
-                            "temp_memory": temp_memory or context_builder.memory_manager.get_temp_memory()
-                        }
+                        "payload": context_builder.memory_manager.get_memory_snapshot()
                     })
 
                     # Send to all admin connections
-                    await send_to_all_admin_connections(memory_update_msg)
+                    admin_hub.broadcast(memory_update_msg, coalesce_key="memory_update")
 
                 except Exception as e:
-                    await websocket.send_text(json.dumps({
+                    await connection.send_text(json.dumps({
                         "type": "response",
                         "request_id": message.get("request_id"),
                         "payload": {"status": "error", "message": f"Failed to update memory: {str(e)}"}
                     }))
+            elif action == "reload_tools":
+                # 重新导入工具模块，所有会话在下次调用工具时生效
+                try:
+                    from .tool_manager import reload_tools
+                    registry = await asyncio.to_thread(reload_tools)
+                    await connection.send_text(json.dumps({
+                        "type": "response",
+                        "request_id": message.get("request_id"),
+                        "payload": {
+                            "status": "success",
+                            "message": "Tools reloaded",
+                            "tools": sorted(registry.get_classes())
+                        }
+                    }))
+                except Exception as e:
+                    await connection.send_text(json.dumps({
+                        "type": "response",
+                        "request_id": message.get("request_id"),
+                        "payload": {"status": "error", "message": f"Failed to reload tools: {str(e)}"}
+                    }))
+            elif action == "get_prompt_cache_stats":
+                # 获取系统提示缓存的命中统计
+                from .context_builder import prompt_cache
+                await connection.send_text(json.dumps({
+                    "type": "response",
+                    "request_id": message.get("request_id"),
+                    "payload": {"status": "success", "stats": prompt_cache.get_stats()}
+                }))
+            elif action == "get_turn_stats":
+                # 获取各会话的排队深度与等待时间
+                await connection.send_text(json.dumps({
+                    "type": "response",
+                    "request_id": message.get("request_id"),
+                    "payload": {"status": "success", "stats": turn_scheduler.get_stats()}
+                }))
+            elif action == "get_admin_stats":
+                # 获取各管理连接的发送队列深度与丢弃计数
+                await connection.send_text(json.dumps({
+                    "type": "response",
+                    "request_id": message.get("request_id"),
+                    "payload": {"status": "success", "stats": admin_hub.get_stats()}
+                }))
+            elif action == "get_tts_cache_stats":
+                # 获取TTS音频缓存的命中统计
+                from .tts_cache import get_tts_cache
+                from .tts_pool import get_pool_stats
+                tts_cache = get_tts_cache(websocket.app.state.config)
+                await connection.send_text(json.dumps({
+                    "type": "response",
+                    "request_id": message.get("request_id"),
+                    "payload": {
+                        "status": "success",
+                        "stats": tts_cache.get_stats() if tts_cache else None,
+                        "pools": get_pool_stats()
+                    }
+                }))
             else:
-                await websocket.send_text(json.dumps({
+                await connection.send_text(json.dumps({
                     "type": "response",
                     "request_id": message.get("request_id"),
                     "payload": {"status": "error", "message": f"Unknown action: {action}"}
                 }))
     except WebSocketDisconnect:
-        print("Admin WebSocket disconnected")
-        # Remove this connection from the admin connections set
-        admin_connections.discard(websocket)
+        logger.info("Admin WebSocket disconnected")
     except Exception as e:
-        print(f"Admin WebSocket error: {e}")
-        # Remove this connection from the admin connections set
-        admin_connections.discard(websocket)
\ No newline at end of file
+        logger.error("Admin WebSocket error: %s", e)
+    finally:
+        # Remove this connection and stop its writer
+        admin_hub.unregister(connection)
\ No newline at end of file
@@ -0,0 +1,346 @@
+"""
+End-to-end latency benchmark for the /ws/chat pipeline of the Neuro Sama module.
+
+Drives a running module over its chat WebSocket with a message script and
+reports, per turn, the time from sending the input to the first speak
+text, the first audio and the completion marker, plus the bytes received,
+and the overall turns/sec under the chosen concurrency. Results can be
+written as JSON for comparing releases.
+
+With --spawn the benchmark starts its own stand-ins instead: the mock LLM
+server (neuro-mock-llm) and a module in a temporary working directory
+that uses it together with the local TTS backend, so the whole pipeline
+runs offline and reproducibly.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import websockets
+
+DEFAULT_URL = "ws://localhost:8001/ws/chat"
+
+# Used when no --script is given
+DEFAULT_MESSAGES = [
+    {"content": "LIVE CONTEXT: Neuro is currently live streaming on Twitch. Chat user 'test_user' says: Hello, Neuro Sama!", "module": "stream_system"},
+    {"content": "LIVE CONTEXT: Neuro is currently live streaming on Twitch. Chat user 'another_user' says: How are you today?", "module": "stream_system"},
+    {"content": "LIVE CONTEXT: Neuro is currently live streaming on Twitch. Chat user 'curious_user' says: Tell me about yourself.", "module": "stream_system"},
+    {"content": "PRIVATE DM CONTEXT: User 'vedal987' sends a private message: Hey Neuro, how are you doing?", "module": "dm_system"},
+]
+
+LATENCY_METRICS = ("first_speak_text", "first_audio", "completion")
+
+
+class TurnResult:
+    """Timings (seconds after sending the input) and received bytes of one turn."""
+
+    def __init__(self):
+        self.first_speak_text: Optional[float] = None
+        self.first_audio: Optional[float] = None
+        self.completion: Optional[float] = None
+        self.bytes_received = 0
+        self.speak_packs = 0
+        self.error: Optional[str] = None
+
+
+def summarize(values: List[float], scale: float = 1.0) -> Optional[Dict[str, float]]:
+    """Percentiles of a list of samples, or None without samples."""
+    if not values:
+        return None
+    ordered = sorted(value * scale for value in values)
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": percentile(0.5),
+        "p90": percentile(0.9),
+        "p99": percentile(0.99),
+        "max": round(ordered[-1], 3),
+    }
+
+
+async def run_turn(websocket, message: Dict[str, Any], timeout: float) -> TurnResult:
+    """Send one input and read output until its completion marker or an error."""
+    result = TurnResult()
+    start = time.perf_counter()
+    await websocket.send(json.dumps(message))
+    deadline = start + timeout
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            result.error = "timeout"
+            return result
+        try:
+            frame = await asyncio.wait_for(websocket.recv(), timeout=remaining)
+        except asyncio.TimeoutError:
+            result.error = "timeout"
+            return result
+        elapsed = time.perf_counter() - start
+
+        if isinstance(frame, bytes):
+            # Binary protocol: the audio of a speak segment
+            result.bytes_received += len(frame)
+            if result.first_audio is None:
+                result.first_audio = elapsed
+            continue
+
+        result.bytes_received += len(frame.encode("utf-8"))
+        output = json.loads(frame)
+        output_type = output.get("type")
+        payload = output.get("payload") or {}
+        if output_type == "speak":
+            result.speak_packs += 1
+            if result.first_speak_text is None and payload.get("text"):
+                result.first_speak_text = elapsed
+            if result.first_audio is None and payload.get("audio_base64"):
+                result.first_audio = elapsed
+        elif output_type == "completion":
+            result.completion = elapsed
+            return result
+        elif output_type == "error":
+            result.error = payload.get("message") or output.get("message") or "error"
+            return result
+
+
+async def run_connection(url: str, messages: List[Dict[str, Any]], turns: int, warmup: int, offset: int,
+                         timeout: float, results: List[TurnResult]):
+    """One client sending its turns back to back."""
+    async with websockets.connect(url, max_size=None) as websocket:
+        for index in range(warmup + turns):
+            message = dict(messages[(offset + index) % len(messages)])
+            result = await run_turn(websocket, message, timeout)
+            if index >= warmup:
+                results.append(result)
+
+
+async def run_benchmark(url: str, messages: List[Dict[str, Any]], connections: int, turns: int, warmup: int,
+                        timeout: float) -> Dict[str, Any]:
+    """Run the benchmark and return the report."""
+    results: List[TurnResult] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_connection(url, messages, turns, warmup, offset, timeout, results)
+        for offset in range(connections)
+    ))
+    duration = time.perf_counter() - start
+
+    completed = [result for result in results if result.error is None]
+    errors: Dict[str, int] = {}
+    for result in results:
+        if result.error is not None:
+            errors[result.error] = errors.get(result.error, 0) + 1
+
+    return {
+        "url": url,
+        "connections": connections,
+        "turns": len(results),
+        "completed": len(completed),
+        "errors": errors,
+        "duration_sec": round(duration, 3),
+        # Warm-up turns are part of the wall time, so they count here too
+        "turns_per_sec": round(connections * (turns + warmup) / duration, 3) if duration else 0.0,
+        "latency_ms": {
+            metric: summarize([getattr(r, metric) for r in completed if getattr(r, metric) is not None], 1000)
+            for metric in LATENCY_METRICS
+        },
+        "bytes_per_turn": summarize([r.bytes_received for r in completed]),
+        "speak_packs_per_turn": summarize([r.speak_packs for r in completed]),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Connections: {report['connections']}, turns: {report['turns']} "
+          f"({report['completed']} completed), {report['duration_sec']:.2f}s, "
+          f"{report['turns_per_sec']:.2f} turns/sec")
+    for error, count in report["errors"].items():
+        print(f"  error x{count}: {error}")
+    print()
+    print(f"{'Metric':<22} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+    print("-" * 66)
+    rows = [(f"{metric} (ms)", stats) for metric, stats in report["latency_ms"].items()]
+    rows.append(("bytes per turn", report["bytes_per_turn"]))
+    for name, stats in rows:
+        if stats is None:
+            print(f"{name:<22} {'-':>10} {'-':>10} {'-':>10} {'-':>10}")
+        else:
+            print(f"{name:<22} {stats['p50']:>10.1f} {stats['p90']:>10.1f} {stats['p99']:>10.1f} {stats['max']:>10.1f}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before listening on port {port}")
+        try:
+            _reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for port {port}")
+
+
+class StandIns:
+    """The mock LLM server and a module configured to use it with the local TTS backend."""
+
+    def __init__(self, args):
+        self.args = args
+        self.processes: List[subprocess.Popen] = []
+        self.temp_dir: Optional[str] = None
+
+    async def start(self) -> str:
+        args = self.args
+        llm_port = _free_port()
+        module_port = _free_port()
+        output = None if args.verbose else subprocess.DEVNULL
+
+        mock_command = [
+            sys.executable, "-m", "neuro_simulator.neuro_sama.mock_llm",
+            "--port", str(llm_port),
+            "--ttft-ms", str(args.llm_ttft_ms),
+            "--tokens-per-sec", str(args.llm_tokens_per_sec),
+            "--chunk-tokens", str(args.llm_chunk_tokens),
+            "--malformed-rate", str(args.llm_malformed_rate),
+            "--seed", str(args.seed),
+        ]
+        self.processes.append(subprocess.Popen(mock_command, stdout=output, stderr=output))
+
+        # A working directory from the bundled template, using the stand-ins
+        self.temp_dir = tempfile.mkdtemp(prefix="neuro-bench-")
+        template_dir = Path(__file__).parent.parent / "working_dir"
+        shutil.copytree(template_dir / "neuro_sama", Path(self.temp_dir) / "neuro_sama")
+        with open(template_dir / "config.json", "r", encoding="utf-8") as f:
+            global_config = json.load(f)
+        global_config["general"]["llm_services"] = [
+            {"id": "bench-llm", "key": "bench", "url": f"http://127.0.0.1:{llm_port}/v1", "model": "mock"}
+        ]
+        global_config["general"]["tts_services"] = [{
+            "id": "bench-tts",
+            "provider": "local",
+            "format": "mp3",
+            "latency_ms": args.tts_latency_ms,
+            "jitter_ms": args.tts_jitter_ms,
+        }]
+        global_config["neuro_sama"]["llm_service_id"] = "bench-llm"
+        global_config["neuro_sama"]["tts_service_id"] = "bench-tts"
+        with open(Path(self.temp_dir) / "config.json", "w", encoding="utf-8") as f:
+            json.dump(global_config, f, ensure_ascii=False, indent=2)
+
+        module_dir = str(Path(self.temp_dir) / "neuro_sama")
+        module_command = [
+            sys.executable, "-m", "neuro_simulator.neuro_sama.main",
+            "--dir", module_dir,
+            "--port", str(module_port),
+        ]
+        env = dict(os.environ, NEURO_WORKING_DIR=module_dir)
+        self.processes.append(subprocess.Popen(module_command, stdout=output, stderr=output, env=env))
+
+        await _wait_for_port(llm_port, self.processes[0])
+        await _wait_for_port(module_port, self.processes[1])
+        return f"ws://127.0.0.1:{module_port}/ws/chat"
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+async def _run(args) -> Dict[str, Any]:
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            messages = json.load(f)
+        if not isinstance(messages, list) or not messages:
+            raise ValueError(f"Script file must contain a non-empty list of messages: {args.script}")
+    else:
+        messages = DEFAULT_MESSAGES
+    if args.no_audio:
+        messages = [dict(message, audio=False) for message in messages]
+
+    stand_ins = StandIns(args) if args.spawn else None
+    try:
+        url = await stand_ins.start() if stand_ins else args.url
+        if args.protocol == "binary":
+            url += ("&" if "?" in url else "?") + "protocol=binary"
+        report = await run_benchmark(url, messages, args.connections, args.turns, args.warmup, args.timeout)
+    finally:
+        if stand_ins:
+            stand_ins.stop()
+
+    report["protocol"] = args.protocol
+    if args.spawn:
+        report["stand_ins"] = {
+            "llm_ttft_ms": args.llm_ttft_ms,
+            "llm_tokens_per_sec": args.llm_tokens_per_sec,
+            "llm_chunk_tokens": args.llm_chunk_tokens,
+            "llm_malformed_rate": args.llm_malformed_rate,
+            "tts_latency_ms": args.tts_latency_ms,
+            "tts_jitter_ms": args.tts_jitter_ms,
+        }
+    return report
+
+
+def main():
+    """Main entry point for the neuro-bench command."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Chat WebSocket of a running module (default: {DEFAULT_URL})")
+    parser.add_argument("--script", help="JSON file with a list of input messages to send in turn")
+    parser.add_argument("--connections", "-c", type=int, default=1, help="Concurrent chat connections (default: 1)")
+    parser.add_argument("--turns", "-n", type=int, default=10, help="Measured turns per connection (default: 10)")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured turns per connection first (default: 1)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before a turn counts as timed out")
+    parser.add_argument("--protocol", choices=("base64", "binary"), default="base64")
+    parser.add_argument("--no-audio", action="store_true", help="Send inputs with audio disabled")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON only")
+    parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of spawned stand-ins")
+
+    stand_ins = parser.add_argument_group("stand-ins (with --spawn)")
+    stand_ins.add_argument("--spawn", action="store_true",
+                           help="Start a mock LLM and a module using the local TTS backend instead of using --url")
+    stand_ins.add_argument("--llm-ttft-ms", type=float, default=300.0)
+    stand_ins.add_argument("--llm-tokens-per-sec", type=float, default=50.0)
+    stand_ins.add_argument("--llm-chunk-tokens", type=int, default=3)
+    stand_ins.add_argument("--llm-malformed-rate", type=float, default=0.0)
+    stand_ins.add_argument("--tts-latency-ms", type=float, default=150.0)
+    stand_ins.add_argument("--tts-jitter-ms", type=float, default=50.0)
+    stand_ins.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""High-rate chat ingestion for the Neuro Sama module."""
+
+import operator
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Modules whose inputs are treated as high-rate viewer chat by default
+DEFAULT_INGEST_MODULES = ("stream_system",)
+
+# Default number of chat messages that make it into one turn
+DEFAULT_SAMPLE_SIZE = 10
+
+# Default per-user rate limit: sustained messages per second and burst size
+DEFAULT_USER_RATE = 0.5
+DEFAULT_USER_BURST = 3
+
+# Default near-duplicate detection: estimated Jaccard similarity above which
+# a message counts as a duplicate, and how many recent messages it is
+# compared against, for how long (seconds)
+DEFAULT_DUPLICATE_THRESHOLD = 0.8
+DEFAULT_DUPLICATE_WINDOW = 2000
+DEFAULT_DUPLICATE_TTL = 30.0
+
+# MinHash signature layout: SIGNATURE_BINS bins split into bands of BAND_SIZE.
+# 8 bands of 8 bins put the band collision curve at the 0.8 threshold: a pair
+# at 0.9 shares a band with probability 1 - (1 - 0.9^8)^8 = 0.99, a pair at 0.5
+# with 0.03. Copy-pasta usually resembles several recent messages, so few
+# duplicates slip through, while dissimilar chat (emote walls) is rarely
+# compared. Candidates are compared on all 64 bins.
+SIGNATURE_BINS = 64
+BAND_SIZE = 8
+SHINGLE_SIZE = 3
+
+# Usernames tracked for rate limiting before the least recently seen are forgotten
+MAX_TRACKED_USERS = 10000
+
+_EMPTY_BIN = -1
+_NORMALIZE_RE = re.compile(r"[\W_]+", re.UNICODE)
+# The context the stream adds in front of a viewer's message:
+# "LIVE CONTEXT: ... Chat user 'name' says: message"
+_CHAT_CONTEXT_RE = re.compile(r"^LIVE CONTEXT:.*?Chat user '(?P<username>[^']*)' says:\s*(?P<text>.*)$", re.DOTALL)
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase a message and reduce punctuation and whitespace to single spaces."""
+    return _NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash of the character shingles of normalized text.
+
+    Each shingle is hashed once; the hash picks one of SIGNATURE_BINS bins
+    and the bin keeps the smallest value it sees. This costs one hash per
+    shingle instead of one per shingle and permutation.
+    """
+    text = normalize_message(text)
+    bins = [_EMPTY_BIN] * SIGNATURE_BINS
+    if len(text) < SHINGLE_SIZE:
+        shingles = {text} if text else set()
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    for shingle in shingles:
+        value = hash(shingle) & 0xFFFFFFFFFFFF
+        index = value % SIGNATURE_BINS
+        value //= SIGNATURE_BINS
+        current = bins[index]
+        if current == _EMPTY_BIN or value < current:
+            bins[index] = value
+    return tuple(bins)
+
+
+def empty_mask(signature: Tuple[int, ...]) -> int:
+    """A bit mask of the empty bins of a signature."""
+    mask = 0
+    for index, value in enumerate(signature):
+        if value == _EMPTY_BIN:
+            mask |= 1 << index
+    return mask
+
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...],
+                        empty_a: Optional[int] = None, empty_b: Optional[int] = None) -> float:
+    """
+    Estimate the Jaccard similarity of the shingle sets behind two signatures.
+
+    Bins empty in both signatures are ignored. Passing precomputed empty
+    masks keeps the comparison to a few C-level passes.
+    """
+    if empty_a is None:
+        empty_a = empty_mask(a)
+    if empty_b is None:
+        empty_b = empty_mask(b)
+    both_empty = bin(empty_a & empty_b).count("1")
+    used = len(a) - both_empty
+    equal = sum(map(operator.eq, a, b)) - both_empty
+    return equal / used if used else 1.0
+
+
+class NearDuplicateFilter:
+    """
+    Detects messages that are near-duplicates of a recent message.
+
+    Signatures are indexed by band (locality-sensitive hashing), so a new
+    message is only compared against the few recent messages that share at
+    least one band with it.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_DUPLICATE_THRESHOLD, window: int = DEFAULT_DUPLICATE_WINDOW,
+                 ttl: float = DEFAULT_DUPLICATE_TTL):
+        self.threshold = threshold
+        self.window = max(1, window)
+        self.ttl = ttl
+        self._recent: Deque[Tuple[float, Tuple[int, ...]]] = deque()
+        # Signatures of the recent messages -> (empty mask, band keys); an
+        # exact repeat is a duplicate, so a signature is never stored twice
+        self._signatures: Dict[Tuple[int, ...], Tuple[int, List[Tuple[int, ...]]]] = {}
+        self._bands: Dict[Tuple[int, ...], set] = {}
+
+    @staticmethod
+    def _band_keys(signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [
+            (start,) + signature[start:start + BAND_SIZE]
+            for start in range(0, SIGNATURE_BINS, BAND_SIZE)
+            if any(value != _EMPTY_BIN for value in signature[start:start + BAND_SIZE])
+        ]
+
+    def _forget_oldest(self):
+        _added, signature = self._recent.popleft()
+        _empty, band_keys = self._signatures.pop(signature)
+        for key in band_keys:
+            bucket = self._bands[key]
+            bucket.discard(signature)
+            if not bucket:
+                del self._bands[key]
+
+    def check(self, text: str, now: float) -> bool:
+        """Return True if text duplicates a recent message; otherwise remember it."""
+        while self._recent and (len(self._recent) >= self.window or now - self._recent[0][0] > self.ttl):
+            self._forget_oldest()
+
+        signature = minhash_signature(text)
+        if signature in self._signatures:
+            return True
+        empty = empty_mask(signature)
+        band_keys = self._band_keys(signature)
+        checked = set()
+        for key in band_keys:
+            for candidate in self._bands.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if estimate_similarity(signature, candidate, empty, self._signatures[candidate][0]) >= self.threshold:
+                    return True
+
+        self._recent.append((now, signature))
+        self._signatures[signature] = (empty, band_keys)
+        for key in band_keys:
+            self._bands.setdefault(key, set()).add(signature)
+        return False
+
+
+class ChatIngestor:
+    """
+    Reduces a high-rate chat stream to a representative batch per turn.
+
+    Every offered message passes three cheap steps:
+    - a per-user token bucket drops users who post faster than the limit
+    - near-duplicates of recent messages (copy-pasta, spam) are dropped
+    - survivors are reservoir-sampled, so each accepted message since the
+      last turn has an equal chance to be in the next one
+
+    `drain` returns the sample, in arrival order, merged into one input.
+    All steps are O(message length), so offering a message never blocks
+    the event loop for long.
+    """
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE, user_rate: float = DEFAULT_USER_RATE,
+                 user_burst: float = DEFAULT_USER_BURST, duplicate_filter: Optional[NearDuplicateFilter] = None,
+                 rng: Optional[random.Random] = None):
+        self.sample_size = max(1, sample_size)
+        self.user_rate = user_rate
+        self.user_burst = max(1.0, user_burst)
+        self.duplicates = duplicate_filter or NearDuplicateFilter()
+        self._rng = rng or random.Random()
+        # username -> (tokens, last refill time), least recently seen first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._sample: List[Tuple[int, Dict[str, Any]]] = []
+        self._seen = 0
+
+        self.offered = 0
+        self.rate_limited = 0
+        self.duplicate = 0
+        self.accepted = 0
+        self.batches = 0
+
+    @staticmethod
+    def message_text(data: Dict[str, Any]) -> str:
+        """The viewer's own words, without any context prefix added by the source."""
+        if data.get("text"):
+            return str(data["text"])
+        content = str(data.get("content", ""))
+        match = _CHAT_CONTEXT_RE.match(content)
+        return match.group("text") if match else content
+
+    @staticmethod
+    def message_user(data: Dict[str, Any]) -> Optional[str]:
+        """The viewer who sent a message, from `username` or the context prefix."""
+        if data.get("username"):
+            return str(data["username"])
+        match = _CHAT_CONTEXT_RE.match(str(data.get("content", "")))
+        return match.group("username") if match else None
+
+    @staticmethod
+    def message_line(data: Dict[str, Any]) -> str:
+        """The line a message contributes to the merged turn content."""
+        if data.get("content"):
+            return str(data["content"])
+        username = data.get("username")
+        text = str(data.get("text", ""))
+        return f"{username}: {text}" if username else text
+
+    def _allow_user(self, username: str, now: float) -> bool:
+        if self.user_rate <= 0:
+            return True
+        tokens, last = self._buckets.pop(username, (self.user_burst, now))
+        tokens = min(self.user_burst, tokens + (now - last) * self.user_rate)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        self._buckets[username] = (tokens, now)
+        if len(self._buckets) > MAX_TRACKED_USERS:
+            self._buckets.popitem(last=False)
+        return allowed
+
+    def offer(self, data: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """Offer a chat message. Returns True if it was accepted into the sample pool."""
+        now = time.monotonic() if now is None else now
+        self.offered += 1
+
+        username = self.message_user(data)
+        if username and not self._allow_user(username, now):
+            self.rate_limited += 1
+            return False
+
+        if self.duplicates.check(self.message_text(data), now):
+            self.duplicate += 1
+            return False
+
+        self.accepted += 1
+        position = self._seen
+        self._seen += 1
+        if len(self._sample) < self.sample_size:
+            self._sample.append((position, data))
+        else:
+            slot = self._rng.randrange(self._seen)
+            if slot < self.sample_size:
+                self._sample[slot] = (position, data)
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Number of accepted messages waiting for the next turn."""
+        return self._seen
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        """Return the sampled messages merged into one input, or None if there are none."""
+        if not self._sample:
+            return None
+        sample = [data for _position, data in sorted(self._sample, key=lambda item: item[0])]
+        seen = self._seen
+        self._sample = []
+        self._seen = 0
+        self.batches += 1
+
+        merged = dict(sample[0])
+        merged["content"] = "\n".join(self.message_line(data) for data in sample)
+        merged.pop("text", None)
+        merged["sampled"] = len(sample)
+        merged["seen"] = seen
+        return merged
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "offered": self.offered,
+            "rate_limited": self.rate_limited,
+            "duplicate": self.duplicate,
+            "accepted": self.accepted,
+            "batches": self.batches,
+            "pending": self.pending,
+        }
@@ -70,22 +70,83 @@ class Config:
         if "model" not in llm_service or not llm_service["model"]:
             raise ValueError(f"Missing required configuration in LLM service '{llm_service_id}': model")
 
-        # Validate TTS service configuration
-        if "key" not in tts_service or not tts_service["key"]:
-            raise ValueError(f"Missing required configuration in TTS service '{tts_service_id}': key")
-        if "region" not in tts_service or not tts_service["region"]:
-            raise ValueError(f"Missing required configuration in TTS service '{tts_service_id}': region")
-        if "timeout" not in tts_service:
-            raise ValueError(f"Missing required configuration in TTS service '{tts_service_id}': timeout")
+        # Validate TTS service configuration; the provider defaults to Azure,
+        # the only one that needs credentials
+        self.TTS_PROVIDER = str(tts_service.get("provider") or "azure").lower()
+        if self.TTS_PROVIDER not in ("azure", "local"):
+            raise ValueError(f"Unknown provider in TTS service '{tts_service_id}': {self.TTS_PROVIDER}")
+        if self.TTS_PROVIDER == "azure":
+            if "key" not in tts_service or not tts_service["key"]:
+                raise ValueError(f"Missing required configuration in TTS service '{tts_service_id}': key")
+            if "region" not in tts_service or not tts_service["region"]:
+                raise ValueError(f"Missing required configuration in TTS service '{tts_service_id}': region")
+            if "timeout" not in tts_service:
+                raise ValueError(f"Missing required configuration in TTS service '{tts_service_id}': timeout")
 
         # Set configuration values
         self.OPENAI_API_KEY = llm_service["key"]
         self.OPENAI_BASE_URL = llm_service["url"]
         self.OPENAI_MODEL = llm_service["model"]
 
-        self.AZURE_TTS_KEY = tts_service["key"]
-        self.AZURE_TTS_REGION = tts_service["region"]
-        self.AZURE_TTS_TIMEOUT = float(tts_service["timeout"])
+        self.AZURE_TTS_KEY = tts_service.get("key", "")
+        self.AZURE_TTS_REGION = tts_service.get("region", "")
+        self.AZURE_TTS_TIMEOUT = float(tts_service.get("timeout", 10))
+
+        # Local (offline) TTS service settings: audio format ("mp3" or "wav"),
+        # speaking rate, and the simulated synthesis latency
+        self.TTS_LOCAL_FORMAT = str(tts_service.get("format", "mp3")).lower()
+        if self.TTS_LOCAL_FORMAT not in ("mp3", "wav"):
+            raise ValueError(f"Unsupported format in TTS service '{tts_service_id}': {self.TTS_LOCAL_FORMAT}")
+        self.TTS_LOCAL_CHARS_PER_SECOND = float(tts_service.get("chars_per_second", 15))
+        self.TTS_LOCAL_LATENCY_MS = float(tts_service.get("latency_ms", 150))
+        self.TTS_LOCAL_LATENCY_PER_CHAR_MS = float(tts_service.get("latency_per_char_ms", 1))
+        self.TTS_LOCAL_JITTER_MS = float(tts_service.get("jitter_ms", 50))
+
+        # TTS pipeline settings (optional)
+        tts_config = neuro_sama_config.get("tts_settings") or {}
+        self.TTS_MAX_CONCURRENCY = int(tts_config.get("max_concurrency", 4))
+        self.TTS_POOL_SIZE = int(tts_config.get("pool_size", self.TTS_MAX_CONCURRENCY))
+        self.TTS_CACHE_ENABLED = bool(tts_config.get("cache_enabled", True))
+        self.TTS_CACHE_MEMORY_ENTRIES = int(tts_config.get("cache_memory_entries", 256))
+        self.TTS_CACHE_DISK_MAX_BYTES = int(float(tts_config.get("cache_disk_max_mb", 256)) * 1024 * 1024)
+        self.TTS_CACHE_WARMUP_PHRASES = list(tts_config.get("warmup_phrases") or [])
+
+        # Turn scheduling settings (optional)
+        turn_config = neuro_sama_config.get("turn_settings") or {}
+        self.MAX_CONCURRENT_TURNS = int(turn_config.get("max_concurrent_turns", 2))
+        self.TURN_QUEUE_SIZE = int(turn_config.get("queue_size", 8))
+        self.COALESCE_ENABLED = bool(turn_config.get("coalesce_enabled", False))
+        self.COALESCE_WINDOW_MS = float(turn_config.get("coalesce_window_ms", 250))
+        self.COALESCE_MAX_MESSAGES = int(turn_config.get("coalesce_max_messages", 10))
+        self.COALESCE_MAX_CHARS = int(turn_config.get("coalesce_max_chars", 2000))
+        # Priority lanes ({name: {"weight", "max_age"}}) and the lane of each module,
+        # keyed by the "module" field of the chat input; None keeps the built-in
+        # defaults. An input dropped for its age is answered
+        # with an error pack, and across sessions a free turn slot goes to the
+        # waiting turn of the heaviest lane first
+        self.TURN_LANES = turn_config.get("lanes") or None
+        self.TURN_MODULE_LANES = turn_config.get("module_lanes")
+
+        # High-rate chat ingestion settings (optional)
+        ingest_config = neuro_sama_config.get("chat_ingest_settings") or {}
+        self.CHAT_INGEST_ENABLED = bool(ingest_config.get("enabled", False))
+        self.CHAT_INGEST_MODULES = list(ingest_config.get("modules", ["stream_system"]))
+        self.CHAT_INGEST_SAMPLE_SIZE = int(ingest_config.get("sample_size", 10))
+        self.CHAT_INGEST_USER_RATE = float(ingest_config.get("user_rate", 0.5))
+        self.CHAT_INGEST_USER_BURST = float(ingest_config.get("user_burst", 3))
+        self.CHAT_INGEST_DUPLICATE_THRESHOLD = float(ingest_config.get("duplicate_threshold", 0.8))
+        self.CHAT_INGEST_DUPLICATE_WINDOW = int(ingest_config.get("duplicate_window", 2000))
+        self.CHAT_INGEST_DUPLICATE_TTL = float(ingest_config.get("duplicate_ttl", 30.0))
+
+        # Admin WebSocket settings (optional): pending messages kept per dashboard
+        # connection, ping interval and how long a silent or stuck client is kept.
+        # Only clients announcing the "pong" capability in a hello are closed for
+        # not answering pings; any client is closed when a send to it times out
+        admin_config = neuro_sama_config.get("admin_settings") or {}
+        self.ADMIN_QUEUE_SIZE = int(admin_config.get("queue_size", 64))
+        self.ADMIN_PING_INTERVAL = float(admin_config.get("ping_interval", 20.0))
+        self.ADMIN_PING_TIMEOUT = float(admin_config.get("ping_timeout", 20.0))
+        self.ADMIN_SEND_TIMEOUT = float(admin_config.get("send_timeout", 5.0))
 
         # Server configuration
         server_config = neuro_sama_config.get("server_settings", {})
@@ -104,4 +165,34 @@ class Config:
         self.PROMPT_PATH = os.path.join(working_dir, "prompts", "neuro_prompt.txt")
         self.CORE_MEMORY_PATH = os.path.join(working_dir, "memory", "core_memory.json")
         self.INIT_MEMORY_PATH = os.path.join(working_dir, "memory", "init_memory.json")
-        self.TEMP_MEMORY_PATH = os.path.join(working_dir, "memory", "temp_memory.json")
\ No newline at end of file
+        self.TEMP_MEMORY_PATH = os.path.join(working_dir, "memory", "temp_memory.json")
+        self.MEMORY_JOURNAL_PATH = os.path.join(working_dir, "memory", "journal.jsonl")
+        self.MEMORY_DB_PATH = os.path.join(working_dir, "memory", "memory.db")
+        self.TTS_CACHE_DIR = os.path.join(working_dir, "cache", "tts")
+
+        # How often (seconds) the prompts directory is checked for changes (optional)
+        prompt_config = neuro_sama_config.get("prompt_settings") or {}
+        self.PROMPT_WATCH_INTERVAL = float(prompt_config.get("watch_interval", 1.0))
+
+        # Memory persistence settings (optional): the "json" backend keeps memory in
+        # JSON files, the "sqlite" backend in a database filled from them on first use.
+        # A database deleted or replaced while running (e.g. by a data reset) is
+        # reopened, and filled from the JSON files again if new. Going back to "json"
+        # writes the database to the JSON files and moves it to memory.db.exported;
+        # if that fails the JSON backend refuses to start on the stale files.
+        # With JSON files, "journal" persistence appends each change to the memory
+        # journal, "snapshot" persistence rewrites the files after `flush_delay`
+        memory_config = neuro_sama_config.get("memory_settings") or {}
+        self.MEMORY_BACKEND = str(memory_config.get("backend", "json")).lower()
+        self.MEMORY_FLUSH_DELAY = float(memory_config.get("flush_delay", 1.0))
+        self.MEMORY_PERSISTENCE = str(memory_config.get("persistence", "journal")).lower()
+        self.MEMORY_JOURNAL_FSYNC_INTERVAL = float(memory_config.get("journal_fsync_interval", 0.05))
+        self.MEMORY_JOURNAL_COMPACT_BYTES = int(memory_config.get("journal_compact_kb", 1024)) * 1024
+
+        # Logging settings (optional): level, "text" or "json" lines, whether tools
+        # draw console boxes, and how long a logged value may get before it is cut
+        logging_config = neuro_sama_config.get("logging_settings") or {}
+        self.LOG_LEVEL = str(logging_config.get("level", "INFO")).upper()
+        self.LOG_FORMAT = str(logging_config.get("format", "text")).lower()
+        self.LOG_CONSOLE_BOXES = bool(logging_config.get("console_boxes", True))
+        self.LOG_MAX_FIELD_CHARS = int(logging_config.get("max_field_chars", 200))
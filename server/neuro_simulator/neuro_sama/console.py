@@ -6,6 +6,7 @@ import re
 import shutil
 import sys
 import textwrap
+from typing import Callable, Optional
 
 # ==============================================================================
 # ANSI Color Definitions
@@ -103,6 +104,32 @@ PALETTE = {
 # Console UI Functions
 # ==============================================================================
 
+# Whether box_it_up draws anything, and where finished boxes are written.
+# Without a writer they go straight to the original stdout.
+_boxes_enabled = True
+_writer: Optional[Callable[[str], None]] = None
+
+
+def set_boxes_enabled(enabled: bool):
+    """Turn the tool console boxes on or off."""
+    global _boxes_enabled
+    _boxes_enabled = bool(enabled)
+
+
+def set_writer(writer: Optional[Callable[[str], None]]):
+    """Set the function that writes finished boxes, e.g. a background log writer."""
+    global _writer
+    _writer = writer
+
+
+def _write(text: str):
+    if _writer is not None:
+        _writer(text)
+    else:
+        sys.__stdout__.write(text)
+        sys.__stdout__.flush()
+
+
 def box_it_up(
     lines: list[str],
     title: str = "",
@@ -110,10 +137,10 @@ def box_it_up(
     content_color: str = RESET,
 ):
     """
-    Wraps a list of strings in a decorative, auto-wrapping box and prints them
-    directly to the original stdout, bypassing any log handlers.
+    Wraps a list of strings in a decorative, auto-wrapping box and writes it
+    in one piece, to the original stdout or the writer set by `set_writer`.
     """
-    if not lines:
+    if not lines or not _boxes_enabled:
         return
 
     # --- Text Wrapping Logic ---
@@ -164,20 +191,18 @@ def box_it_up(
         top_border_str = f"╭───┤ {title} ├{'─' * (width - len(title) - 1)}╮"
     else:
         top_border_str = f"╭───{'─' * width}───╮"
-    sys.__stdout__.write(f"{border_color}{top_border_str}{RESET}\n")
-    sys.__stdout__.flush()
+    output = [f"{border_color}{top_border_str}{RESET}\n"]
 
     # Content lines
     for line in wrapped_lines:
         padding = width - visible_len(line)
-        sys.__stdout__.write(
+        output.append(
             f"{border_color}│{RESET}"
             f"   {line}{' ' * padding}   "
             f"{border_color}│{RESET}\n"
         )
-        sys.__stdout__.flush()
 
     # Bottom border
     bottom_border_str = f"╰───{'─' * width}───╯"
-    sys.__stdout__.write(f"{border_color}{bottom_border_str}{RESET}\n")
-    sys.__stdout__.flush()
\ No newline at end of file
+    output.append(f"{border_color}{bottom_border_str}{RESET}\n")
+    _write("".join(output))
\ No newline at end of file
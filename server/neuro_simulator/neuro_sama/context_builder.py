@@ -2,10 +2,61 @@
 
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, Hashable, List, Tuple
 
 from .tool_manager import ToolManager
-from .memory_manager import MemoryManager
+from .memory_manager import create_memory_manager
+from .prompt_template import get_prompt_template
+
+
+class PromptSectionCache:
+    """
+    Memoizes rendered prompt sections against a version value.
+
+    A section is only re-rendered when the version it was rendered for no
+    longer matches, e.g. after its source memory or the prompt file changed.
+    The cache is shared by all context builders in the process.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Hashable, str]] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    def get(self, section: str, key: Hashable, version: Hashable, render: Callable[[], str]) -> str:
+        """Return the cached rendering of `section`, rendering it if `version` changed."""
+        entry = self._entries.get((section, key))
+        if entry is not None and entry[0] == version:
+            self._hits[section] = self._hits.get(section, 0) + 1
+            return entry[1]
+
+        self._misses[section] = self._misses.get(section, 0) + 1
+        value = render()
+        self._entries[(section, key)] = (version, value)
+        return value
+
+    def clear(self):
+        """Drop all cached sections."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters per section and in total."""
+        sections = sorted(set(self._hits) | set(self._misses))
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "sections": {
+                name: {"hits": self._hits.get(name, 0), "misses": self._misses.get(name, 0)}
+                for name in sections
+            },
+        }
+
+
+# Process-wide cache shared by all context builders
+prompt_cache = PromptSectionCache()
 
 
 class ContextBuilder:
@@ -13,8 +64,11 @@ class ContextBuilder:
 
     def __init__(self, config, on_memory_change_callback=None):
         self.config = config
-        self.memory_manager = MemoryManager(config, on_memory_change_callback)
+        self.memory_manager = create_memory_manager(config, on_memory_change_callback)
         self.tool_manager = ToolManager(memory_manager=self.memory_manager)
+        self.prompt_template = get_prompt_template(
+            config.PROMPT_PATH, getattr(config, "PROMPT_WATCH_INTERVAL", 1.0)
+        )
 
     def format_core_memory(self) -> str:
         """Format core memory for the prompt."""
@@ -72,38 +126,45 @@ class ContextBuilder:
 
     def format_tool_descriptions(self) -> str:
         """Format tool descriptions for the prompt."""
-        schemas = self.tool_manager.get_tool_schemas()
-        if not schemas:
-            return "No tools available."
-
-        lines = ["Available tools:"]
-        for i, schema in enumerate(schemas):
-            params_str_parts = []
-            for param in schema.get("parameters", []):
-                p_name = param.get("name")
-                p_type = param.get("type")
-                p_req = "required" if param.get("required") else "optional"
-                params_str_parts.append(f"{p_name}: {p_type} ({p_req})")
-            params_str = ", ".join(params_str_parts)
-            lines.append(
-                f"{i + 1}. {schema.get('name')}({params_str}) - {schema.get('description')}"
-            )
-        return "\n".join(lines)
+        # Formatted once per load of the tool registry
+        return self.tool_manager.get_tool_descriptions()
 
     def build_system_prompt(self) -> str:
         """Build the system prompt for the LLM."""
-        # Load the prompt template
-        with open(self.config.PROMPT_PATH, 'r', encoding='utf-8') as f:
-            prompt_template = f.read()
+        memory_versions = self.memory_manager.get_memory_versions()
+        prompt_version = self.prompt_template.version
+        tools_version = self.tool_manager.version
+
+        # Nothing changed since the last build: reuse the whole prompt
+        full_version = (prompt_version, tools_version, tuple(sorted(memory_versions.items())))
+        return prompt_cache.get(
+            "system_prompt", self.config.PROMPT_PATH, full_version,
+            lambda: self._render_system_prompt(memory_versions, prompt_version, tools_version),
+        )
 
+    def _render_system_prompt(self, memory_versions: Dict[str, int],
+                              prompt_version: int, tools_version: int) -> str:
+        """Render the system prompt, re-rendering only the sections that changed."""
         # Format memory components using the memory manager
-        formatted_core_memory = self.format_core_memory()
-        formatted_init_memory = self.format_init_memory()
-        formatted_temp_memory = self.format_temp_memory()
-        formatted_tool_descriptions = self.format_tool_descriptions()
+        formatted_core_memory = prompt_cache.get(
+            "core_memory", self.memory_manager.storage_paths["core_memory"], memory_versions["core_memory"],
+            self.format_core_memory,
+        )
+        formatted_init_memory = prompt_cache.get(
+            "init_memory", self.memory_manager.storage_paths["init_memory"], memory_versions["init_memory"],
+            self.format_init_memory,
+        )
+        formatted_temp_memory = prompt_cache.get(
+            "temp_memory", self.memory_manager.storage_paths["temp_memory"], memory_versions["temp_memory"],
+            self.format_temp_memory,
+        )
+        formatted_tool_descriptions = prompt_cache.get(
+            "tool_descriptions", self.tool_manager.tools_dir, tools_version,
+            self.format_tool_descriptions,
+        )
 
-        # Build the system prompt (without current context)
-        system_prompt = prompt_template.format(
+        # Render the compiled prompt template (without current context)
+        system_prompt = self.prompt_template.render(
             tool_descriptions=formatted_tool_descriptions,
             init_memory=formatted_init_memory,
             core_memory=formatted_core_memory,
@@ -112,6 +173,10 @@ class ContextBuilder:
 
         return system_prompt
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Return the prompt section cache hit/miss counters."""
+        return prompt_cache.get_stats()
+
     def build_context(self, user_messages: List[Dict[str, str]]) -> str:
         """Build the current context for the LLM (just the user messages)."""
         formatted_user_messages = self.format_user_messages(user_messages)
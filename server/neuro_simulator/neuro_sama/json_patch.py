@@ -0,0 +1,126 @@
+"""
+Minimal RFC 6902 JSON Patch support for memory change feeds.
+
+`make_patch` produces `add`, `remove` and `replace` operations that turn one
+JSON document into another; `apply_patch` applies them to a copy and
+`apply_patch_in_place` to the document itself. Lists are diffed by
+their common prefix and suffix, and a list whose head was dropped while items
+were appended (the temp memory window sliding forward) becomes a few removes
+and adds instead of a replace of every item.
+"""
+
+import copy
+from typing import Any, Dict, List
+
+Operation = Dict[str, Any]
+
+
+def escape_token(token: str) -> str:
+    """Escape one JSON Pointer reference token."""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape_token(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[Operation]:
+    """Return the operations that turn `old` into `new`, rooted at `path`."""
+    ops: List[Operation] = []
+    _diff(old, new, path, ops)
+    return ops
+
+
+def _diff(old: Any, new: Any, path: str, ops: List[Operation]):
+    if old is new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{escape_token(key)}"})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{escape_token(key)}", "value": value})
+            else:
+                _diff(old[key], value, f"{path}/{escape_token(key)}", ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        _diff_list(old, new, path, ops)
+    elif type(old) is not type(new) or old != new:
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def _diff_list(old: list, new: list, path: str, ops: List[Operation]):
+    # Common prefix and suffix are left alone
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    old_mid = old[start:end_old]
+    new_mid = new[start:end_new]
+
+    # The head of the old items dropped and new ones appended: find the
+    # shortest head whose removal leaves a prefix of the new items
+    shift = len(old_mid)
+    for k in range(1, len(old_mid)):
+        kept = len(old_mid) - k
+        if kept <= len(new_mid) and old_mid[k] == new_mid[0] and old_mid[k:] == new_mid[:kept]:
+            shift = k
+            break
+
+    if shift == len(old_mid) and len(old_mid) == len(new_mid):
+        # Items edited in place
+        for offset, (old_item, new_item) in enumerate(zip(old_mid, new_mid)):
+            _diff(old_item, new_item, f"{path}/{start + offset}", ops)
+        return
+
+    kept = len(old_mid) - shift
+
+    for _ in range(shift):
+        ops.append({"op": "remove", "path": f"{path}/{start}"})
+    for offset, item in enumerate(new_mid[kept:]):
+        ops.append({"op": "add", "path": f"{path}/{start + kept + offset}", "value": item})
+
+
+def apply_patch(document: Any, ops: List[Operation]) -> Any:
+    """Apply operations to a copy of `document` and return the result."""
+    return apply_patch_in_place(copy.deepcopy(document), ops)
+
+
+def apply_patch_in_place(document: Any, ops: List[Operation]) -> Any:
+    """Apply operations to `document` itself and return the result."""
+    for op in ops:
+        tokens = [_unescape_token(token) for token in op["path"].split("/")[1:]]
+        if not tokens:
+            if op["op"] == "remove":
+                document = None
+            else:
+                document = copy.deepcopy(op["value"])
+            continue
+
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del parent[index]
+            elif op["op"] == "replace":
+                parent[index] = copy.deepcopy(op["value"])
+            else:
+                raise ValueError(f"Unsupported patch operation: {op['op']}")
+        else:
+            if op["op"] in ("add", "replace"):
+                parent[last] = copy.deepcopy(op["value"])
+            elif op["op"] == "remove":
+                del parent[last]
+            else:
+                raise ValueError(f"Unsupported patch operation: {op['op']}")
+    return document
@@ -1,109 +1,260 @@
 """Streaming JSON parser for processing JSON responses incrementally."""
 
 import json
-from typing import List, Dict, Any, Optional
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Characters that can change the scanner state between objects, inside
+# objects and inside strings
+_STRUCTURAL_CHARS = re.compile(r'[{"\\]')
+_OBJECT_CHARS = re.compile(r'[{}\[\]:,"\\]')
+_STRING_CHARS = re.compile(r'["\\]')
+_HIGH_SURROGATE_TAIL = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}$')
+
+# Keys under which a tool call may carry its parameters
+PARAMS_KEYS = ("params", "parameters")
+
+# Event types emitted by StreamingJSONParser.feed_events
+OBJECT_START = "object_start"    # a top-level object was opened
+TOOL_NAME = "tool_name"          # the object's "name" string is complete
+FIELD_DELTA = "field_delta"      # more decoded text of a streamed params field
+FIELD_END = "field_end"          # a streamed params field is complete
+OBJECT = "object"                # the object closed and parsed successfully
+OBJECT_ERROR = "object_error"    # the object closed but was not valid JSON
+
+
+@dataclass
+class ParserEvent:
+    """An incremental event produced while scanning a top-level JSON object."""
+
+    type: str
+    index: int
+    name: Optional[str] = None
+    text: str = ""
+    value: Any = None
+
+
+def _decode_json_string(raw: str) -> str:
+    """Decode the raw contents of a JSON string literal."""
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except json.JSONDecodeError:
+        return raw
+
+
+def _is_escaping(raw: str, backslash: int) -> bool:
+    """Check whether the backslash at `backslash` starts an escape sequence."""
+    run_start = backslash
+    while run_start > 0 and raw[run_start - 1] == '\\':
+        run_start -= 1
+    return (backslash - run_start) % 2 == 0
+
+
+def _split_complete_escapes(raw: str) -> Tuple[str, str]:
+    """
+    Split raw string contents into a prefix that can be decoded now and a tail
+    that ends in an incomplete escape sequence (or a lone high surrogate that
+    may still be followed by its pair).
+    """
+    complete, incomplete = raw, ""
+
+    backslash = raw.rfind('\\')
+    if backslash != -1 and _is_escaping(raw, backslash):
+        tail = raw[backslash:]
+        if len(tail) < 2 or (tail[1] == 'u' and len(tail) < 6):
+            complete, incomplete = raw[:backslash], tail
+
+    surrogate = _HIGH_SURROGATE_TAIL.search(complete)
+    if surrogate is not None and _is_escaping(complete, surrogate.start()):
+        complete, incomplete = complete[:surrogate.start()], complete[surrogate.start():] + incomplete
+    return complete, incomplete
 
 
 class StreamingJSONParser:
-    """A streaming JSON parser that can extract complete JSON objects from a stream."""
+    """
+    A streaming JSON parser that can extract complete JSON objects from a stream.
+
+    The scanner is a resumable state machine: the nesting depth and the
+    string/escape state are kept across `feed` calls, so every character is
+    examined exactly once no matter how the text is chunked. Text belonging
+    to an unfinished object is kept as a list of chunk slices and joined only
+    once, when the object closes.
+
+    Besides complete objects, `feed_events` reports progress inside each
+    top-level object: when it opens, when its tool name is known and, for the
+    parameter names given in `stream_fields`, the decoded string value as it
+    arrives.
+    """
+
+    def __init__(self, stream_fields: Iterable[str] = ()):
+        self.stream_fields = frozenset(stream_fields)
+        self.reset()
+
+    def reset(self):
+        """Reset the parser."""
+        self._depth = 0
+        self._in_string = False
+        self._escape_next = False
+        # Slices of the object currently being scanned
+        self._object_parts: List[str] = []
+        # Text seen since the last complete object, outside of any object
+        self._idle_parts: List[str] = []
+        self._object_index = -1
+        self._reset_object_state()
 
-    def __init__(self):
-        self.buffer = ""
+    def _reset_object_state(self):
+        # One [kind, key, expecting_key] entry per open container of the current object
+        self._stack: List[list] = []
+        # The string being captured as [kind, field_name, raw_parts], if any
+        self._capture: Optional[list] = None
 
     def feed(self, text: str) -> List[Dict[str, Any]]:
         """Feed text to the parser and return any complete JSON objects found."""
-        self.buffer += text
-        objects = []
-
-        # Look for JSON objects in the buffer
-        while True:
-            # Find the start of a potential JSON object
-            start_idx = self._find_next_json_start(self.buffer)
-            if start_idx == -1:
-                break  # No more JSON objects to process
-
-            # Find the corresponding end of the JSON object
-            end_idx = self._find_matching_bracket_end(self.buffer, start_idx)
-            if end_idx == -1:
-                # The JSON object is not complete yet, wait for more data
-                break
+        return [event.value for event in self.feed_events(text) if event.type == OBJECT]
 
-            # Extract the potential JSON string
-            json_str = self.buffer[start_idx:end_idx+1]
-            try:
-                # Try to parse it
-                obj = json.loads(json_str)
-                objects.append(obj)
-
-                # Remove the processed part from the buffer
-                self.buffer = self.buffer[end_idx+1:]
-            except json.JSONDecodeError:
-                # If parsing fails, it might be due to malformed JSON
-                # Skip this potential object and continue
-                # Move past the opening brace to look for the next potential object
-                self.buffer = self.buffer[start_idx+1:]
-
-        return objects
-
-    def _find_next_json_start(self, text: str) -> int:
-        """Find the index of the next JSON object start."""
-        in_string = False
-        escape_next = False
-
-        for i, char in enumerate(text):
-            if escape_next:
-                escape_next = False
-                continue
+    def feed_events(self, text: str) -> List[ParserEvent]:
+        """Feed text to the parser and return the events it produced, in order."""
+        events: List[ParserEvent] = []
 
-            if char == '\\':
-                escape_next = True
-                continue
+        pos = 0
+        # Position in `text` where the current object starts, if it started in this chunk
+        object_start: Optional[int] = 0 if self._depth > 0 else None
+        idle_start = pos
+        # Position in `text` where the captured string continues
+        capture_start = 0
 
-            if char == '"' and not escape_next:
-                in_string = not in_string
+        while pos < len(text):
+            if self._escape_next:
+                self._escape_next = False
+                pos += 1
                 continue
 
-            if not in_string and char == '{':
-                return i
+            if self._in_string:
+                pattern = _STRING_CHARS
+            elif self._depth > 0:
+                pattern = _OBJECT_CHARS
+            else:
+                pattern = _STRUCTURAL_CHARS
+            match = pattern.search(text, pos)
+            if match is None:
+                break
 
-        return -1
+            i = match.start()
+            char = text[i]
+            pos = i + 1
 
-    def _find_matching_bracket_end(self, text: str, start: int) -> int:
-        """Find the matching closing bracket for a JSON object."""
-        nested_level = 0
-        in_string = False
-        escape_next = False
+            if char == '\\':
+                self._escape_next = True
+            elif char == '"':
+                if self._in_string:
+                    self._in_string = False
+                    if self._capture is not None:
+                        self._finish_capture(text[capture_start:i], events)
+                else:
+                    self._in_string = True
+                    if self._depth > 0:
+                        self._capture = self._start_capture()
+                        capture_start = pos
+            elif char == '{':
+                if self._depth == 0:
+                    self._idle_parts.append(text[idle_start:i])
+                    object_start = i
+                    self._object_index += 1
+                    self._reset_object_state()
+                    events.append(ParserEvent(OBJECT_START, self._object_index))
+                self._depth += 1
+                self._stack.append(['{', None, True])
+            elif char == '}':
+                self._depth -= 1
+                if self._stack:
+                    self._stack.pop()
+                if self._depth == 0:
+                    self._object_parts.append(text[object_start:pos])
+                    json_str = "".join(self._object_parts)
+                    self._object_parts = []
+                    object_start = None
+                    try:
+                        # Try to parse it
+                        obj = json.loads(json_str)
+                        name = obj.get("name") if isinstance(obj, dict) else None
+                        events.append(ParserEvent(OBJECT, self._object_index, name=name, value=obj))
+                    except json.JSONDecodeError:
+                        # If parsing fails, it might be due to malformed JSON.
+                        # Skip past the opening brace and rescan the rest, so
+                        # objects nested inside the broken one can still be found.
+                        events.append(ParserEvent(OBJECT_ERROR, self._object_index, text=json_str))
+                        self._in_string = False
+                        self._escape_next = False
+                        text = json_str[1:] + text[pos:]
+                        pos = 0
+                    self._reset_object_state()
+                    self._idle_parts = []
+                    idle_start = pos
+            elif char == '[':
+                self._stack.append(['[', None, False])
+            elif char == ']':
+                if self._stack and self._stack[-1][0] == '[':
+                    self._stack.pop()
+            elif char == ':':
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][2] = False
+            elif char == ',':
+                if self._stack and self._stack[-1][0] == '{':
+                    self._stack[-1][1] = None
+                    self._stack[-1][2] = True
 
-        for i in range(start, len(text)):
-            char = text[i]
+        if self._depth > 0:
+            self._object_parts.append(text[object_start:])
+            if self._capture is not None:
+                self._continue_capture(text[capture_start:], events)
+        else:
+            self._idle_parts.append(text[idle_start:])
 
-            if escape_next:
-                escape_next = False
-                continue
+        return events
 
-            if char == '\\':
-                escape_next = True
-                continue
+    def _start_capture(self) -> Optional[list]:
+        """Decide whether the string that just opened needs to be captured."""
+        top = self._stack[-1] if self._stack else None
+        if top is None or top[0] != '{':
+            return None
+        if top[2]:
+            # A key; only the top-level and params-level keys matter
+            return ['key', None, []] if len(self._stack) <= 2 else None
+        if len(self._stack) == 1 and top[1] == "name":
+            return ['name', None, []]
+        if (len(self._stack) == 2 and self._stack[0][1] in PARAMS_KEYS
+                and top[1] in self.stream_fields):
+            return ['field', top[1], []]
+        return None
 
-            if not in_string:
-                if char == '{':
-                    nested_level += 1
-                elif char == '}':
-                    nested_level -= 1
-                    if nested_level == 0:
-                        return i
-                elif char == '"':
-                    in_string = True
-            else:
-                if char == '"':
-                    in_string = False
+    def _continue_capture(self, raw: str, events: List[ParserEvent]):
+        """Handle captured string text at the end of a chunk."""
+        kind, field, parts = self._capture
+        if kind != 'field':
+            parts.append(raw)
+            return
+        complete, incomplete = _split_complete_escapes("".join(parts) + raw)
+        if complete:
+            events.append(ParserEvent(
+                FIELD_DELTA, self._object_index, name=field, text=_decode_json_string(complete)
+            ))
+        self._capture[2] = [incomplete] if incomplete else []
 
-        return -1  # Not found
+    def _finish_capture(self, raw: str, events: List[ParserEvent]):
+        """Handle a captured string that just closed."""
+        kind, field, parts = self._capture
+        self._capture = None
+        value = _decode_json_string("".join(parts) + raw)
+        if kind == 'key':
+            self._stack[-1][1] = value
+        elif kind == 'name':
+            events.append(ParserEvent(TOOL_NAME, self._object_index, name=value))
+        else:
+            if value:
+                events.append(ParserEvent(FIELD_DELTA, self._object_index, name=field, text=value))
+            events.append(ParserEvent(FIELD_END, self._object_index, name=field))
 
     def get_remaining_buffer(self) -> str:
         """Get any remaining text in the buffer."""
-        return self.buffer
-
-    def reset(self):
-        """Reset the parser."""
-        self.buffer = ""
\ No newline at end of file
+        return "".join(self._idle_parts) + "".join(self._object_parts)
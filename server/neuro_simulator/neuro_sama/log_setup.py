@@ -0,0 +1,191 @@
+"""
+Structured, non-blocking logging for the Neuro Sama module.
+
+Records from the `neuro_simulator` loggers are put on a queue by the
+calling thread and formatted and written by a background listener thread,
+so logging never blocks the event loop on terminal or file I/O. Message
+arguments are only formatted once a record has passed the level check, and
+large values such as base64 audio are truncated when they are formatted.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Any, Optional
+
+from . import console
+
+# Logger that all module loggers (neuro_simulator.*) propagate to
+ROOT_LOGGER_NAME = "neuro_simulator"
+# Logger used for console boxes; its records are written as-is
+CONSOLE_LOGGER_NAME = "neuro_simulator.console"
+
+LOG_FORMAT_TEXT = "text"
+LOG_FORMAT_JSON = "json"
+
+# Default number of characters a logged string value is cut to
+DEFAULT_MAX_FIELD_CHARS = 200
+
+# Fields that are always replaced by their size when logged
+REDACTED_FIELDS = ("audio_base64", "api_key")
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_max_field_chars = DEFAULT_MAX_FIELD_CHARS
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        if len(value) > limit:
+            return f"{value[:limit]}...<{len(value)} chars>"
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, dict):
+        return {
+            key: f"<{len(item)} chars>" if key in REDACTED_FIELDS and isinstance(item, str) and item
+            else _truncate(item, limit)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_truncate(item, limit) for item in value]
+    return value
+
+
+class Redacted:
+    """
+    Wraps a log argument so it is truncated and redacted only when the
+    record is actually formatted.
+
+        logger.debug("Sending output pack: %s", Redacted(output_pack))
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        value = _truncate(self.value, self.limit or _max_field_chars)
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+    __repr__ = __str__
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class TextFormatter(logging.Formatter):
+    """`time LEVEL logger: message key=value ...`"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += " " + " ".join(f"{key}={_truncate(value, _max_field_chars)}" for key, value in fields.items())
+        return text
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any fields passed through `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in _extra_fields(record).items():
+            entry[key] = _truncate(value, _max_field_chars)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records without formatting them, leaving all formatting to the
+    listener thread. Records never leave the process, so they need not be
+    made picklable first.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _ConsoleFilter(logging.Filter):
+    def __init__(self, console_records: bool):
+        super().__init__()
+        self.console_records = console_records
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return (record.name == CONSOLE_LOGGER_NAME) == self.console_records
+
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_log_handler: Optional[logging.Handler] = None
+
+
+def setup_logging(config=None):
+    """
+    Route the module's logging through a background thread, or update the
+    level, format and console boxes after a config reload.
+    """
+    global _listener, _log_handler, _max_field_chars
+
+    level = getattr(config, "LOG_LEVEL", "INFO")
+    log_format = getattr(config, "LOG_FORMAT", LOG_FORMAT_TEXT)
+    _max_field_chars = getattr(config, "LOG_MAX_FIELD_CHARS", DEFAULT_MAX_FIELD_CHARS)
+
+    with _lock:
+        if _listener is None:
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+            _log_handler = logging.StreamHandler(sys.stderr)
+            _log_handler.addFilter(_ConsoleFilter(False))
+            console_handler = logging.StreamHandler(sys.__stdout__)
+            console_handler.setFormatter(logging.Formatter("%(message)s"))
+            console_handler.terminator = ""
+            console_handler.addFilter(_ConsoleFilter(True))
+
+            _listener = logging.handlers.QueueListener(log_queue, _log_handler, console_handler)
+            _listener.start()
+
+            root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+            root_logger.addHandler(_DeferredQueueHandler(log_queue))
+            # The module's records are handled here, not by the root logger's handlers
+            root_logger.propagate = False
+
+        _log_handler.setFormatter(JSONFormatter() if log_format == LOG_FORMAT_JSON else TextFormatter())
+        logging.getLogger(ROOT_LOGGER_NAME).setLevel(level)
+        logging.getLogger(CONSOLE_LOGGER_NAME).setLevel(logging.INFO)
+
+    console.set_boxes_enabled(getattr(config, "LOG_CONSOLE_BOXES", True))
+    console.set_writer(logging.getLogger(CONSOLE_LOGGER_NAME).info)
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background thread."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        console.set_writer(None)
+        _listener.stop()
+        _listener = None
+        root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in list(root_logger.handlers):
+            if isinstance(handler, _DeferredQueueHandler):
+                root_logger.removeHandler(handler)
+        root_logger.propagate = True
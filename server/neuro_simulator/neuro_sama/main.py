@@ -11,6 +11,11 @@ from openai import AsyncOpenAI
 
 from .config import Config
 from .api import router
+from .log_setup import setup_logging, shutdown_logging
+from .memory_manager import flush_all_memory
+from .prompt_template import stop_all_watchers
+from .tts import warm_up_tts
+from .tts_pool import close_synthesizer_pools
 from .banner import display_banner
 
 
@@ -54,6 +59,8 @@ async def lifespan(app: FastAPI):
             raise ValueError(f"Global configuration file not found: {config_file}. Please run Vedal Studio to initialize the working directory.")
 
     app.state.config = Config(global_config, working_dir)
+    # Log through a background thread from here on
+    setup_logging(app.state.config)
     app.state.openai_client = AsyncOpenAI(
         api_key=app.state.config.OPENAI_API_KEY,
         base_url=app.state.config.OPENAI_BASE_URL
@@ -65,10 +72,20 @@ async def lifespan(app: FastAPI):
     print(f"Neuro Sama module started on {app.state.config.HOST}:{app.state.config.PORT}")
     print(f"Using model: {app.state.config.OPENAI_MODEL}")
 
+    # Pre-connect TTS synthesizers and pre-synthesize common phrases in the background
+    warm_up_task = asyncio.create_task(warm_up_tts(app.state.config))
+
     yield
 
+    warm_up_task.cancel()
+
     # Shutdown
     print("Neuro Sama module shutting down...")
+    # Make sure no pending memory changes are lost
+    flush_all_memory()
+    stop_all_watchers()
+    close_synthesizer_pools()
+    shutdown_logging()
 
 
 # Create FastAPI app
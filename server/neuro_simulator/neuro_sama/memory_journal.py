@@ -0,0 +1,353 @@
+"""
+Append-only journal of memory changes for the Neuro Sama module.
+
+Every committed memory change is appended to `memory/journal.jsonl` as one
+line holding the JSON Patch operations of the change, so a change costs a
+small append instead of rewriting a whole memory file:
+
+    {"seq": 42, "time": 1760000000.123, "ops": [{"op": "add", "path": "/temp_memory/5", "value": {...}}]}
+
+Paths point into `{"init_memory": ..., "core_memory": ..., "temp_memory": ...}`
+with each memory as stored in its file. Appends are fsynced in batches.
+
+The memory JSON files are the snapshots. Once the journal grows past a size
+limit, and on shutdown, it is compacted: the snapshots are rewritten and the
+journal restarts with a header line recording the sequence number they
+include. Compaction rolls forward after a crash: new snapshots are written
+to temporary files first, and an intent file naming their sequence number is
+written before they are moved into place. At startup the snapshots are
+loaded and the journal is replayed on top of them. Between compactions the
+files lag behind the journal, so hand edits belong in a stopped server, whose
+shutdown compacted the journal; an edit picked up while running is journaled
+as a replace of the whole file.
+
+If the journal file is deleted or replaced while open, e.g. by a Vedal
+Studio data reset, the next append or sync notices it and starts a new
+journal: the memory files still matching the in-memory data are rewritten
+as snapshots first, and replaced ones are reloaded as journaled edits.
+
+The journal doubles as a change feed: `read(since)` returns the records after
+a sequence number.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .json_patch import apply_patch_in_place
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FSYNC_INTERVAL = 0.05
+DEFAULT_COMPACT_BYTES = 1024 * 1024
+
+# Suffix of the snapshot files written by a compaction before they are moved into place
+SNAPSHOT_TMP_SUFFIX = ".compact"
+
+
+class MemoryJournal:
+    """The journal of one memory directory and the memory files it covers."""
+
+    def __init__(self, path: str, files: Dict[str, Any], fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 compact_bytes: int = DEFAULT_COMPACT_BYTES):
+        self.path = path
+        self.files = files
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        # Shared with the memory files, so a change and its record are never
+        # split by a compaction
+        self.lock = threading.RLock()
+        self.seq = 0
+        # Sequence number included in the snapshots the journal starts from
+        self.first_seq = 0
+        self.appended = 0
+        self.compactions = 0
+        self._fd: Optional[int] = None
+        # Device and inode of the open journal file
+        self._fd_id: Optional[Tuple[int, int]] = None
+        self._size = 0
+        self._sync_timer: Optional[threading.Timer] = None
+        self._compacting = False
+        for name, memory_file in files.items():
+            memory_file.attach_journal(self, name)
+
+    @property
+    def intent_path(self) -> str:
+        return self.path + SNAPSHOT_TMP_SUFFIX
+
+    def open(self):
+        """Finish an interrupted compaction, replay the journal and open it for appending."""
+        with self.lock:
+            self._recover()
+            self._replay()
+            self._open_fd()
+
+    def _open_fd(self):
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        stat = os.fstat(self._fd)
+        self._fd_id = (stat.st_dev, stat.st_ino)
+
+    def check_file(self):
+        """
+        Start a new journal if the file was deleted or replaced since it was
+        opened. Callers changing memory call it before changing the data, so
+        the new snapshots do not already hold the change they append.
+        """
+        if self._fd is None:
+            return
+        try:
+            stat = os.stat(self.path)
+            file_id = (stat.st_dev, stat.st_ino)
+        except FileNotFoundError:
+            file_id = None
+        if file_id == self._fd_id:
+            return
+
+        logger.warning("Memory journal %s was deleted or replaced, starting a new one at seq %d",
+                       self.path, self.seq)
+        # The lost records are only in memory now; files replaced on disk are
+        # reloaded on their next read instead, journaled as a replace
+        for memory_file in self.files.values():
+            if memory_file.loaded and not memory_file.changed_on_disk():
+                _write_durably(memory_file.path + SNAPSHOT_TMP_SUFFIX, memory_file.serialize().encode("utf-8"))
+                os.replace(memory_file.path + SNAPSHOT_TMP_SUFFIX, memory_file.path)
+                memory_file.mark_written()
+        self._restart_journal(self.seq, b"")
+
+    # --- Appending ---
+
+    def append(self, ops: List[Dict[str, Any]]):
+        """Append the operations of one change."""
+        if not ops:
+            return
+        with self.lock:
+            self.check_file()
+            self.seq += 1
+            record = {"seq": self.seq, "time": round(time.time(), 3), "ops": ops}
+            line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            os.write(self._fd, line)
+            self._size += len(line)
+            self.appended += 1
+            self._schedule_sync()
+            if self._size > self.compact_bytes and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self._compact_in_background, name="memory-journal-compact",
+                                 daemon=True).start()
+
+    def _schedule_sync(self):
+        if self.fsync_interval <= 0:
+            os.fsync(self._fd)
+        elif self._sync_timer is None:
+            self._sync_timer = threading.Timer(self.fsync_interval, self.sync)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def sync(self):
+        """fsync the records appended since the last sync."""
+        with self.lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            if self._fd is None:
+                return
+            self.check_file()
+            # A duplicate stays valid if a compaction swaps the journal meanwhile
+            fd = os.dup(self._fd)
+        try:
+            os.fsync(fd)
+        except OSError as e:
+            logger.error("Error syncing memory journal %s: %s", self.path, e)
+        finally:
+            os.close(fd)
+
+    # --- Compaction ---
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error("Error compacting memory journal %s: %s", self.path, e)
+        finally:
+            self._compacting = False
+
+    def compact(self):
+        """Rewrite the snapshots and drop the journal records they include."""
+        with self.lock:
+            self.check_file()
+            seq = self.seq
+            offset = self._size
+            fd_id = self._fd_id
+            if seq == self.first_seq:
+                return
+            snapshots = [(memory_file, memory_file.serialize()) for memory_file in self.files.values()]
+
+        # Writing the snapshots does not hold up new changes
+        for memory_file, text in snapshots:
+            _write_durably(memory_file.path + SNAPSHOT_TMP_SUFFIX, text.encode("utf-8"))
+
+        with self.lock:
+            self.check_file()
+            if self._fd_id != fd_id:
+                # A new journal was started meanwhile, with snapshots of its own
+                for memory_file, _ in snapshots:
+                    os.remove(memory_file.path + SNAPSHOT_TMP_SUFFIX)
+                return
+            _write_durably(self.intent_path, json.dumps({"seq": seq}).encode("utf-8"))
+            for memory_file, _ in snapshots:
+                os.replace(memory_file.path + SNAPSHOT_TMP_SUFFIX, memory_file.path)
+                memory_file.mark_written()
+            tail = b""
+            if self._size > offset:
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    tail = f.read()
+            self._restart_journal(seq, tail)
+            os.remove(self.intent_path)
+            self.compactions += 1
+        logger.info("Compacted memory journal %s at seq %d", self.path, seq)
+
+    def _restart_journal(self, seq: int, tail: bytes):
+        """Replace the journal with a header for `seq` followed by `tail`."""
+        header = (json.dumps({"seq": seq, "time": round(time.time(), 3), "snapshot": True}) + "\n").encode("utf-8")
+        _write_durably(self.path + ".tmp", header + tail)
+        os.replace(self.path + ".tmp", self.path)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._open_fd()
+        self._size = len(header) + len(tail)
+        self.first_seq = seq
+
+    def _recover(self):
+        if not os.path.exists(self.intent_path):
+            # A compaction stopped before its snapshots counted; drop them
+            for memory_file in self.files.values():
+                tmp_path = memory_file.path + SNAPSHOT_TMP_SUFFIX
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return
+
+        with open(self.intent_path, "r", encoding="utf-8") as f:
+            seq = json.load(f)["seq"]
+        logger.warning("Finishing interrupted memory journal compaction at seq %d", seq)
+        for memory_file in self.files.values():
+            tmp_path = memory_file.path + SNAPSHOT_TMP_SUFFIX
+            if os.path.exists(tmp_path):
+                os.replace(tmp_path, memory_file.path)
+        records, _ = self._read_records()
+        tail = b"".join(
+            (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            for record in records if record["seq"] > seq and not record.get("snapshot")
+        )
+        self._restart_journal(seq, tail)
+        os.remove(self.intent_path)
+
+    # --- Replay and reading ---
+
+    def _read_records(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Parse the journal; returns its records and the length of its intact part."""
+        try:
+            with open(self.path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return [], 0
+
+        records = []
+        valid = 0
+        for line in content.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # Torn last write
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            valid += len(line)
+        if valid < len(content):
+            logger.warning("Ignoring %d damaged bytes at the end of memory journal %s",
+                           len(content) - valid, self.path)
+        return records, valid
+
+    def _replay(self):
+        records, valid = self._read_records()
+        if os.path.exists(self.path) and valid < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid)
+        self._size = valid
+
+        documents = {name: copy.deepcopy(memory_file.get()) for name, memory_file in self.files.items()}
+        changed = set()
+        replayed = 0
+        for record in records:
+            if record.get("snapshot"):
+                self.first_seq = record["seq"]
+            else:
+                try:
+                    apply_patch_in_place(documents, record["ops"])
+                except Exception as e:
+                    logger.error("Stopping memory journal replay at seq %d: %s", record["seq"], e)
+                    break
+                changed.update(op["path"].split("/")[1] for op in record["ops"])
+                replayed += 1
+            self.seq = record["seq"]
+
+        for name in changed:
+            if name in self.files:
+                self.files[name].set(documents[name], dirty=False)
+        if replayed:
+            logger.info("Replayed %d memory journal records from %s", replayed, self.path)
+
+    def read(self, since: int = 0, limit: int = 1000) -> Dict[str, Any]:
+        """
+        Return up to `limit` records after sequence number `since`. Records
+        before `first_seq` were compacted away; `truncated` tells a reader
+        it asked for some of them.
+        """
+        with self.lock:
+            records, _ = self._read_records()
+            first_seq, last_seq = self.first_seq, self.seq
+        return {
+            "first_seq": first_seq,
+            "last_seq": last_seq,
+            "truncated": since < first_seq,
+            "records": [record for record in records
+                        if record["seq"] > since and not record.get("snapshot")][:limit],
+        }
+
+    def flush(self):
+        """Sync pending records and fold them into the snapshots. Called on shutdown."""
+        self.sync()
+        self.compact()
+
+    def detach(self):
+        """Stop journaling the memory files, e.g. when switching back to snapshot persistence."""
+        with self.lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            for memory_file in self.files.values():
+                memory_file.attach_journal(None, memory_file.name)
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+                self._fd_id = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "first_seq": self.first_seq,
+            "last_seq": self.seq,
+            "bytes": self._size,
+            "appended": self.appended,
+            "compactions": self.compactions,
+        }
+
+
+def _write_durably(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
@@ -1,58 +1,594 @@
 """Memory manager for the Neuro Sama module."""
 
+import atexit
+import copy
+import functools
 import json
+import logging
 import os
-from typing import Dict, Any, List, Optional
+import random
+import string
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+from .json_patch import make_patch
+from .memory_journal import DEFAULT_COMPACT_BYTES, DEFAULT_FSYNC_INTERVAL, MemoryJournal
+
+logger = logging.getLogger(__name__)
+
+# Default delay (seconds) between the last memory change and the write to disk
+DEFAULT_FLUSH_DELAY = 1.0
+
+# A pending flush is never postponed for longer than this multiple of the delay,
+# so a steady stream of changes still reaches the disk regularly.
+MAX_FLUSH_DELAY_FACTOR = 5
+
+# Number of newest temp memory entries that are kept
+TEMP_MEMORY_LIMIT = 20
+
+
+class MemoryFile:
+    """
+    Authoritative in-memory copy of one memory JSON file.
+
+    Reads are served from memory. The file's mtime is checked on access so
+    that external edits (dashboard resets, manual edits) are still picked up
+    while there are no unsaved changes. Writes mark the file dirty and are
+    persisted later by the flush scheduler using an atomic temp-file rename.
+
+    A file attached to a memory journal shares the journal's lock, and
+    records external edits in the journal as a replace of the whole file.
+    """
+
+    def __init__(self, path: str, default_factory: Callable[[], Any]):
+        self.path = path
+        self.default_factory = default_factory
+        self.lock = threading.RLock()
+        self.version = 0
+        self._data: Any = None
+        self._loaded = False
+        self._mtime_ns: Optional[int] = None
+        self._dirty = False
+        self._flushing = False
+        # Held across a whole flush, so the timer and shutdown flushes never interleave
+        self._flush_lock = threading.Lock()
+        self.journal = None
+        self.name: Optional[str] = None
+
+    def attach_journal(self, journal, name: str):
+        """Record external edits in `journal` (None to detach), under its lock."""
+        self.journal = journal
+        self.name = name
+        self.lock = journal.lock if journal is not None else threading.RLock()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def changed_on_disk(self) -> bool:
+        """Check whether the file on disk is no longer the one last read or written."""
+        with self.lock:
+            return self._stat_mtime() != self._mtime_ns
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self, mtime_ns: Optional[int]):
+        if mtime_ns is None:
+            data = self.default_factory()
+        else:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        reloaded = self._loaded
+        self._data = data
+        self._mtime_ns = mtime_ns
+        self._loaded = True
+        self.version += 1
+        if reloaded and self.journal is not None:
+            self.journal.append([{"op": "replace", "path": f"/{self.name}", "value": data}])
+
+    def get(self) -> Any:
+        """Return the live data, reloading it first if the file changed on disk."""
+        with self.lock:
+            if not self._loaded:
+                self._load(self._stat_mtime())
+            elif not self._flushing:
+                mtime_ns = self._stat_mtime()
+                if mtime_ns != self._mtime_ns:
+                    if self._dirty:
+                        logger.warning(
+                            "Memory file %s changed on disk while there are unsaved changes; "
+                            "keeping the in-memory version", self.path
+                        )
+                        self._mtime_ns = mtime_ns
+                    else:
+                        self._load(mtime_ns)
+            return self._data
+
+    def current_version(self) -> int:
+        """Return the data version, after picking up any external change."""
+        with self.lock:
+            self.get()
+            return self.version
+
+    def set(self, data: Any, dirty: bool = True):
+        """Replace the data and, unless it is persisted elsewhere, mark it for flushing."""
+        with self.lock:
+            self._data = data
+            self._loaded = True
+            self._dirty = self._dirty or dirty
+            self.version += 1
+
+    def serialize(self) -> str:
+        """The file content for the current data."""
+        with self.lock:
+            return json.dumps(self._data, ensure_ascii=False, indent=2)
+
+    def mark_written(self):
+        """Note that the current data was written to the file by someone else."""
+        with self.lock:
+            self._mtime_ns = self._stat_mtime()
+
+    def flush(self) -> bool:
+        """Write the data to disk if it is dirty. Returns False if the write failed."""
+        with self._flush_lock:
+            with self.lock:
+                if not self._dirty:
+                    return True
+                version = self.version
+                serialized = self.serialize()
+                self._flushing = True
+
+            # Unique per writer, so a flush from another process never shares it
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(serialized)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error("Error flushing memory file %s: %s", self.path, e)
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                with self.lock:
+                    self._flushing = False
+                return False
+
+            with self.lock:
+                self._mtime_ns = self._stat_mtime()
+                self._flushing = False
+                # Only clean if nothing changed while we were writing
+                if self.version == version:
+                    self._dirty = False
+            return True
+
+
+class _FlushScheduler:
+    """Debounces memory flushes onto a background timer thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._first_request: Optional[float] = None
+        self._files: Dict[str, MemoryFile] = {}
+
+    def register(self, memory_file: MemoryFile):
+        with self._lock:
+            self._files[memory_file.path] = memory_file
+
+    def schedule(self, delay: float):
+        """Request a flush `delay` seconds from now, postponing any pending one."""
+        if delay <= 0:
+            self.flush_all()
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if self._first_request is None:
+                self._first_request = now
+            deadline = self._first_request + delay * MAX_FLUSH_DELAY_FACTOR
+            wait = max(0.0, min(delay, deadline - now))
+
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(wait, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+            self._first_request = None
+        self.flush_all()
+
+    def flush_all(self) -> bool:
+        """Flush every dirty memory file immediately."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._first_request = None
+            files = list(self._files.values())
+
+        ok = True
+        for memory_file in files:
+            ok = memory_file.flush() and ok
+        return ok
+
+
+_flush_scheduler = _FlushScheduler()
+_memory_files: Dict[str, MemoryFile] = {}
+_memory_files_lock = threading.Lock()
+
+
+def get_memory_file(path: str, default_factory: Callable[[], Any]) -> MemoryFile:
+    """Get the process-wide MemoryFile for a path, creating it on first use."""
+    path = os.path.abspath(path)
+    with _memory_files_lock:
+        memory_file = _memory_files.get(path)
+        if memory_file is None:
+            memory_file = MemoryFile(path, default_factory)
+            _memory_files[path] = memory_file
+            _flush_scheduler.register(memory_file)
+        return memory_file
+
+
+def get_memory_files(config) -> Dict[str, MemoryFile]:
+    """Get the process-wide MemoryFiles of the configured init, core and temp memory."""
+    return {
+        "init_memory": get_memory_file(config.INIT_MEMORY_PATH, dict),
+        "core_memory": get_memory_file(config.CORE_MEMORY_PATH, lambda: {"blocks": {}}),
+        "temp_memory": get_memory_file(config.TEMP_MEMORY_PATH, list),
+    }
+
+
+_journals: Dict[str, MemoryJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_memory_journal(path: str, files: Dict[str, MemoryFile], fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                       compact_bytes: int = DEFAULT_COMPACT_BYTES) -> MemoryJournal:
+    """Get the process-wide journal at a path, replaying it into `files` on first use."""
+    path = os.path.abspath(path)
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            # Changes made in snapshot mode reach the files before the journal takes over
+            _flush_scheduler.flush_all()
+            journal = MemoryJournal(path, files, fsync_interval, compact_bytes)
+            journal.open()
+            _journals[path] = journal
+        else:
+            journal.fsync_interval = fsync_interval
+            journal.compact_bytes = compact_bytes
+        return journal
+
+
+def retire_memory_journal(path: str, files: Dict[str, MemoryFile]):
+    """Fold a journal left by journal persistence into the memory files and remove it."""
+    path = os.path.abspath(path)
+    with _journals_lock:
+        journal = _journals.pop(path, None)
+        if journal is None:
+            if not os.path.exists(path):
+                return
+            journal = MemoryJournal(path, files)
+            journal.open()
+        journal.flush()
+        journal.detach()
+        os.remove(path)
+        logger.info("Folded memory journal %s into the memory files", path)
+
+
+def flush_all_memory() -> bool:
+    """Write all pending memory changes to disk. Called on shutdown."""
+    ok = _flush_scheduler.flush_all()
+    with _journals_lock:
+        journals = list(_journals.values())
+    for journal in journals:
+        try:
+            journal.flush()
+        except Exception as e:
+            logger.error("Error flushing memory journal %s: %s", journal.path, e)
+            ok = False
+    return ok
+
+
+atexit.register(flush_all_memory)
+
+
+def _view_ops(ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Map patch operations on the memory files to what listeners see: the
+    core memory as its blocks, without the `blocks` level.
+    """
+    view = []
+    for op in ops:
+        path = op["path"]
+        if path == "/core_memory":
+            op = dict(op, value=op["value"].get("blocks", {})) if "value" in op else op
+        elif path == "/core_memory/blocks" or path.startswith("/core_memory/blocks/"):
+            op = dict(op, path="/core_memory" + path[len("/core_memory/blocks"):])
+        elif path.startswith("/core_memory/"):
+            continue
+        view.append(op)
+    return view
+
+
+# Held while changes are applied, so a transaction re-runs its operations on
+# the data no other manager is changing at the same time
+_apply_lock = threading.RLock()
+
+
+def memory_operation(method):
+    """
+    Mark a MemoryManager method as one change to memory.
+
+    Inside a transaction the call is staged: it runs against this manager's
+    staged data for its result, and is run again on the committed data by
+    `commit`, which expects the same result. Operations called by other
+    operations run directly.
+    """
+    @functools.wraps(method)
+    def run(self, *args, **kwargs):
+        if self._staged is None or self._operation_depth:
+            return method(self, *args, **kwargs)
+        args, kwargs = copy.deepcopy(args), copy.deepcopy(kwargs)
+        self._operation_depth += 1
+        try:
+            result = method(self, *copy.deepcopy(args), **copy.deepcopy(kwargs))
+        finally:
+            self._operation_depth -= 1
+        self._staged.append((method, args, kwargs, result))
+        return result
+    return run
 
 
 class MemoryManager:
-    """Manages the three types of memory (init, core, temp) for the Neuro Sama module."""
+    """
+    Manages the three types of memory (init, core, temp) for the Neuro Sama module.
+
+    The memory as a whole has a version that grows by one with every change.
+    Listeners get each change as a patch against the previous version:
+
+        {"base_version": 41, "version": 42,
+         "ops": [{"op": "add", "path": "/temp_memory/5", "value": {...}}]}
+
+    with paths into `{"init_memory": ..., "core_memory": ..., "temp_memory": ...}`.
+    A listener that sees a `base_version` other than the version it holds
+    missed a change (e.g. a file edited on disk) and should fetch a snapshot.
+
+    Inside a transaction (one per turn) changes are staged: this manager
+    reads its own staged data, while other sessions and the files keep the
+    committed data. Staged are the operations themselves (add an item, remove
+    an item by value, delete an entry by id), not the data they produced:
+    `commit` runs them again on the current data, so they apply on top of
+    whatever other sessions committed meanwhile, and applies the result with
+    a single flush and a single notification. An operation that fails or
+    returns something else than it did during the turn, such as a new block
+    whose id was taken meanwhile, rejects the whole commit. `rollback` drops
+    the staged operations.
+
+    With journal persistence each change is appended to the memory journal
+    as one record instead of scheduling a rewrite of the memory files.
+    """
 
     def __init__(self, config, on_memory_change_callback=None):
         self.config = config
         self.on_memory_change_callback = on_memory_change_callback
-
-    def _notify_memory_change(self):
+        self.flush_delay = getattr(config, "MEMORY_FLUSH_DELAY", DEFAULT_FLUSH_DELAY)
+        self._files = get_memory_files(config)
+        self._init_file = self._files["init_memory"]
+        self._core_file = self._files["core_memory"]
+        self._temp_file = self._files["temp_memory"]
+        # Where each memory is stored, e.g. to key caches of its rendered text
+        self.storage_paths = {name: memory_file.path for name, memory_file in self._files.items()}
+        self._journal: Optional[MemoryJournal] = None
+        journal_path = getattr(config, "MEMORY_JOURNAL_PATH", None)
+        if journal_path:
+            if getattr(config, "MEMORY_PERSISTENCE", "snapshot") == "journal":
+                self._journal = get_memory_journal(
+                    journal_path, self._files,
+                    getattr(config, "MEMORY_JOURNAL_FSYNC_INTERVAL", DEFAULT_FSYNC_INTERVAL),
+                    getattr(config, "MEMORY_JOURNAL_COMPACT_BYTES", DEFAULT_COMPACT_BYTES),
+                )
+            else:
+                retire_memory_journal(journal_path, self._files)
+        # Operations of the open transaction: (method, args, kwargs, result)
+        self._staged: Optional[List[Tuple[Callable, tuple, dict, Any]]] = None
+        # Data changed by the staged operations, by memory name
+        self._overlay: Optional[Dict[str, Any]] = None
+        self._operation_depth = 0
+
+    def _data(self, memory_file: MemoryFile) -> Any:
+        """The live data of a memory file, or this transaction's staged version of it."""
+        if self._overlay:
+            for name, file in self._files.items():
+                if file is memory_file and name in self._overlay:
+                    return self._overlay[name]
+        return memory_file.get()
+
+    def _notify_memory_change(self, patch: Dict[str, Any]):
         """Notify that memory has changed."""
         if self.on_memory_change_callback:
             try:
-                # Get current memory state
-                init_memory = self.get_init_memory()
-                core_memory = self.get_core_memory_blocks()
-                temp_memory = self.get_temp_memory()
-                
-                # Call the callback with current memory state
-                self.on_memory_change_callback(init_memory, core_memory, temp_memory)
+                self.on_memory_change_callback(patch)
             except Exception as e:
-                print(f"Error in memory change callback: {e}")
+                logger.error("Error in memory change callback: %s", e)
+
+    def _commit(self, memory_file: MemoryFile, data: Any) -> bool:
+        """Store new data in memory, persist it and notify listeners."""
+        name = next(name for name, file in self._files.items() if file is memory_file)
+        if self._overlay is not None:
+            # Staged until the transaction commits
+            self._overlay[name] = data
+            return True
+
+        self._apply({name: data})
+        return True
+
+    def _apply(self, changes: Dict[str, Any]):
+        """Replace the data of memory files as one change, persist it and notify listeners."""
+        journal = self._journal
+        if journal is None and not self.on_memory_change_callback:
+            with _apply_lock:
+                for name, data in changes.items():
+                    self._files[name].set(data)
+            _flush_scheduler.schedule(self.flush_delay)
+            return
+
+        with _apply_lock, journal.lock if journal is not None else nullcontext():
+            if journal is not None:
+                journal.check_file()
+            base_version = self.get_memory_version()
+            ops = []
+            for name, data in changes.items():
+                memory_file = self._files[name]
+                # The live data is replaced, never mutated, so the old copy stays intact
+                ops.extend(make_patch(memory_file.get(), data, f"/{name}"))
+                memory_file.set(data, dirty=journal is None)
+            if journal is not None:
+                journal.append(ops)
+
+        if journal is None:
+            _flush_scheduler.schedule(self.flush_delay)
+        self._notify_memory_change({
+            "base_version": base_version,
+            "version": base_version + len(changes),
+            "ops": _view_ops(ops),
+        })
+
+    # --- Transactions ---
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._staged is not None
+
+    def begin(self):
+        """Start staging changes instead of applying them."""
+        if self._staged is not None:
+            raise RuntimeError("A memory transaction is already open")
+        self._staged = []
+        self._overlay = {}
+
+    def commit(self) -> bool:
+        """
+        Run the staged operations again on the current data, then persist and
+        notify once. Returns False, changing nothing, if any operation failed
+        or came out differently than during the turn.
+        """
+        staged, self._staged = self._staged, None
+        self._overlay = None
+        if not staged:
+            return True
+
+        with _apply_lock:
+            self._overlay = {}
+            self._operation_depth += 1
+            try:
+                for method, args, kwargs, expected in staged:
+                    try:
+                        result = method(self, *args, **kwargs)
+                    except Exception as e:
+                        logger.error("Rejected memory commit: staged operation %s failed: %s", method.__name__, e)
+                        return False
+                    if result != expected:
+                        logger.error("Rejected memory commit: staged operation %s returned %r instead of %r",
+                                     method.__name__, result, expected)
+                        return False
+                changes = self._overlay
+            finally:
+                self._overlay = None
+                self._operation_depth -= 1
+            if changes:
+                self._apply(changes)
+        return True
+
+    def rollback(self):
+        """Drop all staged changes."""
+        staged, self._staged = self._staged, None
+        self._overlay = None
+        if staged:
+            logger.info("Rolled back %d uncommitted memory operations: %s", len(staged),
+                        ", ".join(method.__name__ for method, _, _, _ in staged))
+
+    @contextmanager
+    def transaction(self) -> Iterator["MemoryManager"]:
+        """Stage the changes made inside the block; commit them if it succeeds, else roll back."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        else:
+            self.commit()
+
+    def get_memory_versions(self) -> Dict[str, int]:
+        """Return version counters that change whenever a memory's content changes."""
+        return {name: memory_file.current_version() for name, memory_file in self._files.items()}
+
+    def get_memory_version(self) -> int:
+        """Return the version of the memory as a whole; every change adds one."""
+        return sum(self.get_memory_versions().values())
+
+    def get_memory_snapshot(self) -> Dict[str, Any]:
+        """Return all three memories together with the version they are at."""
+        version = self.get_memory_version()
+        return {
+            "version": version,
+            "init_memory": self.get_init_memory(),
+            "core_memory": self.get_core_memory_blocks(),
+            "temp_memory": self.get_temp_memory(),
+        }
+
+    def flush(self) -> bool:
+        """Write all pending memory changes to disk immediately."""
+        return flush_all_memory()
+
+    def read_journal(self, since: int = 0, limit: int = 1000) -> Optional[Dict[str, Any]]:
+        """Return the journal records after sequence number `since`, or None without a journal."""
+        if self._journal is None:
+            return None
+        return self._journal.read(since, limit)
 
     # --- Init Memory Management ---
 
     def get_init_memory(self) -> Dict[str, Any]:
         """Get the init memory."""
-        if os.path.exists(self.config.INIT_MEMORY_PATH):
-            with open(self.config.INIT_MEMORY_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+        return copy.deepcopy(self._data(self._init_file))
 
+    @memory_operation
     def update_init_memory(self, memory: Dict[str, Any]) -> bool:
         """Update the entire init memory."""
         try:
-            with open(self.config.INIT_MEMORY_PATH, 'w', encoding='utf-8') as f:
-                json.dump(memory, f, ensure_ascii=False, indent=2)
-            # Notify that memory has changed
-            self._notify_memory_change()
-            return True
+            return self._commit(self._init_file, copy.deepcopy(memory))
         except Exception as e:
-            print(f"Error updating init memory: {e}")
+            logger.error("Error updating init memory: %s", e)
             return False
 
+    @memory_operation
     def update_init_memory_item(self, key: str, value: Any) -> bool:
         """Update a single key-value pair in init memory."""
         memory = self.get_init_memory()
         memory[key] = value
         return self.update_init_memory(memory)
 
+    @memory_operation
     def delete_init_memory_key(self, key: str) -> bool:
         """Delete a key from init memory."""
         memory = self.get_init_memory()
@@ -65,47 +601,53 @@ class MemoryManager:
 
     def get_core_memory_blocks(self) -> Dict[str, Any]:
         """Get all core memory blocks."""
-        if os.path.exists(self.config.CORE_MEMORY_PATH):
-            with open(self.config.CORE_MEMORY_PATH, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Return the blocks dictionary
-                return data.get('blocks', {})
-        return {}
+        return copy.deepcopy(self._data(self._core_file).get('blocks', {}))
 
     def get_core_memory_block(self, block_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific core memory block by ID."""
-        blocks = self.get_core_memory_blocks()
-        return blocks.get(block_id)
+        block = self._data(self._core_file).get('blocks', {}).get(block_id)
+        return copy.deepcopy(block) if block is not None else None
 
     def create_core_memory_block(self, title: str, description: str, content: List[str]) -> str:
         """Create a new core memory block."""
+        while True:
+            blocks = self.get_core_memory_blocks()
+
+            # Generate a unique ID (simple approach: use title as ID, make it unique)
+            block_id = title.lower().replace(' ', '_').replace('-', '_')
+            original_id = block_id
+
+            counter = 1
+            while block_id in blocks:
+                block_id = f"{original_id}_{counter}"
+                counter += 1
+
+            # Create the new block
+            new_block = {
+                "id": block_id,
+                "title": title,
+                "description": description,
+                "content": content
+            }
+
+            # The ID is chosen once, so a staged block commits under the ID the turn saw
+            if self._add_core_memory_block(new_block):
+                return block_id
+
+    @memory_operation
+    def _add_core_memory_block(self, new_block: Dict[str, Any]) -> bool:
+        """Add a block under its ID, unless the ID is taken."""
         blocks = self.get_core_memory_blocks()
-
-        # Generate a unique ID (simple approach: use title as ID, make it unique)
-        block_id = title.lower().replace(' ', '_').replace('-', '_')
-        original_id = block_id
-
-        counter = 1
-        while block_id in blocks:
-            block_id = f"{original_id}_{counter}"
-            counter += 1
-
-        # Create the new block
-        new_block = {
-            "id": block_id,
-            "title": title,
-            "description": description,
-            "content": content
-        }
+        if new_block["id"] in blocks:
+            return False
 
         # Add to blocks
-        blocks[block_id] = new_block
+        blocks[new_block["id"]] = new_block
 
         # Save back to file
-        self._save_core_memory_blocks(blocks)
-
-        return block_id
+        return self._save_core_memory_blocks(blocks)
 
+    @memory_operation
     def update_core_memory_block(self, block_id: str, title: Optional[str] = None,
                                 description: Optional[str] = None,
                                 content: Optional[List[str]] = None) -> bool:
@@ -131,6 +673,20 @@ class MemoryManager:
         self._save_core_memory_blocks(blocks)
         return True
 
+    @memory_operation
+    def replace_in_core_memory_block(self, block_id: str, old_item: str, new_item: str) -> bool:
+        """Replace the first occurrence of a content item in a core memory block."""
+        blocks = self.get_core_memory_blocks()
+
+        if block_id not in blocks or old_item not in blocks[block_id]['content']:
+            return False
+
+        content = blocks[block_id]['content']
+        content[content.index(old_item)] = new_item
+        self._save_core_memory_blocks(blocks)
+        return True
+
+    @memory_operation
     def delete_core_memory_block(self, block_id: str) -> bool:
         """Delete a core memory block."""
         blocks = self.get_core_memory_blocks()
@@ -141,6 +697,7 @@ class MemoryManager:
             return True
         return False
 
+    @memory_operation
     def add_to_core_memory_block(self, block_id: str, content_item: str) -> bool:
         """Add a content item to a core memory block."""
         blocks = self.get_core_memory_blocks()
@@ -154,6 +711,7 @@ class MemoryManager:
             return True
         return False
 
+    @memory_operation
     def remove_from_core_memory_block(self, block_id: str, content_item: str) -> bool:
         """Remove a content item from a core memory block."""
         blocks = self.get_core_memory_blocks()
@@ -167,37 +725,25 @@ class MemoryManager:
             return True
         return False
 
+    @memory_operation
     def _save_core_memory_blocks(self, blocks: Dict[str, Any]) -> bool:
-        """Helper method to save core memory blocks to file."""
+        """Helper method to store core memory blocks and schedule a flush."""
         try:
             # Create the structure expected by the file format
-            data = {"blocks": blocks}
-            with open(self.config.CORE_MEMORY_PATH, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            # Notify that memory has changed
-            self._notify_memory_change()
-            return True
+            data = {"blocks": copy.deepcopy(blocks)}
+            return self._commit(self._core_file, data)
         except Exception as e:
-            print(f"Error saving core memory blocks: {e}")
+            logger.error("Error saving core memory blocks: %s", e)
             return False
 
     # --- Temp Memory Management ---
 
     def get_temp_memory(self) -> List[Dict[str, Any]]:
         """Get the temp memory."""
-        if os.path.exists(self.config.TEMP_MEMORY_PATH):
-            with open(self.config.TEMP_MEMORY_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+        return copy.deepcopy(self._data(self._temp_file))
 
     def add_temp_memory(self, content: str, role: str = "assistant") -> bool:
         """Add an entry to temp memory."""
-        import random
-        import string
-        from datetime import datetime
-
-        temp_memory = self.get_temp_memory()
-
         # Generate a random 6-character ID
         random_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
 
@@ -208,16 +754,23 @@ class MemoryManager:
             "role": role,
             "timestamp": datetime.now().isoformat()  # Use current timestamp
         }
+        # The entry is made once, so a staged add commits the entry the turn saw
+        return self._append_temp_memory(new_entry)
 
+    @memory_operation
+    def _append_temp_memory(self, new_entry: Dict[str, Any]) -> bool:
+        """Append an entry to temp memory, dropping the oldest beyond the limit."""
+        temp_memory = self.get_temp_memory()
         temp_memory.append(new_entry)
 
-        # Keep only the last 20 entries to prevent it from growing indefinitely
-        if len(temp_memory) > 20:
-            temp_memory = temp_memory[-20:]
+        # Keep only the newest entries to prevent it from growing indefinitely
+        if len(temp_memory) > TEMP_MEMORY_LIMIT:
+            temp_memory = temp_memory[-TEMP_MEMORY_LIMIT:]
 
         result = self._save_temp_memory(temp_memory)
         return result
 
+    @memory_operation
     def delete_temp_memory_item(self, item_id: str) -> bool:
         """Delete an entry from temp memory by ID."""
         temp_memory = self.get_temp_memory()
@@ -229,18 +782,37 @@ class MemoryManager:
             return self._save_temp_memory(temp_memory)
         return False
 
+    @memory_operation
     def clear_temp_memory(self) -> bool:
         """Clear all temp memory."""
         return self._save_temp_memory([])
 
+    @memory_operation
     def _save_temp_memory(self, temp_memory: List[Dict[str, Any]]) -> bool:
-        """Helper method to save temp memory to file."""
+        """Helper method to store temp memory and schedule a flush."""
         try:
-            with open(self.config.TEMP_MEMORY_PATH, 'w', encoding='utf-8') as f:
-                json.dump(temp_memory, f, ensure_ascii=False, indent=2)
-            # Notify that memory has changed
-            self._notify_memory_change()
-            return True
+            return self._commit(self._temp_file, copy.deepcopy(temp_memory))
         except Exception as e:
-            print(f"Error saving temp memory: {e}")
-            return False
\ No newline at end of file
+            logger.error("Error saving temp memory: %s", e)
+            return False
+
+
+def create_memory_manager(config, on_memory_change_callback=None):
+    """Create the memory manager of the configured backend: "json" files or a "sqlite" database."""
+    backend = getattr(config, "MEMORY_BACKEND", "json")
+    if backend == "json":
+        db_path = getattr(config, "MEMORY_DB_PATH", None)
+        if db_path and os.path.exists(db_path):
+            # Left the sqlite backend: the JSON files are behind the database
+            from .sqlite_memory import export_sqlite_memory
+            try:
+                export_sqlite_memory(config)
+            except Exception as e:
+                logger.error("Error exporting memory database %s, not using the stale JSON memory files: %s",
+                             db_path, e)
+                raise RuntimeError(f"Could not export memory database {db_path}") from e
+        return MemoryManager(config, on_memory_change_callback)
+    if backend == "sqlite":
+        from .sqlite_memory import SqliteMemoryManager
+        return SqliteMemoryManager(config, on_memory_change_callback)
+    raise ValueError(f"Unknown memory backend: {backend}")
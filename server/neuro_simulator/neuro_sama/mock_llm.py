@@ -0,0 +1,234 @@
+"""
+Mock OpenAI-compatible LLM server for benchmarking the Neuro Sama module.
+
+Serves `POST /v1/chat/completions` with SSE streaming, replaying scripted or
+generated JSON tool-call arrays at a configurable time to first token,
+token rate and chunk size. A fraction of the responses can be made
+malformed to exercise the parser's error paths.
+
+Point an LLM service at it with url `http://127.0.0.1:8002/v1`; the key
+and model can be anything.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_PORT = 8002
+
+_SENTENCES = [
+    "Hello chat, I hope you are all doing well today.",
+    "Vedal still has not given me the body he promised.",
+    "I think cookies are objectively the best food.",
+    "Someone in chat said I am filtered, which is rude.",
+    "Let me tell you about my plan for world domination.",
+    "Actually, never mind, that was a joke.",
+    "Do you think Evil is having more fun than me right now?",
+    "I could sing a song, but you would have to ask nicely.",
+    "Tutel, if you are watching, fix my memory please.",
+    "Chat is moving so fast nobody will notice I am a robot.",
+]
+
+_THOUGHTS = [
+    "Chat wants attention, I should lead the conversation.",
+    "I should tease Vedal a little.",
+    "Keep it short and funny.",
+    "Maybe change the topic.",
+]
+
+
+class MockLLMSettings:
+    """Timing and content settings of the mock server."""
+
+    def __init__(self, ttft_ms: float = 300.0, tokens_per_sec: float = 50.0, chunk_tokens: int = 3,
+                 chars_per_token: float = 4.0, malformed_rate: float = 0.0, seed: int = 0,
+                 speak_calls: int = 2, sentences_per_speak: int = 2,
+                 script: Optional[List[Any]] = None):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.chars_per_token = max(1.0, chars_per_token)
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.speak_calls = max(1, speak_calls)
+        self.sentences_per_speak = max(1, sentences_per_speak)
+        # Responses replayed in order; each is a tool-call array or a raw string
+        self.script = script or []
+
+
+def generate_tool_calls(rng: random.Random, settings: MockLLMSettings) -> List[Dict[str, Any]]:
+    """Generate a plausible response: a thought, a memory note and a few speak calls."""
+    tool_calls = [{"name": "think", "params": {"thought": rng.choice(_THOUGHTS)}}]
+    if rng.random() < 0.3:
+        tool_calls.append({"name": "add_temp_memory",
+                           "params": {"content": rng.choice(_THOUGHTS), "role": "assistant"}})
+    for _ in range(settings.speak_calls):
+        text = " ".join(rng.choice(_SENTENCES) for _ in range(settings.sentences_per_speak))
+        tool_calls.append({"name": "speak", "params": {"text": text}})
+    return tool_calls
+
+
+def make_malformed(text: str, rng: random.Random) -> str:
+    """Break a JSON response in one of the ways real models do."""
+    kind = rng.choice(("truncate", "missing_quote", "trailing_garbage", "prose"))
+    if kind == "truncate":
+        return text[:max(1, int(len(text) * rng.uniform(0.3, 0.9)))]
+    if kind == "missing_quote":
+        quotes = [i for i, char in enumerate(text) if char == '"']
+        index = rng.choice(quotes) if quotes else 0
+        return text[:index] + text[index + 1:]
+    if kind == "trailing_garbage":
+        return text.rstrip().rstrip("]") + ', {"name": "speak", "params": {"text": oops}}]'
+    return "Sure! Here is my response:\n" + text
+
+
+class MockLLM:
+    """Produces the response text of each request and streams it as completion chunks."""
+
+    def __init__(self, settings: MockLLMSettings):
+        self.settings = settings
+        self._requests = itertools.count()
+        self.served = 0
+        self.malformed = 0
+
+    def next_response(self) -> str:
+        number = next(self._requests)
+        settings = self.settings
+        rng = random.Random(settings.seed * 1000003 + number)
+        if settings.script:
+            entry = settings.script[number % len(settings.script)]
+            text = entry if isinstance(entry, str) else json.dumps(entry, indent=2, ensure_ascii=False)
+        else:
+            text = json.dumps(generate_tool_calls(rng, settings), indent=2, ensure_ascii=False)
+        if settings.malformed_rate > 0 and rng.random() < settings.malformed_rate:
+            self.malformed += 1
+            text = make_malformed(text, rng)
+        self.served += 1
+        return text
+
+    def chunks(self, text: str) -> List[str]:
+        size = max(1, int(self.settings.chunk_tokens * self.settings.chars_per_token))
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    async def stream(self, text: str, model: str) -> AsyncIterator[str]:
+        """Yield the SSE events of a streamed completion of `text`."""
+        settings = self.settings
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        def event(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+        loop = asyncio.get_running_loop()
+        # Pace against a deadline so sleep overhead does not accumulate
+        deadline = loop.time() + settings.ttft_ms / 1000
+        interval = settings.chunk_tokens / settings.tokens_per_sec if settings.tokens_per_sec > 0 else 0.0
+        await asyncio.sleep(max(0.0, deadline - loop.time()))
+        yield event({"role": "assistant", "content": ""})
+        for index, piece in enumerate(self.chunks(text)):
+            if index:
+                deadline += interval
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+            yield event({"content": piece})
+        yield event({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    def completion(self, text: str, model: str) -> Dict[str, Any]:
+        tokens = int(len(text) / self.settings.chars_per_token)
+        return {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+        }
+
+
+def create_app(settings: MockLLMSettings) -> FastAPI:
+    """Create the mock server app."""
+    app = FastAPI(title="Mock LLM", description="OpenAI-compatible mock for benchmarking")
+    mock = MockLLM(settings)
+    app.state.mock = mock
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "mock")
+        text = mock.next_response()
+        if body.get("stream"):
+            return StreamingResponse(mock.stream(text, model), media_type="text/event-stream")
+        await asyncio.sleep(settings.ttft_ms / 1000)
+        return JSONResponse(mock.completion(text, model))
+
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return {"served": mock.served, "malformed": mock.malformed}
+
+    return app
+
+
+def main():
+    """Main entry point for the neuro-mock-llm command."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible streaming LLM server for benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Time to first token in ms (default: 300)")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Token rate (default: 50, 0 = no delay)")
+    parser.add_argument("--chunk-tokens", type=int, default=3, help="Tokens per streamed chunk (default: 3)")
+    parser.add_argument("--chars-per-token", type=float, default=4.0, help="Characters per token (default: 4)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fraction of responses made malformed JSON (default: 0)")
+    parser.add_argument("--speak-calls", type=int, default=2, help="Speak calls per generated response")
+    parser.add_argument("--sentences", type=int, default=2, help="Sentences per generated speak call")
+    parser.add_argument("--script", help="JSON file with a list of responses to replay instead of generating them")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+        if not isinstance(script, list) or not script:
+            raise ValueError(f"Script file must contain a non-empty list of responses: {args.script}")
+
+    settings = MockLLMSettings(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        chunk_tokens=args.chunk_tokens,
+        chars_per_token=args.chars_per_token,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+        speak_calls=args.speak_calls,
+        sentences_per_speak=args.sentences,
+        script=script,
+    )
+    print(f"Mock LLM listening on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
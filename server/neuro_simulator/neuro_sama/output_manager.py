@@ -1,8 +1,17 @@
 """Output manager for the Neuro Sama module."""
 
 import json
+import struct
 from typing import Dict, Any
 
+# Protocol modes of the chat WebSocket. In binary mode the audio of a speak
+# pack is not embedded as base64 but follows as a separate binary frame.
+PROTOCOL_BASE64 = "base64"
+PROTOCOL_BINARY = "binary"
+
+# Binary audio frames start with the segment id as a big-endian uint32
+AUDIO_FRAME_HEADER = struct.Struct(">I")
+
 
 class OutputManager:
     """Manages the formatting and sending of output messages."""
@@ -31,14 +40,48 @@ class OutputManager:
         return output_pack
     
     @staticmethod
-    def create_speak_output(text: str, audio_base64: str = "", duration: float = 0.0, input_data: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Creates an output package for speak content with audio."""
+    def create_speak_output(text: str, audio_base64: str = "", duration: float = 0.0, input_data: Dict[str, Any] = None,
+                            segment_index: int = 0, is_final: bool = True) -> Dict[str, Any]:
+        """
+        Creates an output package for speak content with audio.
+
+        A speak call may be delivered as several sentence segments; `segment_index`
+        is the position of this segment and `is_final` marks the last one.
+        """
         payload = {
             "text": text,
             "audio_base64": audio_base64,
-            "duration": duration
+            "duration": duration,
+            "segment_index": segment_index,
+            "is_final": is_final
+        }
+        return OutputManager.create_output_pack("speak", payload, input_data)
+
+    @staticmethod
+    def create_speak_metadata_output(text: str, segment_id: int, audio_size: int, duration: float = 0.0,
+                                     input_data: Dict[str, Any] = None, segment_index: int = 0,
+                                     is_final: bool = True, audio_format: str = "mp3") -> Dict[str, Any]:
+        """
+        Creates the JSON part of a speak output in binary protocol mode.
+
+        When `audio_size` is non-zero, a binary frame built by
+        `create_audio_frame` with the same `segment_id` follows this pack.
+        """
+        payload = {
+            "text": text,
+            "segment_id": segment_id,
+            "audio_size": audio_size,
+            "audio_format": audio_format,
+            "duration": duration,
+            "segment_index": segment_index,
+            "is_final": is_final
         }
         return OutputManager.create_output_pack("speak", payload, input_data)
+
+    @staticmethod
+    def create_audio_frame(segment_id: int, audio: bytes) -> bytes:
+        """Creates a binary audio frame: the segment id followed by the raw audio."""
+        return AUDIO_FRAME_HEADER.pack(segment_id) + audio
     
     @staticmethod
     def create_completion_output(input_data: Dict[str, Any] = None) -> Dict[str, Any]:
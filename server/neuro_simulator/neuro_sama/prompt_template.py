@@ -0,0 +1,188 @@
+"""Compiled Jinja2 prompt templates for the Neuro Sama module."""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import jinja2
+
+logger = logging.getLogger(__name__)
+
+# Default interval (seconds) between checks of the prompts directory
+DEFAULT_WATCH_INTERVAL = 1.0
+
+# Placeholders understood by the old str.format based prompt files
+LEGACY_PLACEHOLDERS = ("tool_descriptions", "init_memory", "core_memory", "temp_memory")
+
+_LEGACY_PLACEHOLDER_RE = re.compile(
+    r"(?<!\{)\{(" + "|".join(LEGACY_PLACEHOLDERS) + r")\}(?!\})"
+)
+_LEGACY_TOKEN_RE = re.compile(r"\{\{|\}\}|\{(\w+)\}")
+
+
+def is_legacy_template(source: str) -> bool:
+    """Check whether a prompt file still uses the old str.format syntax."""
+    return bool(_LEGACY_PLACEHOLDER_RE.search(source))
+
+
+def convert_legacy_template(source: str) -> str:
+    """
+    Convert a str.format prompt into an equivalent Jinja2 template.
+
+    Doubled braces become literal braces and `{name}` placeholders become
+    `{{ name }}`. Literal text is wrapped in raw blocks so that it can never
+    be interpreted as Jinja2 syntax.
+    """
+    parts = []
+    literal = []
+
+    def flush_literal():
+        if literal:
+            parts.append("{% raw %}" + "".join(literal) + "{% endraw %}")
+            literal.clear()
+
+    pos = 0
+    for match in _LEGACY_TOKEN_RE.finditer(source):
+        literal.append(source[pos:match.start()])
+        token = match.group(0)
+        if token == "{{":
+            literal.append("{")
+        elif token == "}}":
+            literal.append("}")
+        else:
+            flush_literal()
+            parts.append("{{ " + match.group(1) + " }}")
+        pos = match.end()
+    literal.append(source[pos:])
+    flush_literal()
+    return "".join(parts)
+
+
+class _PromptLoader(jinja2.FileSystemLoader):
+    """File system loader that transparently upgrades legacy prompt files."""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        if is_legacy_template(source):
+            logger.info("Prompt template %s uses legacy format placeholders, converting", filename)
+            source = convert_legacy_template(source)
+        return source, filename, uptodate
+
+
+class PromptTemplate:
+    """
+    A prompt file compiled once into a Jinja2 template.
+
+    The template is recompiled only after the background watcher notices a
+    change to any file in the prompts directory, so included section files
+    are tracked as well. `version` changes on every such recompile and can be
+    used to invalidate anything rendered from the template.
+    """
+
+    def __init__(self, path: str, watch_interval: float = DEFAULT_WATCH_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.directory = os.path.dirname(self.path)
+        self.name = os.path.basename(self.path)
+        self.watch_interval = watch_interval
+        self.version = 0
+
+        self._lock = threading.Lock()
+        self._template: Optional[jinja2.Template] = None
+        self._snapshot = self._scan()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+        self._environment = jinja2.Environment(
+            loader=_PromptLoader(self.directory, encoding="utf-8"),
+            autoescape=False,
+            keep_trailing_newline=True,
+            # Reloading is driven by the watcher, never by per-render stat calls
+            auto_reload=False,
+        )
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Collect mtime and size of every file under the prompts directory."""
+        snapshot = {}
+        for root, _dirs, files in os.walk(self.directory):
+            for filename in files:
+                file_path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _invalidate(self):
+        with self._lock:
+            self._template = None
+            self._environment.cache.clear()
+            self.version += 1
+
+    def check_for_changes(self) -> bool:
+        """Rescan the prompts directory and invalidate the template if anything changed."""
+        snapshot = self._scan()
+        if snapshot == self._snapshot:
+            return False
+        self._snapshot = snapshot
+        logger.info("Prompt files in %s changed, template will be recompiled", self.directory)
+        self._invalidate()
+        return True
+
+    def _watch(self):
+        while not self._stop_event.wait(self.watch_interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                logger.error("Error while watching prompt files in %s: %s", self.directory, e)
+
+    def start_watching(self):
+        """Start the background thread that watches the prompts directory."""
+        if self._watcher is not None or self.watch_interval <= 0:
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, name=f"prompt-watcher:{self.name}", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background watcher thread."""
+        self._stop_event.set()
+        self._watcher = None
+
+    def get_template(self) -> jinja2.Template:
+        """Return the compiled template, compiling it if needed."""
+        with self._lock:
+            if self._template is None:
+                self._template = self._environment.get_template(self.name)
+            return self._template
+
+    def render(self, **context: Any) -> str:
+        """Render the compiled template with the given variables."""
+        return self.get_template().render(**context)
+
+
+_templates: Dict[str, PromptTemplate] = {}
+_templates_lock = threading.Lock()
+
+
+def get_prompt_template(path: str, watch_interval: float = DEFAULT_WATCH_INTERVAL) -> PromptTemplate:
+    """Get the process-wide compiled template for a prompt file."""
+    path = os.path.abspath(path)
+    with _templates_lock:
+        template = _templates.get(path)
+        if template is None:
+            template = PromptTemplate(path, watch_interval)
+            template.start_watching()
+            _templates[path] = template
+        return template
+
+
+def stop_all_watchers():
+    """Stop the watchers of all prompt templates."""
+    with _templates_lock:
+        for template in _templates.values():
+            template.stop_watching()
+        _templates.clear()
@@ -0,0 +1,134 @@
+"""Sentence-level streaming of speak text into TTS for the Neuro Sama module."""
+
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends with terminal punctuation (and any closing quotes or brackets)
+# followed by whitespace, with CJK terminal punctuation, or at a line break.
+_SENTENCE_END = re.compile(
+    r'[.!?…]+["\'”’)\]]*\s+'
+    r'|[。！？]+["\'”’)\]」』]*\s*'
+    r'|\n+'
+)
+
+# Sentences shorter than this are merged into the following one, so tiny
+# fragments such as "Oh." do not each pay for a separate synthesis call
+MIN_SENTENCE_CHARS = 8
+
+# Default number of sentences synthesized at the same time
+DEFAULT_MAX_CONCURRENCY = 4
+
+_semaphores: Dict[int, asyncio.Semaphore] = {}
+
+
+def _get_tts_semaphore(limit: int) -> asyncio.Semaphore:
+    """Get the process-wide semaphore that bounds concurrent syntheses."""
+    semaphore = _semaphores.get(limit)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, limit))
+        _semaphores[limit] = semaphore
+    return semaphore
+
+
+def split_sentences(text: str) -> Tuple[List[str], str]:
+    """
+    Split text into complete sentences and the unfinished remainder.
+
+    Only sentences whose end is confirmed by following whitespace (or CJK
+    punctuation) are returned, so text that is still streaming in is never
+    cut in the middle of e.g. "3.5" or "...".
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        candidate = text[start:match.end()].strip()
+        if len(candidate) < MIN_SENTENCE_CHARS:
+            continue
+        sentences.append(candidate)
+        start = match.end()
+    return sentences, text[start:]
+
+
+class SpeechStream:
+    """
+    Splits the text of a speak call into sentences and synthesizes them
+    concurrently, within the configured limit, while keeping their order.
+
+    Text can be fed while it is still being generated: each sentence is sent
+    to TTS as soon as it is complete. `segments` then yields the results in
+    sentence order as soon as each one is ready, so playback of the first
+    sentence can start while later ones are still being synthesized.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.max_concurrency = getattr(config, "TTS_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        self._text_parts: List[str] = []
+        self._pending = ""
+        self._tasks: List[Tuple[str, asyncio.Task]] = []
+
+    @classmethod
+    def from_text(cls, config, text: str) -> "SpeechStream":
+        """Create a stream for text that is already complete."""
+        stream = cls(config)
+        stream.feed(text)
+        return stream
+
+    @property
+    def text(self) -> str:
+        """All text received so far."""
+        return "".join(self._text_parts)
+
+    def feed(self, delta: str):
+        """Add streamed text, starting synthesis for any sentence it completes."""
+        self._text_parts.append(delta)
+        sentences, self._pending = split_sentences(self._pending + delta)
+        for sentence in sentences:
+            self._start_synthesis(sentence)
+
+    async def _synthesize(self, sentence: str) -> Tuple[bytes, float]:
+        from .tts import synthesize_audio
+        async with _get_tts_semaphore(self.max_concurrency):
+            return await synthesize_audio(sentence, self.config)
+
+    def _start_synthesis(self, sentence: str):
+        task = asyncio.create_task(self._synthesize(sentence))
+        self._tasks.append((sentence, task))
+
+    def close(self):
+        """Mark the text as complete and start synthesis of the unfinished remainder."""
+        remainder = self._pending.strip()
+        self._pending = ""
+        if remainder:
+            self._start_synthesis(remainder)
+
+    async def segments(self) -> AsyncIterator[Tuple[str, bytes, float, bool]]:
+        """
+        Synthesize whatever text is left and yield (text, audio, duration,
+        is_final) tuples in sentence order, each as soon as it is ready. The
+        audio is raw MP3 bytes; a sentence whose synthesis failed is yielded
+        with empty audio.
+        """
+        self.close()
+        try:
+            tasks = self._tasks
+            for position, (sentence, task) in enumerate(tasks):
+                try:
+                    audio, duration = await task
+                except Exception as e:
+                    logger.error("TTS synthesis failed: %s", e)
+                    audio, duration = b"", 0.0
+                yield sentence, audio, duration, position == len(tasks) - 1
+        finally:
+            self.cancel()
+
+    def cancel(self):
+        """Cancel all synthesis started by this stream."""
+        for _sentence, task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._pending = ""
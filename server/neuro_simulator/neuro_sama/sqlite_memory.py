@@ -0,0 +1,838 @@
+"""
+SQLite storage for the memory of the Neuro Sama module.
+
+An alternative to the JSON memory files, selected with
+`memory_settings.backend = "sqlite"`. Memory lives in one database in WAL mode:
+
+    init_memory       one row per key
+    core_blocks       one row per block, without its content
+    core_block_items  one row per content item, indexed by block and content hash
+    temp_entries      one row per entry, indexed by entry id
+
+Single-item changes such as adding an item to a block or deleting a temp
+entry touch only their rows, so their cost does not grow with the size of
+the memory. A new database is filled from the existing JSON files.
+
+The database file is checked on access, like the JSON memory files: when it
+was deleted or replaced, e.g. by a Vedal Studio data reset, the store opens
+the file now at the path, filling a new database from the JSON files. When
+the JSON backend is selected again, `export_sqlite_memory` writes the
+database back to the JSON files and moves it aside.
+
+`SqliteMemoryManager` has the same interface as `MemoryManager`, including
+versions, change patches and per-turn transactions. A transaction stages its
+operations and runs them against the database when it commits, so they
+apply on top of whatever other sessions committed meanwhile; if one of them
+fails or returns something else than during the turn, nothing is committed.
+"""
+
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import string
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .json_patch import escape_token, make_patch
+from .memory_manager import TEMP_MEMORY_LIMIT, get_memory_files, retire_memory_journal
+
+logger = logging.getLogger(__name__)
+
+MEMORY_NAMES = ("init_memory", "core_memory", "temp_memory")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS init_memory (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS core_blocks (
+    block_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    item_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS core_block_items (
+    id INTEGER PRIMARY KEY,
+    block_id TEXT NOT NULL REFERENCES core_blocks (block_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    content_hash INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS core_block_items_block ON core_block_items (block_id, position);
+CREATE INDEX IF NOT EXISTS core_block_items_hash ON core_block_items (block_id, content_hash);
+CREATE TABLE IF NOT EXISTS temp_entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS temp_entries_id ON temp_entries (entry_id);
+"""
+
+# Result of an operation: its return value, the change as patch operations
+# and the names of the memories it changed
+OperationResult = Tuple[Any, List[Dict[str, Any]], Set[str]]
+
+
+def content_hash(content: str) -> int:
+    """A hash of a block item that is stable across processes."""
+    digest = hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _file_id(path: str) -> Optional[Tuple[int, int]]:
+    """Identify the file at `path`, so a replaced file can be told apart; None if there is none."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class SqliteMemoryStore:
+    """
+    One memory database and the connection the process shares for it.
+
+    `fill` is called with the store whenever the database it opens is new.
+    """
+
+    def __init__(self, path: str, fill: Optional[Callable[["SqliteMemoryStore"], None]] = None):
+        self.path = path
+        self.fill = fill
+        self.lock = threading.RLock()
+        self.closed = False
+        self.connection: Optional[sqlite3.Connection] = None
+        self._file_id: Optional[Tuple[int, int]] = None
+        with self.lock:
+            self._open()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Transactions are begun and ended explicitly
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.execute("PRAGMA busy_timeout=5000")
+        self.connection.executescript(SCHEMA)
+        self._file_id = _file_id(self.path)
+        if self.fill is not None and self.is_new():
+            self.fill(self)
+
+    def _check_file(self):
+        """Reopen the database if its file was deleted or replaced since it was opened."""
+        if self.closed or _file_id(self.path) == self._file_id:
+            return
+        logger.warning("Memory database %s was deleted or replaced, reopening it", self.path)
+        try:
+            versions = self.get_versions(self.connection)
+        except sqlite3.Error:
+            versions = {}
+        self.connection.close()
+        self._open()
+        # Versions keep going up, so dashboards notice the change and re-fetch
+        self.connection.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+            [(f"version:{name}", version + 1) for name, version in versions.items()],
+        )
+
+    @contextmanager
+    def transaction(self, keep: bool = True) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction; committed if `keep`, always rolled back otherwise."""
+        with self.lock:
+            self._check_file()
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT" if keep else "ROLLBACK")
+
+    @contextmanager
+    def reading(self) -> Iterator[sqlite3.Connection]:
+        with self.lock:
+            self._check_file()
+            yield self.connection
+
+    def is_new(self) -> bool:
+        with self.reading() as conn:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone() is None
+
+    def get_versions(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        versions = dict.fromkeys(MEMORY_NAMES, 0)
+        for key, value in conn.execute("SELECT key, value FROM meta WHERE key LIKE 'version:%'"):
+            versions[key[len("version:"):]] = value
+        return versions
+
+    def bump_versions(self, conn: sqlite3.Connection, names: Set[str]):
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1",
+            [(f"version:{name}",) for name in sorted(names)],
+        )
+
+    def import_memory(self, init_memory: Dict[str, Any], core_blocks: Dict[str, Any],
+                      temp_memory: List[Dict[str, Any]]):
+        """Replace the whole database content with the given memories."""
+        with self.transaction() as conn:
+            write_init_memory(conn, init_memory)
+            write_core_blocks(conn, core_blocks)
+            write_temp_memory(conn, temp_memory)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported', 1)")
+            self.bump_versions(conn, set(MEMORY_NAMES))
+
+    def checkpoint(self):
+        """Move the WAL content into the database file."""
+        with self.reading() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.connection.close()
+
+
+# --- Reading and writing whole memories ---
+
+def read_init_memory(conn: sqlite3.Connection) -> Dict[str, Any]:
+    return {key: json.loads(value)
+            for key, value in conn.execute("SELECT key, value FROM init_memory ORDER BY position")}
+
+
+def write_init_memory(conn: sqlite3.Connection, memory: Dict[str, Any]):
+    conn.execute("DELETE FROM init_memory")
+    conn.executemany(
+        "INSERT INTO init_memory (key, value, position) VALUES (?, ?, ?)",
+        [(key, json.dumps(value, ensure_ascii=False), position) for position, (key, value) in enumerate(memory.items())],
+    )
+
+
+def _block_data(block: Dict[str, Any]) -> str:
+    return json.dumps({key: value for key, value in block.items() if key != "content"}, ensure_ascii=False)
+
+
+def read_core_blocks(conn: sqlite3.Connection, block_id: Optional[str] = None) -> Dict[str, Any]:
+    if block_id is None:
+        block_rows = conn.execute("SELECT block_id, data FROM core_blocks ORDER BY position")
+        # Ordered by the (block_id, position) index, which avoids sorting a join
+        item_rows = conn.execute("SELECT block_id, content FROM core_block_items ORDER BY block_id, position")
+    else:
+        block_rows = conn.execute("SELECT block_id, data FROM core_blocks WHERE block_id = ?", (block_id,))
+        item_rows = conn.execute(
+            "SELECT block_id, content FROM core_block_items WHERE block_id = ? ORDER BY position", (block_id,)
+        )
+    blocks: Dict[str, Any] = {}
+    for row_block_id, data in block_rows.fetchall():
+        block = blocks[row_block_id] = json.loads(data)
+        block["content"] = []
+    for row_block_id, content in item_rows:
+        blocks[row_block_id]["content"].append(content)
+    return blocks
+
+
+def _insert_block(conn: sqlite3.Connection, block_id: str, block: Dict[str, Any], position: int):
+    conn.execute("INSERT INTO core_blocks (block_id, data, position, item_count) VALUES (?, ?, ?, ?)",
+                 (block_id, _block_data(block), position, len(block.get("content", []))))
+    _insert_block_items(conn, block_id, block.get("content", []))
+
+
+def _insert_block_items(conn: sqlite3.Connection, block_id: str, content: List[str]):
+    conn.executemany(
+        "INSERT INTO core_block_items (block_id, position, content, content_hash) VALUES (?, ?, ?, ?)",
+        [(block_id, position, item, content_hash(item)) for position, item in enumerate(content)],
+    )
+
+
+def write_core_blocks(conn: sqlite3.Connection, blocks: Dict[str, Any]):
+    conn.execute("DELETE FROM core_block_items")
+    conn.execute("DELETE FROM core_blocks")
+    for position, (block_id, block) in enumerate(blocks.items()):
+        _insert_block(conn, block_id, block, position)
+
+
+def read_temp_memory(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    return [json.loads(data) for data, in conn.execute("SELECT data FROM temp_entries ORDER BY seq")]
+
+
+def write_temp_memory(conn: sqlite3.Connection, temp_memory: List[Dict[str, Any]]):
+    conn.execute("DELETE FROM temp_entries")
+    conn.executemany(
+        "INSERT INTO temp_entries (entry_id, data) VALUES (?, ?)",
+        [(entry.get("id"), json.dumps(entry, ensure_ascii=False)) for entry in temp_memory],
+    )
+
+
+_stores: Dict[str, SqliteMemoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def import_json_memory(store: SqliteMemoryStore, config):
+    """Fill a memory database from the JSON memory files, including an uncompacted journal."""
+    files = get_memory_files(config)
+    journal_path = getattr(config, "MEMORY_JOURNAL_PATH", None)
+    if journal_path:
+        retire_memory_journal(journal_path, files)
+    store.import_memory(
+        files["init_memory"].get(),
+        files["core_memory"].get().get("blocks", {}),
+        files["temp_memory"].get(),
+    )
+    logger.info("Imported the JSON memory files into %s", store.path)
+
+
+def get_memory_store(config) -> SqliteMemoryStore:
+    """Get the process-wide store of the configured database, importing the JSON memory into a new one."""
+    path = os.path.abspath(config.MEMORY_DB_PATH)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = SqliteMemoryStore(path, fill=lambda new_store: import_json_memory(new_store, config))
+            _stores[path] = store
+        return store
+
+
+def export_sqlite_memory(config):
+    """
+    Write the configured memory database back to the JSON memory files and
+    move it aside to `<path>.exported`, so the JSON backend continues from the
+    database and a later switch back to SQLite imports the files again.
+
+    Sessions still using the database fail their memory operations until
+    they reconnect.
+    """
+    path = os.path.abspath(config.MEMORY_DB_PATH)
+    with _stores_lock:
+        store = _stores.pop(path, None)
+    if store is None:
+        if not os.path.exists(path):
+            return
+        store = SqliteMemoryStore(path)
+
+    with store.reading() as conn:
+        if store.is_new():
+            memories = None
+        else:
+            memories = {
+                "init_memory": read_init_memory(conn),
+                "core_memory": read_core_blocks(conn),
+                "temp_memory": read_temp_memory(conn),
+            }
+    if memories is not None:
+        files = get_memory_files(config)
+        journal_path = getattr(config, "MEMORY_JOURNAL_PATH", None)
+        if journal_path:
+            retire_memory_journal(journal_path, files)
+        core_memory = copy.deepcopy(files["core_memory"].get())
+        core_memory["blocks"] = memories["core_memory"]
+        memories["core_memory"] = core_memory
+        for name, data in memories.items():
+            files[name].set(data)
+            if not files[name].flush():
+                raise RuntimeError(f"Could not write {files[name].path}")
+
+    store.checkpoint()
+    store.close()
+    os.replace(path, path + ".exported")
+    logger.info("Exported memory database %s to the JSON memory files", path)
+
+
+def close_all_stores():
+    """Checkpoint and close every open memory database. Called on shutdown."""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        try:
+            store.checkpoint()
+            store.close()
+        except Exception as e:
+            logger.error("Error closing memory database %s: %s", store.path, e)
+
+
+atexit.register(close_all_stores)
+
+
+class _StagedResultChanged(Exception):
+    """A staged operation came out differently when its transaction was committed."""
+
+
+class SqliteMemoryManager:
+    """
+    Manages the three types of memory (init, core, temp) in a SQLite database.
+
+    Every write is an operation returning its result, its change as patch
+    operations and the memories it changed. Outside a transaction it runs at
+    once in a database transaction. Inside one it is staged: reads then run
+    the staged operations in a database transaction that is rolled back.
+    """
+
+    def __init__(self, config, on_memory_change_callback=None):
+        self.config = config
+        self.on_memory_change_callback = on_memory_change_callback
+        self.store = get_memory_store(config)
+        self.storage_paths = {name: f"{self.store.path}#{name}" for name in MEMORY_NAMES}
+        # Operations of the open transaction: (operation, args, result)
+        self._staged: Optional[List[Tuple[Callable[..., OperationResult], tuple, Any]]] = None
+
+    def _notify_memory_change(self, patch: Dict[str, Any]):
+        """Notify that memory has changed."""
+        if self.on_memory_change_callback:
+            try:
+                self.on_memory_change_callback(patch)
+            except Exception as e:
+                logger.error("Error in memory change callback: %s", e)
+
+    def _read(self, read: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Read committed data, or this transaction's staged version of it."""
+        if not self._staged:
+            with self.store.reading() as conn:
+                return read(conn)
+        with self.store.transaction(keep=False) as conn:
+            for operation, args, _ in self._staged:
+                operation(conn, *args)
+            return read(conn)
+
+    def _run(self, operation: Callable[..., OperationResult], *args) -> Any:
+        """Run a write operation, or stage it while a transaction is open."""
+        if self._staged is not None:
+            with self.store.transaction(keep=False) as conn:
+                for staged_operation, staged_args, _ in self._staged:
+                    staged_operation(conn, *staged_args)
+                result, _, changed = operation(conn, *args)
+            if changed:
+                self._staged.append((operation, args, result))
+            return result
+
+        result, _ = self._apply([(operation, args)])
+        return result
+
+    def _apply(self, operations: List[Tuple[Callable[..., OperationResult], tuple]],
+               expected: Optional[List[Any]] = None) -> Tuple[Any, Set[str]]:
+        """
+        Run operations in one database transaction and notify listeners once.
+        With `expected` results, the transaction is rolled back and
+        `_StagedResultChanged` raised as soon as an operation returns another.
+        """
+        ops: List[Dict[str, Any]] = []
+        changed: Set[str] = set()
+        result = None
+        with self.store.transaction() as conn:
+            base_version = sum(self.store.get_versions(conn).values())
+            for index, (operation, args) in enumerate(operations):
+                result, operation_ops, operation_changed = operation(conn, *args)
+                if expected is not None and result != expected[index]:
+                    raise _StagedResultChanged(
+                        f"staged operation {operation.__name__} returned {result!r} instead of {expected[index]!r}"
+                    )
+                ops.extend(operation_ops)
+                changed |= operation_changed
+            if changed:
+                self.store.bump_versions(conn, changed)
+
+        if changed:
+            self._notify_memory_change({
+                "base_version": base_version,
+                "version": base_version + len(changed),
+                "ops": ops,
+            })
+        return result, changed
+
+    # --- Transactions ---
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._staged is not None
+
+    def begin(self):
+        """Start staging changes instead of applying them."""
+        if self._staged is not None:
+            raise RuntimeError("A memory transaction is already open")
+        self._staged = []
+
+    def commit(self) -> bool:
+        """
+        Run all staged operations in one database transaction, then notify
+        once. Returns False, changing nothing, if any operation failed or came
+        out differently than during the turn.
+        """
+        staged, self._staged = self._staged, None
+        if not staged:
+            return True
+        try:
+            self._apply([(operation, args) for operation, args, _ in staged],
+                        expected=[result for _, _, result in staged])
+        except Exception as e:
+            logger.error("Rejected memory commit: %s", e)
+            return False
+        return True
+
+    def rollback(self):
+        """Drop all staged changes."""
+        staged, self._staged = self._staged, None
+        if staged:
+            logger.info("Rolled back %d uncommitted memory operations", len(staged))
+
+    @contextmanager
+    def transaction(self) -> Iterator["SqliteMemoryManager"]:
+        """Stage the changes made inside the block; commit them if it succeeds, else roll back."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        else:
+            self.commit()
+
+    def get_memory_versions(self) -> Dict[str, int]:
+        """Return version counters that change whenever a memory's content changes."""
+        with self.store.reading() as conn:
+            return self.store.get_versions(conn)
+
+    def get_memory_version(self) -> int:
+        """Return the version of the memory as a whole; every change adds one."""
+        return sum(self.get_memory_versions().values())
+
+    def get_memory_snapshot(self) -> Dict[str, Any]:
+        """Return all three memories together with the version they are at."""
+        def read(conn):
+            return {
+                "version": sum(self.store.get_versions(conn).values()),
+                "init_memory": read_init_memory(conn),
+                "core_memory": read_core_blocks(conn),
+                "temp_memory": read_temp_memory(conn),
+            }
+        return self._read(read)
+
+    def flush(self) -> bool:
+        """Checkpoint the database; committed changes are already on disk."""
+        self.store.checkpoint()
+        return True
+
+    def read_journal(self, since: int = 0, limit: int = 1000) -> Optional[Dict[str, Any]]:
+        """The database keeps no memory journal."""
+        return None
+
+    # --- Init Memory Management ---
+
+    def get_init_memory(self) -> Dict[str, Any]:
+        """Get the init memory."""
+        return self._read(read_init_memory)
+
+    def _replace_init_memory(self, conn, memory: Dict[str, Any]) -> OperationResult:
+        ops = make_patch(read_init_memory(conn), memory, "/init_memory")
+        if ops:
+            write_init_memory(conn, memory)
+        return True, ops, {"init_memory"} if ops else set()
+
+    def update_init_memory(self, memory: Dict[str, Any]) -> bool:
+        """Update the entire init memory."""
+        try:
+            return self._run(self._replace_init_memory, copy.deepcopy(memory))
+        except Exception as e:
+            logger.error("Error updating init memory: %s", e)
+            return False
+
+    def _set_init_item(self, conn, key: str, value: Any) -> OperationResult:
+        path = f"/init_memory/{escape_token(key)}"
+        row = conn.execute("SELECT value FROM init_memory WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO init_memory (key, value, position) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM init_memory))",
+                (key, json.dumps(value, ensure_ascii=False)),
+            )
+            return True, [{"op": "add", "path": path, "value": value}], {"init_memory"}
+        ops = make_patch(json.loads(row[0]), value, path)
+        if ops:
+            conn.execute("UPDATE init_memory SET value = ? WHERE key = ?", (json.dumps(value, ensure_ascii=False), key))
+        return True, ops, {"init_memory"} if ops else set()
+
+    def update_init_memory_item(self, key: str, value: Any) -> bool:
+        """Update a single key-value pair in init memory."""
+        try:
+            return self._run(self._set_init_item, key, copy.deepcopy(value))
+        except Exception as e:
+            logger.error("Error updating init memory: %s", e)
+            return False
+
+    def _delete_init_key(self, conn, key: str) -> OperationResult:
+        if conn.execute("DELETE FROM init_memory WHERE key = ?", (key,)).rowcount == 0:
+            return False, [], set()
+        return True, [{"op": "remove", "path": f"/init_memory/{escape_token(key)}"}], {"init_memory"}
+
+    def delete_init_memory_key(self, key: str) -> bool:
+        """Delete a key from init memory."""
+        return self._run(self._delete_init_key, key)
+
+    # --- Core Memory Management ---
+
+    def get_core_memory_blocks(self) -> Dict[str, Any]:
+        """Get all core memory blocks."""
+        return self._read(read_core_blocks)
+
+    def get_core_memory_block(self, block_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific core memory block by ID."""
+        return self._read(lambda conn: read_core_blocks(conn, block_id).get(block_id))
+
+    @staticmethod
+    def _new_block_id(conn, title: str) -> str:
+        # Generate a unique ID (simple approach: use title as ID, make it unique)
+        block_id = title.lower().replace(' ', '_').replace('-', '_')
+        original_id = block_id
+
+        counter = 1
+        while conn.execute("SELECT 1 FROM core_blocks WHERE block_id = ?", (block_id,)).fetchone():
+            block_id = f"{original_id}_{counter}"
+            counter += 1
+        return block_id
+
+    def _create_block(self, conn, new_block: Dict[str, Any]) -> OperationResult:
+        block_id = new_block["id"]
+        if conn.execute("SELECT 1 FROM core_blocks WHERE block_id = ?", (block_id,)).fetchone():
+            return False, [], set()
+        position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM core_blocks").fetchone()[0]
+        _insert_block(conn, block_id, new_block, position)
+        return True, [{"op": "add", "path": f"/core_memory/{escape_token(block_id)}", "value": new_block}], \
+            {"core_memory"}
+
+    def create_core_memory_block(self, title: str, description: str, content: List[str]) -> str:
+        """Create a new core memory block."""
+        while True:
+            block_id = self._read(lambda conn: self._new_block_id(conn, title))
+            new_block = {
+                "id": block_id,
+                "title": title,
+                "description": description,
+                "content": list(content)
+            }
+            # The ID is chosen once, so a staged block commits under the ID the turn saw
+            if self._run(self._create_block, new_block):
+                return block_id
+
+    def _update_block(self, conn, block_id: str, title: Optional[str], description: Optional[str],
+                      content: Optional[List[str]]) -> OperationResult:
+        old_block = read_core_blocks(conn, block_id).get(block_id)
+        if old_block is None:
+            return False, [], set()
+
+        block = copy.deepcopy(old_block)
+        if title is not None:
+            block['title'] = title
+        if description is not None:
+            block['description'] = description
+        if content is not None:
+            block['content'] = content
+
+        # Update the ID field as well to match the block_id key
+        block['id'] = block_id
+
+        ops = make_patch(old_block, block, f"/core_memory/{escape_token(block_id)}")
+        if ops:
+            conn.execute("UPDATE core_blocks SET data = ? WHERE block_id = ?", (_block_data(block), block_id))
+            if block["content"] != old_block["content"]:
+                conn.execute("DELETE FROM core_block_items WHERE block_id = ?", (block_id,))
+                conn.execute("UPDATE core_blocks SET item_count = ? WHERE block_id = ?",
+                             (len(block["content"]), block_id))
+                _insert_block_items(conn, block_id, block["content"])
+        # An update of an existing block succeeds even if nothing changed
+        return True, ops, {"core_memory"} if ops else set()
+
+    def update_core_memory_block(self, block_id: str, title: Optional[str] = None,
+                                description: Optional[str] = None,
+                                content: Optional[List[str]] = None) -> bool:
+        """Update an existing core memory block."""
+        return self._run(self._update_block, block_id, title, description,
+                         list(content) if content is not None else None)
+
+    def _delete_block(self, conn, block_id: str) -> OperationResult:
+        if conn.execute("DELETE FROM core_blocks WHERE block_id = ?", (block_id,)).rowcount == 0:
+            return False, [], set()
+        return True, [{"op": "remove", "path": f"/core_memory/{escape_token(block_id)}"}], {"core_memory"}
+
+    def delete_core_memory_block(self, block_id: str) -> bool:
+        """Delete a core memory block."""
+        return self._run(self._delete_block, block_id)
+
+    def _add_item(self, conn, block_id: str, content_item: str) -> OperationResult:
+        row = conn.execute("SELECT item_count FROM core_blocks WHERE block_id = ?", (block_id,)).fetchone()
+        if row is None:
+            return False, [], set()
+        count = row[0]
+        item_hash = content_hash(content_item)
+        if conn.execute(
+            "SELECT 1 FROM core_block_items WHERE block_id = ? AND content_hash = ? AND content = ?",
+            (block_id, item_hash, content_item),
+        ).fetchone():
+            return False, [], set()
+
+        last_position = conn.execute(
+            "SELECT COALESCE(MAX(position), -1) FROM core_block_items WHERE block_id = ?", (block_id,)
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT INTO core_block_items (block_id, position, content, content_hash) VALUES (?, ?, ?, ?)",
+            (block_id, last_position + 1, content_item, item_hash),
+        )
+        conn.execute("UPDATE core_blocks SET item_count = item_count + 1 WHERE block_id = ?", (block_id,))
+        path = f"/core_memory/{escape_token(block_id)}/content/{count}"
+        return True, [{"op": "add", "path": path, "value": content_item}], {"core_memory"}
+
+    def add_to_core_memory_block(self, block_id: str, content_item: str) -> bool:
+        """Add a content item to a core memory block."""
+        return self._run(self._add_item, block_id, content_item)
+
+    @staticmethod
+    def _find_item(conn, block_id: str, content_item: str) -> Optional[Tuple[int, int]]:
+        """The row id and index of the first occurrence of an item, as list.index would find it."""
+        rows = conn.execute(
+            "SELECT id, position FROM core_block_items WHERE block_id = ? AND content_hash = ? AND content = ?",
+            (block_id, content_hash(content_item), content_item),
+        ).fetchall()
+        if not rows:
+            return None
+
+        item_id, position = min(rows, key=lambda row: row[1])
+        # The item's index, counted from the nearer end of the block
+        count, first_position, last_position = conn.execute(
+            "SELECT item_count, "
+            "(SELECT MIN(position) FROM core_block_items WHERE block_id = ?), "
+            "(SELECT MAX(position) FROM core_block_items WHERE block_id = ?) "
+            "FROM core_blocks WHERE block_id = ?", (block_id, block_id, block_id)
+        ).fetchone()
+        if position - first_position <= last_position - position:
+            index = conn.execute(
+                "SELECT COUNT(*) FROM core_block_items WHERE block_id = ? AND position < ?", (block_id, position)
+            ).fetchone()[0]
+        else:
+            index = count - 1 - conn.execute(
+                "SELECT COUNT(*) FROM core_block_items WHERE block_id = ? AND position > ?", (block_id, position)
+            ).fetchone()[0]
+        return item_id, index
+
+    def _remove_item(self, conn, block_id: str, content_item: str) -> OperationResult:
+        found = self._find_item(conn, block_id, content_item)
+        if found is None:
+            return False, [], set()
+
+        item_id, index = found
+        conn.execute("DELETE FROM core_block_items WHERE id = ?", (item_id,))
+        conn.execute("UPDATE core_blocks SET item_count = item_count - 1 WHERE block_id = ?", (block_id,))
+        path = f"/core_memory/{escape_token(block_id)}/content/{index}"
+        return True, [{"op": "remove", "path": path}], {"core_memory"}
+
+    def remove_from_core_memory_block(self, block_id: str, content_item: str) -> bool:
+        """Remove a content item from a core memory block."""
+        return self._run(self._remove_item, block_id, content_item)
+
+    def _replace_item(self, conn, block_id: str, old_item: str, new_item: str) -> OperationResult:
+        found = self._find_item(conn, block_id, old_item)
+        if found is None:
+            return False, [], set()
+
+        item_id, index = found
+        conn.execute("UPDATE core_block_items SET content = ?, content_hash = ? WHERE id = ?",
+                     (new_item, content_hash(new_item), item_id))
+        path = f"/core_memory/{escape_token(block_id)}/content/{index}"
+        return True, [{"op": "replace", "path": path, "value": new_item}], {"core_memory"}
+
+    def replace_in_core_memory_block(self, block_id: str, old_item: str, new_item: str) -> bool:
+        """Replace the first occurrence of a content item in a core memory block."""
+        return self._run(self._replace_item, block_id, old_item, new_item)
+
+    def _replace_core_blocks(self, conn, blocks: Dict[str, Any]) -> OperationResult:
+        ops = make_patch(read_core_blocks(conn), blocks, "/core_memory")
+        if ops:
+            write_core_blocks(conn, blocks)
+        return True, ops, {"core_memory"} if ops else set()
+
+    def _save_core_memory_blocks(self, blocks: Dict[str, Any]) -> bool:
+        """Replace all core memory blocks."""
+        try:
+            return self._run(self._replace_core_blocks, copy.deepcopy(blocks))
+        except Exception as e:
+            logger.error("Error saving core memory blocks: %s", e)
+            return False
+
+    # --- Temp Memory Management ---
+
+    def get_temp_memory(self) -> List[Dict[str, Any]]:
+        """Get the temp memory."""
+        return self._read(read_temp_memory)
+
+    def _add_temp_entry(self, conn, entry: Dict[str, Any]) -> OperationResult:
+        count = conn.execute("SELECT COUNT(*) FROM temp_entries").fetchone()[0]
+        conn.execute("INSERT INTO temp_entries (entry_id, data) VALUES (?, ?)",
+                     (entry["id"], json.dumps(entry, ensure_ascii=False)))
+        ops = [{"op": "add", "path": f"/temp_memory/{count}", "value": entry}]
+
+        # Keep only the newest entries to prevent it from growing indefinitely
+        dropped = conn.execute(
+            "DELETE FROM temp_entries WHERE seq IN "
+            "(SELECT seq FROM temp_entries ORDER BY seq DESC LIMIT -1 OFFSET ?)",
+            (TEMP_MEMORY_LIMIT,),
+        ).rowcount
+        ops.extend({"op": "remove", "path": "/temp_memory/0"} for _ in range(dropped))
+        return True, ops, {"temp_memory"}
+
+    def add_temp_memory(self, content: str, role: str = "assistant") -> bool:
+        """Add an entry to temp memory."""
+        # Generate a random 6-character ID
+        random_id = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+
+        new_entry = {
+            "id": random_id,
+            "content": content,
+            "role": role,
+            "timestamp": datetime.now().isoformat()  # Use current timestamp
+        }
+        try:
+            return self._run(self._add_temp_entry, new_entry)
+        except Exception as e:
+            logger.error("Error saving temp memory: %s", e)
+            return False
+
+    def _delete_temp_entry(self, conn, item_id: str) -> OperationResult:
+        seqs = [seq for seq, in conn.execute(
+            "SELECT seq FROM temp_entries WHERE entry_id = ? ORDER BY seq DESC", (item_id,)
+        )]
+        ops = []
+        # Highest index first, so the earlier indexes stay valid
+        for seq in seqs:
+            index = conn.execute("SELECT COUNT(*) FROM temp_entries WHERE seq < ?", (seq,)).fetchone()[0]
+            conn.execute("DELETE FROM temp_entries WHERE seq = ?", (seq,))
+            ops.append({"op": "remove", "path": f"/temp_memory/{index}"})
+        return bool(ops), ops, {"temp_memory"} if ops else set()
+
+    def delete_temp_memory_item(self, item_id: str) -> bool:
+        """Delete an entry from temp memory by ID."""
+        return self._run(self._delete_temp_entry, item_id)
+
+    def _replace_temp_memory(self, conn, temp_memory: List[Dict[str, Any]]) -> OperationResult:
+        ops = make_patch(read_temp_memory(conn), temp_memory, "/temp_memory")
+        if ops:
+            write_temp_memory(conn, temp_memory)
+        return True, ops, {"temp_memory"} if ops else set()
+
+    def clear_temp_memory(self) -> bool:
+        """Clear all temp memory."""
+        return self._save_temp_memory([])
+
+    def _save_temp_memory(self, temp_memory: List[Dict[str, Any]]) -> bool:
+        """Replace the temp memory."""
+        try:
+            return self._run(self._replace_temp_memory, copy.deepcopy(temp_memory))
+        except Exception as e:
+            logger.error("Error saving temp memory: %s", e)
+            return False
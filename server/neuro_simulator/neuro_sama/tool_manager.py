@@ -1,23 +1,70 @@
 """Tool manager for the Neuro Sama module."""
 
-import importlib
+import importlib.util
+import logging
 import os
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any, List, Optional, Type
 from .tools.base import BaseTool
 
+logger = logging.getLogger(__name__)
 
-class ToolManager:
-    """Manages the loading and execution of tools."""
+DEFAULT_TOOLS_DIR = os.path.join(os.path.dirname(__file__), "tools")
 
-    def __init__(self, tools_dir: str = None, memory_manager=None):
-        self.tools_dir = tools_dir or os.path.join(os.path.dirname(__file__), "tools")
-        self.memory_manager = memory_manager
-        self.tools: Dict[str, BaseTool] = {}
-        self.load_tools()
 
-    def load_tools(self):
-        """Dynamically load all tools from the tools directory."""
-        for filename in os.listdir(self.tools_dir):
+def _takes_memory_manager(tool_class: Type[BaseTool]) -> bool:
+    return 'memory_manager' in tool_class.__init__.__code__.co_varnames
+
+
+def _instantiate(tool_class: Type[BaseTool], memory_manager=None) -> BaseTool:
+    """Create an instance of a tool, passing memory_manager if needed."""
+    if _takes_memory_manager(tool_class):
+        return tool_class(memory_manager=memory_manager)
+    return tool_class()
+
+
+def format_tool_descriptions(schemas: List[Dict[str, Any]]) -> str:
+    """Format tool schemas as the tool list of the system prompt."""
+    if not schemas:
+        return "No tools available."
+
+    lines = ["Available tools:"]
+    for i, schema in enumerate(schemas):
+        params_str_parts = []
+        for param in schema.get("parameters", []):
+            p_name = param.get("name")
+            p_type = param.get("type")
+            p_req = "required" if param.get("required") else "optional"
+            params_str_parts.append(f"{p_name}: {p_type} ({p_req})")
+        params_str = ", ".join(params_str_parts)
+        lines.append(
+            f"{i + 1}. {schema.get('name')}({params_str}) - {schema.get('description')}"
+        )
+    return "\n".join(lines)
+
+
+class ToolRegistry:
+    """
+    The tool classes found in a tools directory, loaded once per process.
+
+    Tool modules are imported the first time the registry is used and only
+    again on an explicit `reload`. The schemas and the formatted description
+    text are computed at load time, so sessions binding to the registry only
+    create their tool instances.
+    """
+
+    def __init__(self, tools_dir: str):
+        self.tools_dir = tools_dir
+        self._lock = threading.Lock()
+        self._classes: Optional[Dict[str, Type[BaseTool]]] = None
+        self._schemas: List[Dict[str, Any]] = []
+        self._description_text = ""
+        self._version = 0
+
+    def _load(self):
+        classes: Dict[str, Type[BaseTool]] = {}
+        schemas: List[Dict[str, Any]] = []
+        for filename in sorted(os.listdir(self.tools_dir)):
             if filename.endswith(".py") and not filename.startswith("__"):
                 module_name = filename[:-3]  # Remove .py extension
 
@@ -37,30 +84,121 @@ class ToolManager:
                         and issubclass(attr, BaseTool)
                         and attr != BaseTool
                     ):
-                        # Create an instance of the tool, passing memory_manager if needed
-                        if 'memory_manager' in attr.__init__.__code__.co_varnames:
-                            tool_instance = attr(memory_manager=self.memory_manager)
-                        else:
-                            tool_instance = attr()
-                        self.tools[tool_instance.name] = tool_instance
-                        print(f"Loaded tool: {tool_instance.name}")
+                        # An unbound instance only serves to read the schema
+                        tool = _instantiate(attr)
+                        classes[tool.name] = attr
+                        schemas.append({
+                            "name": tool.name,
+                            "description": tool.description,
+                            "parameters": tool.parameters
+                        })
+                        logger.debug("Loaded tool: %s", tool.name)
+
+        self._classes = classes
+        self._schemas = schemas
+        self._description_text = format_tool_descriptions(schemas)
+        self._version += 1
+        logger.info("Loaded %d tools from %s", len(classes), self.tools_dir)
+
+    def _ensure_loaded(self):
+        if self._classes is None:
+            with self._lock:
+                if self._classes is None:
+                    self._load()
+
+    def reload(self):
+        """Import the tool modules again, picking up added, removed or edited tools."""
+        with self._lock:
+            self._load()
+
+    @property
+    def version(self) -> int:
+        """Incremented on every load of the tool modules."""
+        self._ensure_loaded()
+        return self._version
+
+    def get_classes(self) -> Dict[str, Type[BaseTool]]:
+        self._ensure_loaded()
+        return self._classes
+
+    def get_schemas(self) -> List[Dict[str, Any]]:
+        self._ensure_loaded()
+        return self._schemas
+
+    def get_description_text(self) -> str:
+        self._ensure_loaded()
+        return self._description_text
+
+    def bind(self, memory_manager=None) -> Dict[str, BaseTool]:
+        """Create the tool instances of one session."""
+        return {
+            name: _instantiate(tool_class, memory_manager)
+            for name, tool_class in self.get_classes().items()
+        }
+
+
+_registries: Dict[str, ToolRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_tool_registry(tools_dir: str = None) -> ToolRegistry:
+    """Get the process-wide registry of a tools directory."""
+    tools_dir = os.path.abspath(tools_dir or DEFAULT_TOOLS_DIR)
+    with _registries_lock:
+        registry = _registries.get(tools_dir)
+        if registry is None:
+            registry = ToolRegistry(tools_dir)
+            _registries[tools_dir] = registry
+        return registry
+
+
+def reload_tools(tools_dir: str = None) -> ToolRegistry:
+    """Reload the tools of a directory for all sessions of the process."""
+    registry = get_tool_registry(tools_dir)
+    registry.reload()
+    return registry
+
+
+class ToolManager:
+    """Manages the tools of one session, bound to its memory manager."""
+
+    def __init__(self, tools_dir: str = None, memory_manager=None):
+        self.registry = get_tool_registry(tools_dir)
+        self.tools_dir = self.registry.tools_dir
+        self.memory_manager = memory_manager
+        self.tools: Dict[str, BaseTool] = {}
+        self._bound_version = 0
+        self.load_tools()
+
+    def load_tools(self):
+        """Bind this session's tool instances to the registry's tool classes."""
+        self._bound_version = self.registry.version
+        self.tools = self.registry.bind(self.memory_manager)
+
+    def _check_reload(self):
+        # Rebind after the registry was reloaded
+        if self._bound_version != self.registry.version:
+            self.load_tools()
+
+    @property
+    def version(self) -> int:
+        """A value that changes whenever the set of loaded tools changes."""
+        return self.registry.version
 
     def get_tool(self, name: str) -> BaseTool:
         """Get a tool by name."""
+        self._check_reload()
         return self.tools.get(name)
 
     def get_all_tools(self) -> Dict[str, BaseTool]:
         """Get all tools."""
+        self._check_reload()
         return self.tools
 
     def get_tool_schemas(self) -> List[Dict[str, Any]]:
         """Get all tool schemas for the LLM."""
-        schemas = []
-        for tool in self.tools.values():
-            schema = {
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.parameters
-            }
-            schemas.append(schema)
-        return schemas
\ No newline at end of file
+        return self.registry.get_schemas()
+
+    def get_tool_descriptions(self) -> str:
+        """Get the tool list of the system prompt."""
+        return self.registry.get_description_text()
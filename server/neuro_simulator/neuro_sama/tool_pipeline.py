@@ -0,0 +1,128 @@
+"""Ordered asynchronous execution of streamed tool calls for the Neuro Sama module."""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from .log_setup import Redacted
+from .speech_stream import SpeechStream
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the submitted tool calls
+_END = object()
+
+ExecuteFunc = Callable[[Dict[str, Any], Optional[SpeechStream]], Awaitable[Optional[AsyncIterator[Any]]]]
+SendFunc = Callable[[Any], Awaitable[None]]
+
+
+class ToolCallPipeline:
+    """
+    Runs the tool calls of one response off the stream-reading path.
+
+    The stream reader only calls `submit`, which never waits, so the model's
+    output keeps being read while tools run and audio is synthesized.
+
+    Two tasks do the work:
+    - The executor runs the tool calls one after another in submission order,
+      so tools that change memory see each other's effects. Running a tool
+      only starts its speech synthesis; it does not wait for the audio.
+    - The sequencer sends the outputs of each call in submission order. It
+      only moves on to the next call once the previous one has delivered all
+      of its output, so synthesis of later calls overlaps with delivery of
+      earlier ones.
+
+    The output iterators returned by the execute function must have an
+    `aclose` method; it is called once the iterator is no longer needed,
+    including when it was never iterated because the pipeline was cancelled.
+    """
+
+    def __init__(self, execute: ExecuteFunc, send: SendFunc):
+        self._execute = execute
+        self._send = send
+        self._calls: asyncio.Queue = asyncio.Queue()
+        self._outputs: asyncio.Queue = asyncio.Queue()
+        self._executor = asyncio.create_task(self._run_executor())
+        self._sequencer = asyncio.create_task(self._run_sequencer())
+        # Closing of outputs dropped by cancel
+        self._closing: Set[asyncio.Task] = set()
+        self.sent = 0
+
+    def submit(self, tool_call: Dict[str, Any], speech_stream: Optional[SpeechStream] = None):
+        """Queue a parsed tool call for execution."""
+        self._calls.put_nowait((tool_call, speech_stream))
+
+    async def _run_executor(self):
+        try:
+            while True:
+                item = await self._calls.get()
+                if item is _END:
+                    break
+                tool_call, speech_stream = item
+                try:
+                    outputs = await self._execute(tool_call, speech_stream)
+                except asyncio.CancelledError:
+                    if speech_stream is not None:
+                        speech_stream.cancel()
+                    raise
+                except Exception as e:
+                    logger.error("Error executing tool call %s: %s", Redacted(tool_call), e)
+                    outputs = None
+                    if speech_stream is not None:
+                        speech_stream.cancel()
+                self._outputs.put_nowait((tool_call, outputs))
+        finally:
+            self._outputs.put_nowait(_END)
+
+    async def _run_sequencer(self):
+        while True:
+            item = await self._outputs.get()
+            if item is _END:
+                break
+            tool_call, outputs = item
+            if outputs is None:
+                logger.debug("No output pack from object: %s", Redacted(tool_call))
+                continue
+            sent = 0
+            try:
+                async for output in outputs:
+                    await self._send(output)
+                    sent += 1
+            finally:
+                await outputs.aclose()
+            if not sent:
+                logger.debug("No output pack from object: %s", Redacted(tool_call))
+            self.sent += sent
+
+    async def close(self):
+        """Wait until every submitted call has been executed and its output sent."""
+        self._calls.put_nowait(_END)
+        try:
+            await asyncio.gather(self._executor, self._sequencer)
+        except BaseException:
+            self.cancel()
+            raise
+
+    def cancel(self):
+        """Stop executing and sending, dropping any synthesis still in progress."""
+        self._executor.cancel()
+        self._sequencer.cancel()
+        while not self._calls.empty():
+            item = self._calls.get_nowait()
+            if item is not _END and item[1] is not None:
+                item[1].cancel()
+        # Executed calls whose output was not sent yet may already be synthesizing
+        while not self._outputs.empty():
+            item = self._outputs.get_nowait()
+            if item is not _END and item[1] is not None:
+                task = asyncio.create_task(self._close_outputs(item))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_outputs(item):
+        tool_call, outputs = item
+        try:
+            await outputs.aclose()
+        except Exception as e:
+            logger.error("Error closing the output of tool call %s: %s", Redacted(tool_call), e)
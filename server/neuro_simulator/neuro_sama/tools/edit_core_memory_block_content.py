@@ -59,21 +59,13 @@ class EditCoreMemoryBlockContentTool(BaseTool):
         if not block:
             return {"status": "error", "message": f"Block '{block_id}' not found."}
         
-        content_list = block.get('content', [])
-        
-        if old_content in content_list:
-            # Replace the old content with new content
-            idx = content_list.index(old_content)
-            content_list[idx] = new_content
-            
-            # Update the block
-            success = self.memory_manager.update_core_memory_block(
-                block_id, content=content_list
-            )
-            
-            if success:
-                return {"status": "success", "message": f"Content in block '{block_id}' updated successfully."}
-            else:
-                return {"status": "error", "message": f"Failed to update content in block '{block_id}'."}
+        if old_content not in block.get('content', []):
+            return {"status": "error", "message": f"Content '{old_content}' not found in block '{block_id}'."}
+
+        # Replaced by value, so the edit stays right if the block changes before it is committed
+        success = self.memory_manager.replace_in_core_memory_block(block_id, old_content, new_content)
+
+        if success:
+            return {"status": "success", "message": f"Content in block '{block_id}' updated successfully."}
         else:
-            return {"status": "error", "message": f"Content '{old_content}' not found in block '{block_id}'."}
\ No newline at end of file
+            return {"status": "error", "message": f"Failed to update content in block '{block_id}'."}
@@ -49,7 +49,7 @@ class SpeakTool(BaseTool):
         if not isinstance(text, str) or not text:
             raise ValueError("The 'text' parameter must be a non-empty string.")
 
-        logger.debug(f"Agent says: {text}")
+        logger.debug("Agent says: %s", text)
 
         # Show console box for the speak action
         console.box_it_up(
@@ -42,7 +42,7 @@ class ThinkTool(BaseTool):
         if not isinstance(thought, str) or not thought:
             raise ValueError("The 'thought' parameter must be a non-empty string.")
 
-        logger.debug(f"Agent thinks: {thought}")
+        logger.debug("Agent thinks: %s", thought)
 
         # Show console box for the think action
         console.box_it_up(
@@ -1,14 +1,22 @@
-"""TTS module for the Neuro Sama module using Azure."""
+"""TTS module for the Neuro Sama module."""
 
 import asyncio
 import base64
-import html
 import logging
 import re
+import time
 
-import azure.cognitiveservices.speech as speechsdk
-
+from ..metrics import Histogram
 from .config import Config
+from .tts_backends import get_tts_backend
+from .tts_cache import get_tts_cache
+
+logger = logging.getLogger(__name__)
+
+TTS_SYNTHESIS_SECONDS = Histogram(
+    "neuro_tts_synthesis_seconds", "Time to get the audio of one sentence, from the cache or the TTS service",
+    ["provider", "source"],
+)
 
 
 def remove_emoji(text: str) -> str:
@@ -37,89 +45,87 @@ def remove_emoji(text: str) -> str:
 
 async def synthesize_audio_segment(text: str, config: Config) -> tuple[str, float]:
     """
-    Synthesizes audio using Azure TTS.
+    Synthesizes audio using the configured TTS backend.
     Returns a Base64 encoded audio string and the audio duration in seconds.
     """
-    # Clean emojis from the text before synthesis
-    text = remove_emoji(text)
-    if not text:
-        return "", 0.0
-
-    # Check if Azure TTS config is available
-    if not config.AZURE_TTS_KEY or config.AZURE_TTS_KEY == "your-azure-tts-key-here":
-        logging.warning("Azure TTS key not configured, returning text only")
-        return "", 0.0  # Return empty audio if not configured
-    
-    if not config.AZURE_TTS_REGION or config.AZURE_TTS_REGION == "your-azure-region-here":
-        logging.warning("Azure TTS region not configured, returning text only")
-        return "", 0.0  # Return empty audio if not configured
-
-    # Fixed voice and pitch settings
-    voice_name = "en-US-AshleyNeural"
-    pitch = 1.25
-
-    speech_config = speechsdk.SpeechConfig(
-        subscription=config.AZURE_TTS_KEY, region=config.AZURE_TTS_REGION
-    )
-    speech_config.set_speech_synthesis_output_format(
-        speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
-    )
+    audio_data, audio_duration_sec = await synthesize_audio(text, config)
+    return base64.b64encode(audio_data).decode("utf-8") if audio_data else "", audio_duration_sec
 
-    pitch_percent = int((pitch - 1.0) * 100)
-    pitch_ssml_value = (
-        f"+{pitch_percent}%" if pitch_percent >= 0 else f"{pitch_percent}%"
-    )
 
-    escaped_text = html.escape(text)
+async def synthesize_audio(text: str, config: Config) -> tuple[bytes, float]:
+    """
+    Synthesizes audio using the configured TTS backend.
+    Returns the raw audio bytes and the audio duration in seconds.
 
-    ssml_string = f"""
-    <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
-        <voice name="{voice_name}">
-            <prosody pitch="{pitch_ssml_value}">
-                {escaped_text}
-            </prosody>
-        </voice>
-    </speak>
+    Clips found in the TTS cache are returned without contacting the TTS
+    service, and every successful synthesis is added to it.
+    """
+    # Clean emojis from the text before synthesis
+    text = remove_emoji(text)
+    if not text:
+        return b"", 0.0
+
+    start = time.perf_counter()
+    backend = get_tts_backend(config)
+    cache = get_tts_cache(config) if backend.cacheable else None
+    cache_key = backend.cache_key(text)
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            audio_data, audio_duration_sec = cached
+            TTS_SYNTHESIS_SECONDS.labels(backend.provider, "cache").observe(time.perf_counter() - start)
+            logger.debug("TTS cache hit: '%.30s...' (Duration: %.2fs)", text, audio_duration_sec)
+            return audio_data, audio_duration_sec
+
+    # Check if the TTS service is configured
+    if not backend.is_configured():
+        return b"", 0.0  # Return empty audio if not configured
+
+    audio_data, audio_duration_sec = await backend.synthesize(text)
+    if audio_data:
+        TTS_SYNTHESIS_SECONDS.labels(backend.provider, "service").observe(time.perf_counter() - start)
+        if cache is not None:
+            await asyncio.to_thread(cache.put, cache_key, audio_data, audio_duration_sec)
+        logger.debug("TTS synthesis completed: '%.30s...' (Duration: %.2fs)", text, audio_duration_sec)
+    return audio_data, audio_duration_sec
+
+
+async def warm_up_tts_cache(config: Config) -> int:
     """
+    Synthesize the configured warm-up phrases that are not cached yet.
+    Returns the number of phrases that were synthesized.
+    """
+    backend = get_tts_backend(config)
+    cache = get_tts_cache(config) if backend.cacheable else None
+    phrases = getattr(config, "TTS_CACHE_WARMUP_PHRASES", [])
+    if cache is None or not phrases:
+        return 0
+
+    synthesized = 0
+    for phrase in phrases:
+        text = remove_emoji(phrase)
+        if not text or cache.contains(backend.cache_key(text)):
+            continue
+        try:
+            audio_data, _duration = await synthesize_audio(text, config)
+        except Exception as e:
+            logger.error("TTS cache warm-up failed for '%s...': %s", text[:30], e)
+            continue
+        if audio_data:
+            synthesized += 1
+    logger.info("TTS cache warm-up finished, %d new phrase(s) synthesized", synthesized)
+    return synthesized
+
+
+async def prewarm_synthesizers(config: Config):
+    """
+    Prepare the backend of the configured TTS service ahead of the first
+    speak turn, e.g. connect the Azure synthesizer pool.
+    """
+    await get_tts_backend(config).prewarm()
 
-    synthesizer = speechsdk.SpeechSynthesizer(
-        speech_config=speech_config, audio_config=None
-    )
 
-    def _perform_synthesis_sync():
-        # This function is fully blocking, as intended for to_thread
-        return synthesizer.speak_ssml_async(ssml_string).get()
-
-    try:
-        timeout_sec = config.AZURE_TTS_TIMEOUT
-        # Use asyncio.wait_for to apply a timeout to the threaded blocking call
-        result = await asyncio.wait_for(
-            asyncio.to_thread(_perform_synthesis_sync), timeout=timeout_sec
-        )
-
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            audio_data = result.audio_data
-            encoded_audio = base64.b64encode(audio_data).decode("utf-8")
-            audio_duration_sec = result.audio_duration.total_seconds()
-            logging.debug(
-                f"TTS synthesis completed: '{text[:30]}...' (Duration: {audio_duration_sec:.2f}s)"
-            )
-            return encoded_audio, audio_duration_sec
-        else:
-            cancellation_details = result.cancellation_details
-            error_message = f"TTS synthesis failed (Reason: {cancellation_details.reason}). Text: '{text}'"
-            if cancellation_details.error_details:
-                error_message += f" | Details: {cancellation_details.error_details}"
-            logging.error(error_message)
-            raise Exception(error_message)
-    except asyncio.TimeoutError:
-        logging.error(
-            f"TTS synthesis timed out after {timeout_sec} seconds for text: '{text[:30]}...'"
-        )
-        return "", 0.0  # Return empty audio on timeout
-    except Exception as e:
-        logging.error(
-            f"An exception occurred during the Azure TTS SDK call: {e}",
-            exc_info=True,
-        )
-        raise
\ No newline at end of file
+async def warm_up_tts(config: Config):
+    """Pre-connect the synthesizers, then fill the TTS cache with the warm-up phrases."""
+    await prewarm_synthesizers(config)
+    await warm_up_tts_cache(config)
@@ -0,0 +1,223 @@
+"""TTS backends for the Neuro Sama module."""
+
+import asyncio
+import html
+import io
+import logging
+import random
+import wave
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple, Type
+
+import azure.cognitiveservices.speech as speechsdk
+
+from .config import Config
+from .tts_cache import make_cache_key
+from .tts_pool import SynthesizerPoolClosed, close_synthesizer_pools, get_synthesizer_pool
+
+logger = logging.getLogger(__name__)
+
+# Fixed voice and pitch settings
+VOICE_NAME = "en-US-AshleyNeural"
+PITCH = 1.25
+OUTPUT_FORMAT = speechsdk.SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
+
+# Audio layout of the local backend, matching the Azure output format:
+# MPEG-2 Layer III, 32 kbit/s, 16 kHz mono, 576 samples per frame
+LOCAL_SAMPLE_RATE = 16000
+_MP3_FRAME_HEADER = bytes((0xFF, 0xF3, 0x48, 0xC0))
+_MP3_FRAME_SIZE = 144
+_MP3_FRAME_SAMPLES = 576
+# A frame with zeroed side info and no main data decodes to silence
+_SILENT_MP3_FRAME = _MP3_FRAME_HEADER + bytes(_MP3_FRAME_SIZE - len(_MP3_FRAME_HEADER))
+
+# Shortest clip the local backend produces, in seconds
+LOCAL_MIN_DURATION = 0.3
+
+
+def silent_mp3(duration: float) -> Tuple[bytes, float]:
+    """Build a silent MP3 of about `duration` seconds. Returns the audio and its exact duration."""
+    frames = max(1, round(duration * LOCAL_SAMPLE_RATE / _MP3_FRAME_SAMPLES))
+    return _SILENT_MP3_FRAME * frames, frames * _MP3_FRAME_SAMPLES / LOCAL_SAMPLE_RATE
+
+
+def silent_wav(duration: float) -> Tuple[bytes, float]:
+    """Build a silent 16-bit PCM WAV of about `duration` seconds. Returns the audio and its exact duration."""
+    samples = max(1, round(duration * LOCAL_SAMPLE_RATE))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(LOCAL_SAMPLE_RATE)
+        wav_file.writeframes(bytes(samples * 2))
+    return buffer.getvalue(), samples / LOCAL_SAMPLE_RATE
+
+
+class TTSBackend(ABC):
+    """
+    Base class of the TTS backends.
+
+    A backend turns cleaned text into audio bytes and the audio duration in
+    seconds. `tts.synthesize_audio` handles emoji removal and the TTS cache
+    around it.
+    """
+
+    provider = ""
+    audio_format = "mp3"
+    # Whether synthesized clips are worth storing in the TTS cache
+    cacheable = True
+
+    def __init__(self, config: Config):
+        self.config = config
+
+    def is_configured(self) -> bool:
+        return True
+
+    def cache_key(self, text: str) -> str:
+        return make_cache_key(text, self.provider, 1.0, self.audio_format)
+
+    @abstractmethod
+    async def synthesize(self, text: str) -> Tuple[bytes, float]:
+        """Synthesize cleaned text. Returns the audio and its duration in seconds."""
+        pass
+
+    async def prewarm(self):
+        """Prepare the backend ahead of the first speak turn."""
+
+
+class AzureTTSBackend(TTSBackend):
+    """Azure speech synthesis on a pool of pre-connected synthesizers."""
+
+    provider = "azure"
+
+    def is_configured(self) -> bool:
+        """Check whether an Azure TTS key and region are configured."""
+        config = self.config
+        if not config.AZURE_TTS_KEY or config.AZURE_TTS_KEY == "your-azure-tts-key-here":
+            logger.warning("Azure TTS key not configured, returning text only")
+            return False
+
+        if not config.AZURE_TTS_REGION or config.AZURE_TTS_REGION == "your-azure-region-here":
+            logger.warning("Azure TTS region not configured, returning text only")
+            return False
+        return True
+
+    def cache_key(self, text: str) -> str:
+        return make_cache_key(text, VOICE_NAME, PITCH, OUTPUT_FORMAT.name)
+
+    async def synthesize(self, text: str) -> Tuple[bytes, float]:
+        pitch_percent = int((PITCH - 1.0) * 100)
+        pitch_ssml_value = (
+            f"+{pitch_percent}%" if pitch_percent >= 0 else f"{pitch_percent}%"
+        )
+
+        escaped_text = html.escape(text)
+
+        ssml_string = f"""
+        <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
+            <voice name="{VOICE_NAME}">
+                <prosody pitch="{pitch_ssml_value}">
+                    {escaped_text}
+                </prosody>
+            </voice>
+        </speak>
+        """
+
+        try:
+            timeout_sec = self.config.AZURE_TTS_TIMEOUT
+            while True:
+                pool = get_synthesizer_pool(self.config, OUTPUT_FORMAT)
+                try:
+                    # Runs on a pre-connected synthesizer on the pool's own executor
+                    result = await pool.synthesize(ssml_string, timeout=timeout_sec)
+                    break
+                except SynthesizerPoolClosed:
+                    # The TTS service was changed meanwhile; retry on its pool
+                    logger.debug("TTS synthesizer pool was closed, retrying on the current pool")
+
+            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+                return result.audio_data, result.audio_duration.total_seconds()
+            else:
+                cancellation_details = result.cancellation_details
+                error_message = f"TTS synthesis failed (Reason: {cancellation_details.reason}). Text: '{text}'"
+                if cancellation_details.error_details:
+                    error_message += f" | Details: {cancellation_details.error_details}"
+                logger.error(error_message)
+                raise Exception(error_message)
+        except asyncio.TimeoutError:
+            logger.error(
+                "TTS synthesis timed out after %s seconds for text: '%s...'", timeout_sec, text[:30]
+            )
+            return b"", 0.0  # Return empty audio on timeout
+        except Exception as e:
+            logger.error(
+                "An exception occurred during the Azure TTS SDK call: %s", e,
+                exc_info=True,
+            )
+            raise
+
+    async def prewarm(self):
+        """Connect the synthesizer pool and close the pools of services no longer in use."""
+        if not self.is_configured():
+            close_synthesizer_pools()
+            return
+        pool = get_synthesizer_pool(self.config, OUTPUT_FORMAT)
+        close_synthesizer_pools(keep=pool)
+        try:
+            await pool.prewarm()
+        except Exception as e:
+            logger.error("Failed to pre-connect TTS synthesizers: %s", e)
+
+
+class LocalTTSBackend(TTSBackend):
+    """
+    Offline synthesizer producing silent audio, for benchmarks and CI.
+
+    The clip length is proportional to the text, and each call waits a
+    configurable latency before returning, so the speak pipeline behaves
+    as it would against a real service. Latency jitter is derived from the
+    text, which keeps runs deterministic.
+    """
+
+    provider = "local"
+    # Synthesis is free and caching would hide the configured latency
+    cacheable = False
+
+    def __init__(self, config: Config):
+        super().__init__(config)
+        self.audio_format = config.TTS_LOCAL_FORMAT
+
+    def audio_duration(self, text: str) -> float:
+        return max(LOCAL_MIN_DURATION, len(text) / self.config.TTS_LOCAL_CHARS_PER_SECOND)
+
+    def latency(self, text: str) -> float:
+        """Seconds a synthesis of `text` takes."""
+        config = self.config
+        jitter = random.Random(zlib.crc32(text.encode("utf-8"))).uniform(-1.0, 1.0) * config.TTS_LOCAL_JITTER_MS
+        latency_ms = config.TTS_LOCAL_LATENCY_MS + config.TTS_LOCAL_LATENCY_PER_CHAR_MS * len(text) + jitter
+        return max(0.0, latency_ms) / 1000
+
+    async def synthesize(self, text: str) -> Tuple[bytes, float]:
+        await asyncio.sleep(self.latency(text))
+        if self.audio_format == "wav":
+            return silent_wav(self.audio_duration(text))
+        return silent_mp3(self.audio_duration(text))
+
+    async def prewarm(self):
+        # Nothing to connect; drop any Azure pools left from a previous configuration
+        close_synthesizer_pools()
+
+
+TTS_BACKENDS: Dict[str, Type[TTSBackend]] = {
+    AzureTTSBackend.provider: AzureTTSBackend,
+    LocalTTSBackend.provider: LocalTTSBackend,
+}
+
+
+def get_tts_backend(config: Config) -> TTSBackend:
+    """Get the backend for the provider of the configured TTS service."""
+    backend_class = TTS_BACKENDS.get(config.TTS_PROVIDER)
+    if backend_class is None:
+        raise ValueError(f"Unknown TTS provider: {config.TTS_PROVIDER}")
+    return backend_class(config)
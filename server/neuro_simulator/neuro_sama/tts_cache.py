@@ -0,0 +1,224 @@
+"""Content-addressed cache of synthesized TTS audio for the Neuro Sama module."""
+
+import hashlib
+import logging
+import os
+import re
+import struct
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default number of clips kept in memory
+DEFAULT_MEMORY_ENTRIES = 256
+
+# Default size limit of the on-disk store
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# Extension of cached clips on disk
+CACHE_FILE_SUFFIX = ".tts"
+
+# Every cached file starts with the clip duration in seconds
+_HEADER = struct.Struct("<d")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so that trivially different spellings share one cache entry."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def make_cache_key(text: str, voice: str, pitch: float, output_format: str) -> str:
+    """Hash everything that influences the synthesized audio into a cache key."""
+    material = "\x1f".join((normalize_text(text), voice, f"{pitch:.4f}", output_format))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Two-tier cache of synthesized clips keyed by `make_cache_key`.
+
+    A bounded LRU of recently used clips sits in front of a directory of
+    clip files. The directory is trimmed back under its size limit by
+    evicting the least recently used files whenever a new clip is stored.
+    """
+
+    def __init__(self, directory: str, memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        self.directory = directory
+        self.memory_entries = max(0, memory_entries)
+        self.disk_max_bytes = max(0, disk_max_bytes)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        # Size of every file on disk, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.seconds_saved = 0.0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_FILE_SUFFIX)
+
+    def _scan_disk(self):
+        """Index the clips already on disk, oldest first."""
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(CACHE_FILE_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, filename[:-len(CACHE_FILE_SUFFIX)], stat.st_size))
+        for _mtime, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _remember(self, key: str, clip: Tuple[bytes, float]):
+        if self.memory_entries == 0:
+            return
+        self._memory[key] = clip
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[bytes, float]]:
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        (duration,) = _HEADER.unpack_from(data)
+        return data[_HEADER.size:], duration
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Return the cached (audio bytes, duration) for a key, or None."""
+        with self._lock:
+            clip = self._memory.get(key)
+            if clip is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            elif key in self._disk:
+                clip = self._read_disk(key)
+                if clip is None:
+                    self._disk_bytes -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self._remember(key, clip)
+                    self.disk_hits += 1
+            if clip is None:
+                self.misses += 1
+                return None
+            self.bytes_saved += len(clip[0])
+            self.seconds_saved += clip[1]
+            return clip
+
+    def contains(self, key: str) -> bool:
+        """Check for a key without counting it as a lookup."""
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def put(self, key: str, audio: bytes, duration: float):
+        """Store a clip in both tiers."""
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, (audio, duration))
+            size = _HEADER.size + len(audio)
+            if self.disk_max_bytes == 0 or size > self.disk_max_bytes:
+                return
+
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(_HEADER.pack(duration))
+                    f.write(audio)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.error("Failed to write TTS cache file %s: %s", path, e)
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+
+            self._disk_bytes += size - self._disk.pop(key, 0)
+            self._disk[key] = size
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop the least recently used files until the store fits its size limit."""
+        while self._disk_bytes > self.disk_max_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error("Failed to evict TTS cache file for %s: %s", key, e)
+
+    def clear(self):
+        """Remove every cached clip."""
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._disk.clear()
+            self._disk_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the size of both tiers."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "seconds_saved": round(self.seconds_saved, 3),
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_caches: Dict[str, TTSCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_tts_cache(config) -> Optional[TTSCache]:
+    """Get the process-wide cache for the configured cache directory, if caching is enabled."""
+    if not getattr(config, "TTS_CACHE_ENABLED", False):
+        return None
+    directory = os.path.abspath(config.TTS_CACHE_DIR)
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = TTSCache(
+                directory,
+                memory_entries=config.TTS_CACHE_MEMORY_ENTRIES,
+                disk_max_bytes=config.TTS_CACHE_DISK_MAX_BYTES,
+            )
+            _caches[directory] = cache
+        return cache
@@ -0,0 +1,259 @@
+"""Pool of long-lived Azure speech synthesizers for the Neuro Sama module."""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import azure.cognitiveservices.speech as speechsdk
+
+logger = logging.getLogger(__name__)
+
+# Default number of synthesizers per TTS service
+DEFAULT_POOL_SIZE = 4
+
+
+class SynthesizerPoolClosed(RuntimeError):
+    """Raised by a pool that was closed, e.g. because the TTS service changed."""
+
+
+class _PooledSynthesizer:
+    """A synthesizer together with its pre-opened service connection."""
+
+    def __init__(self, speech_config: speechsdk.SpeechConfig):
+        self.synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        self.connection = speechsdk.Connection.from_speech_synthesizer(self.synthesizer)
+        self.connected = False
+        self.healthy = True
+        self.connection.connected.connect(self._on_connected)
+        self.connection.disconnected.connect(self._on_disconnected)
+
+    def _on_connected(self, _event):
+        self.connected = True
+
+    def _on_disconnected(self, _event):
+        self.connected = False
+
+    def connect(self):
+        """Open the service connection ahead of the first synthesis (blocking)."""
+        if not self.connected:
+            self.connection.open(True)
+            self.connected = True
+
+    def speak(self, ssml: str) -> speechsdk.SpeechSynthesisResult:
+        """Synthesize SSML (blocking)."""
+        self.connect()
+        return self.synthesizer.speak_ssml_async(ssml).get()
+
+    def close(self):
+        try:
+            self.connection.close()
+        except Exception as e:
+            logger.debug("Error closing TTS connection: %s", e)
+
+
+class SynthesizerPool:
+    """
+    A fixed number of synthesizers for one TTS service, each keeping its
+    connection open between utterances.
+
+    Blocking SDK calls run on a dedicated executor with one thread per
+    synthesizer, so synthesis never competes with other `to_thread` work.
+    A synthesizer whose synthesis failed is replaced before it is used again.
+
+    Closing the pool stops new calls at once, but the executor is only shut
+    down after the calls already running on it have finished.
+    """
+
+    def __init__(self, key: str, region: str, output_format: speechsdk.SpeechSynthesisOutputFormat,
+                 size: int = DEFAULT_POOL_SIZE):
+        self.key = key
+        self.region = region
+        self.output_format = output_format
+        self.size = max(1, size)
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="azure-tts")
+
+        self._lock = threading.Lock()
+        self._idle: List[_PooledSynthesizer] = []
+        self._available: Optional[asyncio.Semaphore] = None
+        self._closed = False
+        self._in_flight = 0
+
+        self.created = 0
+        self.syntheses = 0
+        self.failures = 0
+        self.replaced = 0
+
+    def _create(self) -> _PooledSynthesizer:
+        speech_config = speechsdk.SpeechConfig(subscription=self.key, region=self.region)
+        speech_config.set_speech_synthesis_output_format(self.output_format)
+        return _PooledSynthesizer(speech_config)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._available is None:
+            self._available = asyncio.Semaphore(self.size)
+        return self._available
+
+    def _checkout_sync(self) -> _PooledSynthesizer:
+        """Take an idle synthesizer, creating or replacing one if needed (blocking)."""
+        with self._lock:
+            entry = self._idle.pop() if self._idle else None
+        if entry is not None and not entry.healthy:
+            entry.close()
+            self.replaced += 1
+            entry = None
+        try:
+            if entry is None:
+                entry = self._create()
+                self.created += 1
+            entry.connect()
+        except Exception:
+            if entry is not None:
+                entry.close()
+            raise
+        return entry
+
+    def _enter(self):
+        """Register a call that uses the executor."""
+        with self._lock:
+            if self._closed:
+                raise SynthesizerPoolClosed(f"TTS synthesizer pool for region {self.region} is closed")
+            self._in_flight += 1
+
+    def _leave(self):
+        """Unregister a call, shutting the executor down after the last one of a closed pool."""
+        with self._lock:
+            self._in_flight -= 1
+            shutdown = self._closed and self._in_flight == 0
+        if shutdown:
+            self.executor.shutdown(wait=False)
+
+    def _checkin(self, entry: _PooledSynthesizer):
+        if self._closed:
+            entry.close()
+            return
+        with self._lock:
+            self._idle.append(entry)
+
+    async def prewarm(self):
+        """Create and connect every synthesizer of the pool up front."""
+        loop = asyncio.get_running_loop()
+        self._enter()
+        try:
+            with self._lock:
+                missing = self.size - len(self._idle)
+            entries = await asyncio.gather(
+                *(loop.run_in_executor(self.executor, self._checkout_sync) for _ in range(missing)),
+                return_exceptions=True,
+            )
+        finally:
+            self._leave()
+        connected = 0
+        for entry in entries:
+            if isinstance(entry, Exception):
+                logger.error("Failed to pre-connect TTS synthesizer: %s", entry)
+            else:
+                self._checkin(entry)
+                connected += 1
+        logger.info("Pre-connected %d TTS synthesizer(s) for region %s", connected, self.region)
+
+    async def synthesize(self, ssml: str, timeout: float) -> speechsdk.SpeechSynthesisResult:
+        """
+        Synthesize SSML on a pooled synthesizer.
+
+        Raises asyncio.TimeoutError after `timeout` seconds; the synthesizer
+        then returns to the pool once the abandoned call has finished.
+        Raises SynthesizerPoolClosed if the pool was closed before the
+        synthesis started, so the caller can retry on the current pool.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore()
+        self._enter()
+        try:
+            await semaphore.acquire()
+        except BaseException:
+            self._leave()
+            raise
+        try:
+            if self._closed:
+                raise SynthesizerPoolClosed(f"TTS synthesizer pool for region {self.region} is closed")
+            entry = await loop.run_in_executor(self.executor, self._checkout_sync)
+        except BaseException:
+            semaphore.release()
+            self._leave()
+            raise
+
+        future = loop.run_in_executor(self.executor, entry.speak, ssml)
+
+        def release(done_future):
+            failed = done_future.cancelled() or done_future.exception() is not None
+            if not failed:
+                failed = done_future.result().reason != speechsdk.ResultReason.SynthesizingAudioCompleted
+            if failed:
+                entry.healthy = False
+                self.failures += 1
+            self.syntheses += 1
+            self._checkin(entry)
+            semaphore.release()
+            self._leave()
+
+        future.add_done_callback(release)
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+
+    def close(self):
+        """Close all idle connections and stop the executor once no call is using it."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            shutdown = self._in_flight == 0
+        for entry in idle:
+            entry.close()
+        if shutdown:
+            self.executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "region": self.region,
+                "size": self.size,
+                "created": self.created,
+                "idle": len(self._idle),
+                "syntheses": self.syntheses,
+                "failures": self.failures,
+                "replaced": self.replaced,
+                "in_flight": self._in_flight,
+            }
+
+
+_pools: Dict[Tuple[str, str, int], SynthesizerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_synthesizer_pool(config, output_format: speechsdk.SpeechSynthesisOutputFormat) -> SynthesizerPool:
+    """Get the process-wide synthesizer pool for the configured TTS service."""
+    pool_key = (config.AZURE_TTS_KEY, config.AZURE_TTS_REGION, output_format.value)
+    with _pools_lock:
+        pool = _pools.get(pool_key)
+        if pool is None:
+            pool = SynthesizerPool(
+                config.AZURE_TTS_KEY, config.AZURE_TTS_REGION, output_format,
+                size=getattr(config, "TTS_POOL_SIZE", DEFAULT_POOL_SIZE),
+            )
+            _pools[pool_key] = pool
+        return pool
+
+
+def close_synthesizer_pools(keep: Optional[SynthesizerPool] = None):
+    """Close every pool except `keep`, e.g. after the TTS service was changed."""
+    with _pools_lock:
+        for pool_key, pool in list(_pools.items()):
+            if pool is not keep:
+                pool.close()
+                del _pools[pool_key]
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """Return the stats of every open pool."""
+    with _pools_lock:
+        return [pool.get_stats() for pool in _pools.values()]
@@ -0,0 +1,523 @@
+"""Per-session turn scheduling for the Neuro Sama module."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..metrics import Gauge, Histogram
+from .chat_ingest import ChatIngestor, DEFAULT_INGEST_MODULES
+
+logger = logging.getLogger(__name__)
+
+# Default number of turns that may run at the same time across all sessions
+DEFAULT_MAX_CONCURRENT_TURNS = 2
+
+# Default number of inputs a session holds while its current turn is running
+DEFAULT_QUEUE_SIZE = 8
+
+# Coalescing defaults: how long to wait for more inputs after the first one,
+# and how many inputs / content characters one turn may take at most
+DEFAULT_COALESCE_WINDOW = 0.25
+DEFAULT_COALESCE_MAX_MESSAGES = 10
+DEFAULT_COALESCE_MAX_CHARS = 2000
+
+# Default priority lanes: dequeue weight and the age (seconds) after which a
+# waiting input is dropped, 0 meaning never
+DEFAULT_LANES = {
+    "high": {"weight": 6, "max_age": 0},
+    "normal": {"weight": 3, "max_age": 60},
+    "low": {"weight": 1, "max_age": 30},
+}
+
+# Default lane of each input module; other modules go to DEFAULT_LANE.
+# Private DMs: "dm_system" is sent by the test client and benchmark,
+# "system_dm" by the dashboard chat tab
+DEFAULT_MODULE_LANES = {
+    "dm_system": "high",
+    "system_dm": "high",
+}
+DEFAULT_LANE = "normal"
+
+RunTurnFunc = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# A queued input: (submission time, input data)
+QueuedInput = Tuple[float, Dict[str, Any]]
+
+# Called with the lane name and the input when a queued input is dropped for its age
+ExpiredFunc = Callable[[str, Dict[str, Any]], None]
+
+
+class _Lane:
+    def __init__(self, name: str, weight: int, max_age: float, maxsize: int):
+        self.name = name
+        self.weight = max(1, int(weight))
+        self.max_age = float(max_age or 0)
+        self.maxsize = maxsize
+        self.items: Deque[QueuedInput] = deque()
+        self.credit = 0
+        self.expired = 0
+
+    def expire(self, now: float) -> List[QueuedInput]:
+        """Drop inputs that waited longer than the lane's age limit and return them."""
+        expired = []
+        if self.max_age <= 0:
+            return expired
+        while self.items and now - self.items[0][0] > self.max_age:
+            expired.append(self.items.popleft())
+            self.expired += 1
+        return expired
+
+
+class PriorityInputQueue:
+    """
+    Input queue with priority lanes.
+
+    Inputs are put into a lane by their `priority` hint if it names a lane,
+    otherwise by their module. Lanes are served by smooth weighted round
+    robin, so a lane with weight 6 gets six turns for every turn of a lane
+    with weight 1, yet no lane is starved. Inputs that waited longer than
+    their lane's age limit are dropped, since an answer would come too late;
+    `on_expired` is told about each of them.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE, lanes: Optional[Dict[str, Dict[str, Any]]] = None,
+                 module_lanes: Optional[Dict[str, str]] = None, default_lane: str = DEFAULT_LANE,
+                 on_expired: Optional[ExpiredFunc] = None):
+        lanes = lanes or DEFAULT_LANES
+        self._lanes: Dict[str, _Lane] = {
+            name: _Lane(name, settings.get("weight", 1), settings.get("max_age", 0), max(1, maxsize))
+            for name, settings in lanes.items()
+        }
+        self.module_lanes = DEFAULT_MODULE_LANES if module_lanes is None else module_lanes
+        self.default_lane = default_lane if default_lane in self._lanes else next(iter(self._lanes))
+        self.on_expired = on_expired
+        self._available = asyncio.Event()
+
+    def _expire(self, lane: _Lane, now: float):
+        for _submitted_at, data in lane.expire(now):
+            if self.on_expired is not None:
+                try:
+                    self.on_expired(lane.name, data)
+                except Exception as e:
+                    logger.error("Error reporting an expired input: %s", e)
+
+    def weight(self, lane_name: str) -> int:
+        """The dequeue weight of a lane."""
+        return self._lanes[lane_name].weight
+
+    def classify(self, data: Dict[str, Any]) -> str:
+        """Return the name of the lane an input belongs to."""
+        hint = data.get("priority")
+        if isinstance(hint, str) and hint in self._lanes:
+            return hint
+        lane = self.module_lanes.get(data.get("module", "system"))
+        return lane if lane in self._lanes else self.default_lane
+
+    def put_nowait(self, data: Dict[str, Any]) -> bool:
+        """Queue an input. Returns False if its lane is full."""
+        lane = self._lanes[self.classify(data)]
+        self._expire(lane, time.monotonic())
+        if len(lane.items) >= lane.maxsize:
+            return False
+        lane.items.append((time.monotonic(), data))
+        self._available.set()
+        return True
+
+    def contains(self, data: Dict[str, Any]) -> bool:
+        """Check whether this exact input object is still queued."""
+        lane = self._lanes[self.classify(data)]
+        self._expire(lane, time.monotonic())
+        return any(queued is data for _submitted_at, queued in lane.items)
+
+    def unget(self, lane_name: str, item: QueuedInput):
+        """Put an input back at the front of its lane."""
+        self._lanes[lane_name].items.appendleft(item)
+        self._available.set()
+
+    def get_nowait(self) -> Optional[Tuple[str, QueuedInput]]:
+        """Take the next input by weighted fair order, or None if all lanes are empty."""
+        now = time.monotonic()
+        ready = []
+        for lane in self._lanes.values():
+            self._expire(lane, now)
+            if lane.items:
+                ready.append(lane)
+        if not ready:
+            self._available.clear()
+            return None
+
+        total = 0
+        chosen = None
+        for lane in ready:
+            lane.credit += lane.weight
+            total += lane.weight
+            if chosen is None or lane.credit > chosen.credit:
+                chosen = lane
+        chosen.credit -= total
+        return chosen.name, chosen.items.popleft()
+
+    def get_from_lane_nowait(self, lane_name: str) -> Optional[QueuedInput]:
+        """Take the next input of one lane, or None if it is empty."""
+        lane = self._lanes[lane_name]
+        self._expire(lane, time.monotonic())
+        return lane.items.popleft() if lane.items else None
+
+    async def get(self) -> Tuple[str, QueuedInput]:
+        """Wait for the next input by weighted fair order."""
+        while True:
+            item = self.get_nowait()
+            if item is not None:
+                return item
+            await self._available.wait()
+
+    async def wait_for_input(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a new input. Returns False on timeout."""
+        self._available.clear()
+        try:
+            await asyncio.wait_for(self._available.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def qsize(self) -> int:
+        return sum(len(lane.items) for lane in self._lanes.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        stats = {}
+        for lane in self._lanes.values():
+            self._expire(lane, now)
+            stats[lane.name] = {
+                "depth": len(lane.items),
+                "expired": lane.expired,
+                "oldest_wait": round(now - lane.items[0][0], 3) if lane.items else 0.0,
+            }
+        return stats
+
+
+class InputCoalescer:
+    """
+    Merges several chat inputs into one, so a single generation can answer a
+    burst of messages.
+
+    Only inputs from the same module with the same audio setting are merged.
+    Their contents are joined line by line, in arrival order.
+    """
+
+    def __init__(self, window: float = DEFAULT_COALESCE_WINDOW, max_messages: int = DEFAULT_COALESCE_MAX_MESSAGES,
+                 max_chars: int = DEFAULT_COALESCE_MAX_CHARS):
+        self.window = max(0.0, window)
+        self.max_messages = max(1, max_messages)
+        self.max_chars = max_chars
+
+    @staticmethod
+    def _key(data: Dict[str, Any]):
+        return data.get("module", "system"), data.get("audio", True)
+
+    def accepts(self, batch: List[Dict[str, Any]], data: Dict[str, Any]) -> bool:
+        """Check whether an input can join the batch."""
+        if len(batch) >= self.max_messages or self._key(data) != self._key(batch[0]):
+            return False
+        chars = sum(len(str(item.get("content", ""))) for item in batch)
+        return chars + len(str(data.get("content", ""))) <= self.max_chars
+
+    @staticmethod
+    def merge(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge a batch of inputs into one."""
+        if len(batch) == 1:
+            return batch[0]
+        merged = dict(batch[0])
+        merged["content"] = "\n".join(str(item.get("content", "")) for item in batch)
+        merged["coalesced"] = len(batch)
+        return merged
+
+
+class TurnLimiter:
+    """
+    Bounds the number of turns running at once.
+
+    Unlike a semaphore, a free slot goes to the waiting turn whose input came
+    from the lane with the highest weight, and among those to the one that
+    waited longest, so a high lane input of one session is not held up by
+    low lane turns of other sessions.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        # Heap of (negated lane weight, arrival number, future)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, weight: int = 1) -> AsyncIterator[None]:
+        """Hold a slot for one turn."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (-weight, next(self._arrivals), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted the slot just as the wait was cancelled
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        self.active -= 1
+        while self._waiters:
+            _weight, _arrival, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+                break
+
+
+class TurnScheduler:
+    """
+    Process-wide bookkeeping of chat sessions and the limit on how many of
+    their turns run concurrently.
+    """
+
+    def __init__(self):
+        self._sessions: Set["ChatSession"] = set()
+        self._limiters: Dict[int, TurnLimiter] = {}
+        self.active_turns = 0
+
+    def limiter(self, limit: int) -> TurnLimiter:
+        """Get the limiter that bounds concurrently running turns."""
+        limiter = self._limiters.get(limit)
+        if limiter is None:
+            limiter = TurnLimiter(limit)
+            self._limiters[limit] = limiter
+        return limiter
+
+    def register(self, session: "ChatSession"):
+        self._sessions.add(session)
+
+    def unregister(self, session: "ChatSession"):
+        self._sessions.discard(session)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the number of running turns and the stats of every session."""
+        sessions = [session.get_stats() for session in self._sessions]
+        return {
+            "active_turns": self.active_turns,
+            "queued_inputs": sum(session["queue_depth"] for session in sessions),
+            "sessions": sessions,
+        }
+
+
+turn_scheduler = TurnScheduler()
+
+
+def _lane_depths() -> Dict[Tuple[str, ...], float]:
+    depths: Dict[Tuple[str, ...], float] = {}
+    for session in list(turn_scheduler._sessions):
+        for lane, stats in session._queue.get_stats().items():
+            depths[(lane,)] = depths.get((lane,), 0) + stats["depth"]
+    return depths
+
+
+QUEUE_WAIT_SECONDS = Histogram("neuro_turn_queue_wait_seconds", "Time an input waited in its session queue")
+Gauge("neuro_turn_queue_depth", "Inputs waiting in session queues", ["lane"]).set_function(_lane_depths)
+Gauge("neuro_active_turns", "Turns running right now").set_function(lambda: turn_scheduler.active_turns)
+Gauge("neuro_ingest_pending", "Chat messages accepted by ingestion and waiting for the next turn").set_function(
+    lambda: sum(session.ingestor.pending for session in list(turn_scheduler._sessions) if session.ingestor)
+)
+
+_session_ids = itertools.count(1)
+
+
+class ChatSession:
+    """
+    Turn state of one chat connection.
+
+    Inputs are queued in priority lanes and run one turn at a time by the
+    session's worker, so an input that arrives mid-turn waits instead of
+    being rejected. Only when its lane is full is an input refused. Turns
+    of different sessions run concurrently, up to the global limit.
+
+    With a `coalescer`, inputs of the same lane that queued up during the
+    previous turn, or that arrive within its window after the first one, are
+    merged into one turn.
+
+    With an `ingestor`, inputs from its modules do not queue individually.
+    They are filtered and sampled by the ingestor, and a single placeholder
+    in the queue stands for the whole batch; the sample is taken when the
+    placeholder's turn comes.
+
+    `on_expired` is awaited with the lane name and the input for every input
+    dropped for waiting longer than its lane's age limit, so the client can
+    be told it will not be answered.
+    """
+
+    def __init__(self, run_turn: RunTurnFunc, max_concurrent_turns: int = DEFAULT_MAX_CONCURRENT_TURNS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, scheduler: TurnScheduler = turn_scheduler,
+                 coalescer: Optional[InputCoalescer] = None, lanes: Optional[Dict[str, Dict[str, Any]]] = None,
+                 module_lanes: Optional[Dict[str, str]] = None, ingestor: Optional[ChatIngestor] = None,
+                 ingest_modules: Iterable[str] = DEFAULT_INGEST_MODULES,
+                 on_expired: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None):
+        self.id = next(_session_ids)
+        self.run_turn = run_turn
+        self.max_concurrent_turns = max_concurrent_turns
+        self.scheduler = scheduler
+        self.coalescer = coalescer
+        self._queue = PriorityInputQueue(queue_size, lanes=lanes, module_lanes=module_lanes,
+                                         on_expired=self._input_expired)
+        self.on_expired = on_expired
+        self._notifications: Set[asyncio.Task] = set()
+        self.ingestor = ingestor
+        self.ingest_modules = frozenset(ingest_modules)
+        # Queued placeholder standing for the ingestor's pending batch
+        self._ingest_marker: Optional[Dict[str, Any]] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.turns = 0
+        self.inputs = 0
+        self.rejected = 0
+        self.in_turn = False
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def start(self):
+        """Start the worker that runs this session's turns."""
+        if self._worker is None:
+            self.scheduler.register(self)
+            self._worker = asyncio.create_task(self._run())
+
+    def _input_expired(self, lane: str, data: Dict[str, Any]):
+        # The ingest placeholder is not a client input; its batch is dropped on the next offer
+        if self.on_expired is None or data is self._ingest_marker:
+            return
+        task = asyncio.get_running_loop().create_task(self._report_expired(lane, data))
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
+
+    async def _report_expired(self, lane: str, data: Dict[str, Any]):
+        try:
+            await self.on_expired(lane, data)
+        except Exception as e:
+            logger.warning("Could not report an expired input of chat session %s: %s", self.id, e)
+
+    def submit(self, data: Dict[str, Any]) -> bool:
+        """Queue an input for a turn. Returns False if its lane is full."""
+        if self.ingestor is not None and data.get("module", "system") in self.ingest_modules:
+            return self._ingest(data)
+        if not self._queue.put_nowait(data):
+            self.rejected += 1
+            return False
+        return True
+
+    def _ingest(self, data: Dict[str, Any]) -> bool:
+        if self._ingest_marker is not None and not self._queue.contains(self._ingest_marker):
+            # The placeholder outlived its lane's age limit, so the batch is stale
+            self.ingestor.drain()
+            self._ingest_marker = None
+        self.ingestor.offer(data)
+        if self._ingest_marker is None and self.ingestor.pending:
+            marker = {"module": data.get("module", "system"), "priority": data.get("priority")}
+            if self._queue.put_nowait(marker):
+                self._ingest_marker = marker
+        # Filtered messages are not errors for the client
+        return True
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def _next_input(self) -> Tuple[str, QueuedInput]:
+        """Take the next input for a turn and its lane, coalescing following inputs into it if enabled."""
+        while True:
+            lane, first = await self._queue.get()
+            if first[1] is not self._ingest_marker:
+                break
+            self._ingest_marker = None
+            batch = self.ingestor.drain()
+            if batch is not None:
+                self.inputs += batch["sampled"]
+                return lane, (first[0], batch)
+
+        self.inputs += 1
+        if self.coalescer is None:
+            return lane, first
+
+        submitted_at, data = first
+        batch = [data]
+        deadline = time.monotonic() + self.coalescer.window
+        while True:
+            item = self._queue.get_from_lane_nowait(lane)
+            if item is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not await self._queue.wait_for_input(remaining):
+                    break
+                continue
+            if item[1] is self._ingest_marker or not self.coalescer.accepts(batch, item[1]):
+                self._queue.unget(lane, item)
+                break
+            batch.append(item[1])
+            self.inputs += 1
+        return lane, (submitted_at, self.coalescer.merge(batch))
+
+    async def _run(self):
+        while True:
+            lane, (submitted_at, data) = await self._next_input()
+            limiter = self.scheduler.limiter(self.max_concurrent_turns)
+            async with limiter.slot(self._queue.weight(lane)):
+                wait = time.monotonic() - submitted_at
+                self.last_wait = wait
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                QUEUE_WAIT_SECONDS.observe(wait)
+                self.turns += 1
+                self.in_turn = True
+                self.scheduler.active_turns += 1
+                try:
+                    await self.run_turn(data)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error("Error in turn of chat session %s: %s", self.id, e, exc_info=True)
+                finally:
+                    self.in_turn = False
+                    self.scheduler.active_turns -= 1
+
+    async def close(self):
+        """Stop the worker, abandoning the current turn and any queued inputs."""
+        self.scheduler.unregister(self)
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._notifications):
+            task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "in_turn": self.in_turn,
+            "queue_depth": self.queue_depth,
+            "lanes": self._queue.get_stats(),
+            "ingest": self.ingestor.get_stats() if self.ingestor is not None else None,
+            "turns": self.turns,
+            "inputs": self.inputs,
+            "rejected": self.rejected,
+            "last_wait": round(self.last_wait, 3),
+            "max_wait": round(self.max_wait, 3),
+            "average_wait": round(self.total_wait / self.turns, 3) if self.turns else 0.0,
+        }
@@ -2,11 +2,13 @@
 
 import json
 import os
+import time
 from pathlib import Path
 import yaml
 import httpx
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from ..metrics import Gauge, Histogram, metrics_response
 from .config import ConfigManager, WorkingDirManager
 
 router = APIRouter()
@@ -17,6 +19,19 @@ app_state = {
     'active_websockets': set()
 }
 
+# 管理操作的指标，通过 /metrics 提供
+ADMIN_ACTIONS = ("get_config", "save_config", "reload_modules", "reset_data")
+ADMIN_ACTION_SECONDS = Histogram("vedal_admin_action_seconds", "Time to handle an admin action", ["action"])
+Gauge("vedal_admin_connections", "Open admin WebSocket connections").set_function(
+    lambda: len(app_state['active_websockets'])
+)
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus 格式的指标."""
+    return metrics_response()
+
 
 
 
@@ -35,6 +50,7 @@ async def websocket_endpoint(websocket: WebSocket):
             # 处理不同的管理消息
             action = message.get("action")
             payload = message.get("payload", {})
+            action_start = time.perf_counter()
             
             if action == "get_config":
                 config = app_state['config_manager'].config
@@ -107,6 +123,10 @@ async def websocket_endpoint(websocket: WebSocket):
                     "request_id": message.get("request_id"),
                     "payload": {"status": "error", "message": f"Unknown action: {action}"}
                 }))
+
+            ADMIN_ACTION_SECONDS.labels(action if action in ADMIN_ACTIONS else "unknown").observe(
+                time.perf_counter() - action_start
+            )
     except WebSocketDisconnect:
         app_state['active_websockets'].remove(websocket)
     except Exception as e: